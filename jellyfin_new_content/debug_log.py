@@ -0,0 +1,66 @@
+import asyncio
+import io
+import time
+from datetime import datetime
+
+import discord
+
+
+class DebugLogSink:
+    """Buffers debug lines and posts them to a channel in as few messages as possible.
+
+    Lines are batched into messages of at most `max_chars` characters and flushed
+    when the next line would not fit or `flush_interval` seconds after the first
+    buffered line. `close()` sends the remainder and attaches the full log as a file.
+    """
+
+    def __init__(self, channel, max_chars=2000, flush_interval=3.0):
+        self.channel = channel
+        self.max_chars = max_chars
+        self.flush_interval = flush_interval
+        self.lines = []
+        self._buffer = []
+        self._size = 0
+        self._lock = asyncio.Lock()
+        self._timer = None
+        self._started = time.monotonic()
+
+    async def write(self, line):
+        self.lines.append(f"[{time.monotonic() - self._started:7.2f}s] {line}")
+        if len(line) > self.max_chars:
+            line = line[:self.max_chars - 3] + "..."
+        if self._buffer and self._size + len(line) + 1 > self.max_chars:
+            await self.flush()
+        self._buffer.append(line)
+        self._size += len(line) + 1
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._buffer:
+                return
+            message = "\n".join(self._buffer)
+            self._buffer = []
+            self._size = 0
+            try:
+                await self.channel.send(message)
+            except discord.HTTPException:
+                # Jurnalul complet ajunge oricum în fișierul de la final
+                pass
+
+    async def close(self, filename):
+        """Flush the remaining lines and attach the full log"""
+        await self.flush()
+        # Anulat abia după flush, ca un mesaj în curs de trimitere să nu fie întrerupt
+        if self._timer and not self._timer.done():
+            self._timer.cancel()
+        if not self.lines:
+            return
+        data = io.BytesIO("\n".join(self.lines).encode("utf-8"))
+        header = f"📄 Jurnal complet ({len(self.lines)} linii, {datetime.now():%d.%m.%Y %H:%M:%S})"
+        await self.channel.send(header, file=discord.File(data, filename=filename))
@@ -1,10 +1,25 @@
 from redbot.core import commands, Config
+from redbot.core.data_manager import cog_data_path
 import asyncio
 import aiohttp
 import discord
+import hashlib
+import heapq
+import json
+import random
+import re
+import secrets
+import time
+from aiohttp import web
 from datetime import datetime, timezone
 from deep_translator import GoogleTranslator
 
+from .debug_log import DebugLogSink
+from .outbox import Outbox
+from .seen_index import SeenIndex
+from .stats import PhaseStats, current_server
+from .translation_cache import TranslationCache
+
 class JellyfinNewContent(commands.Cog):
     """Announces new movies and TV shows added to multiple Jellyfin servers"""
 
@@ -20,20 +35,108 @@ class JellyfinNewContent(commands.Cog):
             "servers": [],
             "check_interval": 6,
             "enable_translation": True,
+            "digest_mode": False,
+            "episode_window": 60,  # minute; episoadele unui serial sunt anunțate împreună, 0 = ignorate
         }
         
+        # Endpoint local pentru plugin-ul Webhook din Jellyfin (dezactivat implicit)
+        default_global = {
+            "webhook_enabled": False,
+            "webhook_host": "0.0.0.0",
+            "webhook_port": 8745,
+            "webhook_debounce": 30,  # secunde de liniște înainte de a anunța un lot
+            "webhook_reconcile_hours": 24,  # polling de rezervă pentru serverele cu webhook
+        }
+
         self.config.register_guild(**default_guild)
+        self.config.register_global(**default_global)
         self.bg_task = None
         self._session: aiohttp.ClientSession = None  # FIX #4: sesiune reutilizabilă
         self.tmdb_base_url = "https://api.themoviedb.org/3"
         self.poster_base_url = "https://image.tmdb.org/t/p/w500"
         self.MAX_ANNOUNCEMENTS_PER_RUN = 20  # FIX #8: limită anti-spam
-
-    # FIX #10: folosim on_ready în loc de start_tasks() în __init__
-    @commands.Cog.listener()
-    async def on_ready(self):
+        self._translation_cache = TranslationCache()
+        self._translators = {}
+        # Traducere în lot: Google acceptă maxim 5000 de caractere per cerere
+        self.TRANSLATION_BATCH_CHARS = 4500
+        self.TRANSLATION_BATCH_ITEMS = 10
+        self.TRANSLATION_DELIMITER = "\n|||\n"
+
+        # Mod digest: mai multe embed-uri per mesaj, listă compactă pentru rafale mari
+        self.DISCORD_MAX_EMBEDS = 10
+        self.DISCORD_MAX_EMBED_CHARS = 6000  # limita Discord pentru toate embed-urile unui mesaj
+        self.DIGEST_MAX_ITEMS_PER_RUN = 200
+        self.DIGEST_COMPACT_THRESHOLD = 30
+        self.DIGEST_COMPACT_PAGE_CHARS = 4000
+
+        # Outbox: verificările doar pun anunțurile în coadă, un worker separat le trimite
+        self._outbox = Outbox(cog_data_path(self) / "outbox.sqlite3")
+        self._outbox_wakeup = asyncio.Event()
+        self.delivery_task = None
+        self.OUTBOX_SEND_INTERVAL = 1  # secunde între mesaje (Discord: 5 mesaje / 5s per canal)
+        self.OUTBOX_BACKOFF_BASE = 30  # secunde, dublat la fiecare încercare eșuată
+        self.OUTBOX_BACKOFF_MAX = 6 * 3600
+        self.OUTBOX_MAX_ATTEMPTS = 8
+
+        # Episoade/sezoane grupate per (guild_id, nume_server, SeriesId); grupurile deschise sunt
+        # salvate în outbox înainte ca cursorul să treacă de episoadele lor
+        self.EPISODE_TYPES = ('Episode', 'Season')
+        self._episode_buckets = self._load_episode_buckets()
+        self._dirty_buckets = set()
+        self._episode_wakeup = asyncio.Event()
+        self._new_series = {}
+        self.episode_task = None
+
+        # Câmpurile care se schimbă la fiecare verificare (cursor, last_check, initialized) sunt
+        # ținute în memorie și scrise în Config grupat, periodic și la unload
+        self._state = {}
+        self.state_task = None
+        self.STATE_FLUSH_INTERVAL = 60
+
+        # Timpi per fază (Jellyfin, TMDb, traducere, trimitere) pe ultimele 24 de ore, per server
+        self._stats = PhaseStats(window=24 * 3600)
+
+        # Planificator per (guild_id, nume_server): heap de (scadență, guild_id, nume_server).
+        # Intrările din heap care nu mai corespund cu _next_due sunt ignorate la extragere.
+        self._schedule_heap = []
+        self._next_due = {}
+        self._schedule_wakeup = asyncio.Event()
+        self.MAX_SCHEDULE_JITTER = 300  # secunde, pentru a împrăștia verificările
+        self.BACKLOG_RETRY_DELAY = 600  # secunde, când o rulare s-a oprit la limita de anunțuri
+        # (guild_id, nume_server) -> (base_url, api_key, tmdb_api_key); guild-urile care urmăresc
+        # același server Jellyfin cu aceeași cheie TMDb (sau fără) în fereastra de mai jos împart
+        # un singur fetch și o singură îmbogățire; cheia TMDb a unui guild nu este folosită pentru altul
+        self._schedule_groups = {}
+        self.SHARED_FETCH_WINDOW = 900
+
+        # Webhook: token -> (guild_id, nume_server) și iteme primite în așteptare (debounce)
+        self._webhook_runner: web.AppRunner = None
+        self._webhook_targets = {}
+        self._webhook_reconcile = 24 * 3600
+        self._pending_push = {}
+        self._last_push_event = {}
+        self._push_tasks = {}
+
+        # Id-urile deja anunțate per (guild_id, nume_server), verificate înainte de TMDb/traducere:
+        # un refresh de metadate sau un item primit și prin webhook nu mai este anunțat din nou
+        self._seen = {}
+        self._seen_dir = cog_data_path(self) / "seen"
+        self._seen_dir.mkdir(parents=True, exist_ok=True)
+        self.MAX_PUSH_WAIT = 300  # secunde, un import masiv nu amână anunțul la nesfârșit
+
+    # FIX #10: task-urile nu mai pornesc din __init__. cog_load rulează și la `load`/`reload` pe un
+    # bot deja pornit (când on_ready nu mai vine); buclele așteaptă singure wait_until_ready()
+    async def cog_load(self):
         if self.bg_task is None or self.bg_task.done():
             self.bg_task = self.bot.loop.create_task(self.check_new_content_loop())
+        if self.delivery_task is None or self.delivery_task.done():
+            self.delivery_task = self.bot.loop.create_task(self.outbox_delivery_loop())
+        if self.episode_task is None or self.episode_task.done():
+            self.episode_task = self.bot.loop.create_task(self.episode_flush_loop())
+        if self.state_task is None or self.state_task.done():
+            self.state_task = self.bot.loop.create_task(self.state_flush_loop())
+        if self._webhook_runner is None and await self.config.webhook_enabled():
+            await self._start_webhook_server()
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """FIX #4: returnează sesiunea existentă sau creează una nouă"""
@@ -41,35 +144,327 @@ class JellyfinNewContent(commands.Cog):
             self._session = aiohttp.ClientSession()
         return self._session
 
-    def cog_unload(self):
+    async def cog_unload(self):
         if self.bg_task:
             self.bg_task.cancel()
+        if self.delivery_task:
+            self.delivery_task.cancel()
+        if self.episode_task:
+            self.episode_task.cancel()
+        if self.state_task:
+            self.state_task.cancel()
+        try:
+            await self._flush_state()
+        except Exception as e:
+            self._log(f"Eroare la salvarea stării serverelor: {e}")
+        for task in self._push_tasks.values():
+            task.cancel()
+        await self._stop_webhook_server()
         # Închide sesiunea aiohttp la unload
         if self._session and not self._session.closed:
-            asyncio.create_task(self._session.close())
+            await self._session.close()
+        self._translation_cache.close()
+        # Grupurile de episoade încă deschise rămân în outbox și sunt reluate la următorul load
+        try:
+            self._save_episode_buckets()
+        except Exception as e:
+            self._log(f"Eroare la salvarea grupurilor de episoade: {e}")
+        self._outbox.close()
+        for index in self._seen.values():
+            index.flush()
+
+    # -------------------------------------------------------------------------
+    # WEBHOOK
+    # -------------------------------------------------------------------------
+
+    async def _start_webhook_server(self):
+        """Start the local aiohttp endpoint that receives Jellyfin webhook events"""
+        await self._stop_webhook_server()
+        host = await self.config.webhook_host()
+        port = await self.config.webhook_port()
+
+        app = web.Application()
+        app.router.add_post("/jellyfin/newcontent/{token}", self._handle_webhook)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+        except OSError as e:
+            self._log(f"Nu pot porni serverul webhook pe {host}:{port}: {e}")
+            await runner.cleanup()
+            return False
+
+        self._webhook_runner = runner
+        self._log(f"Server webhook pornit pe {host}:{port}")
+        self._schedule_wakeup.set()
+        return True
+
+    async def _stop_webhook_server(self):
+        if self._webhook_runner is not None:
+            await self._webhook_runner.cleanup()
+            self._webhook_runner = None
+
+    async def _handle_webhook(self, request):
+        """Receive an ItemAdded event from the Jellyfin Webhook plugin"""
+        target = self._webhook_targets.get(request.match_info.get('token'))
+        if not target:
+            return web.Response(status=404)
+
+        try:
+            payload = await request.json(content_type=None)
+        except ValueError:
+            return web.Response(status=400, text="JSON invalid")
+
+        if payload.get('NotificationType') != 'ItemAdded':
+            return web.Response(status=204)
+
+        item_id = payload.get('ItemId')
+        if not item_id or payload.get('ItemType') not in ('Movie', 'Series', 'Season', 'Episode'):
+            return web.Response(status=204)
+
+        self._queue_pushed_item(target, item_id)
+        return web.Response(status=202)
+
+    def _queue_pushed_item(self, key, item_id):
+        """Buffer a pushed item; the batch is announced after the debounce window"""
+        self._pending_push.setdefault(key, set()).add(item_id)
+        self._last_push_event[key] = time.monotonic()
+        task = self._push_tasks.get(key)
+        if task is None or task.done():
+            self._push_tasks[key] = asyncio.create_task(self._flush_pushed_items(key))
+
+    async def _flush_pushed_items(self, key):
+        """Wait for a quiet period (bulk imports send many events), then announce the batch.
+
+        Items pushed while a batch is being announced form the next batch of the same task,
+        since _queue_pushed_item only starts a new task once this one has finished.
+        """
+        while self._pending_push.get(key):
+            debounce = await self.config.webhook_debounce()
+            started = time.monotonic()
+            while True:
+                now = time.monotonic()
+                quiet = now - self._last_push_event.get(key, started)
+                if quiet >= debounce or now - started >= self.MAX_PUSH_WAIT:
+                    break
+                await asyncio.sleep(min(debounce - quiet, self.MAX_PUSH_WAIT - (now - started)))
+
+            item_ids = self._pending_push.pop(key, set())
+            try:
+                await self._announce_pushed_items(key, item_ids)
+            except Exception as e:
+                self._log(f"[{key[1]}] Eroare la anunțarea itemelor primite prin webhook: {e}")
+
+    async def _announce_pushed_items(self, key, item_ids):
+        """Announce one debounced batch of pushed item Ids"""
+        guild = self.bot.get_guild(key[0])
+        if not item_ids or not guild:
+            return
+
+        settings = await self.config.guild(guild).all()
+        self._apply_state(guild.id, settings.get('servers', []))
+        server = next((s for s in settings.get('servers', []) if s.get('name') == key[1]), None)
+        if not server or not self._is_server_configured(server) or not server.get('initialized'):
+            return
+
+        async def log(msg):
+            self._log(f"[{server['name']}] {msg}")
+
+        channel = guild.get_channel(server['announcement_channel_id'])
+        if not channel:
+            await log(f"❌ Canalul de anunțuri (ID: {server['announcement_channel_id']}) nu a fost găsit în guild!")
+            return
+
+        current_server.set(server['base_url'])
+        items = await self.get_items_by_ids(server['base_url'], server['api_key'], sorted(item_ids))
+        seen = self._seen_index(key)
+        items = [i for i in items if i.get('Id') not in seen]
+        await log(f"📨 Webhook: {len(items)} item(e) noi primite.")
+        await self._announce_items(channel, items, server, settings, log, push_key=key)
+
+    def _seen_path(self, key):
+        guild_id, server_name = key
+        digest = hashlib.sha1(server_name.encode('utf-8')).hexdigest()[:16]
+        return self._seen_dir / f"{guild_id}-{digest}.bin"
+
+    def _seen_index(self, key):
+        """Return the (lazily loaded) index of announced Ids for a (guild_id, server_name)"""
+        index = self._seen.get(key)
+        if index is None:
+            index = self._seen[key] = SeenIndex(str(self._seen_path(key)))
+        return index
+
+    def _drop_seen_index(self, key):
+        self._seen.pop(key, None)
+        path = self._seen_path(key)
+        if path.exists():
+            path.unlink()
+
+    async def get_items_by_ids(self, base_url, api_key, item_ids):
+        """Fetch several items in a single /Items?Ids=... call"""
+        if not item_ids:
+            return []
+        url = (
+            f"{base_url}/Items?"
+            f"Ids={','.join(item_ids)}&"
+            f"Fields=DateCreated,Genres,Overview,CommunityRating,ProductionYear,ProviderIds&"
+            f"api_key={api_key}"
+        )
+        try:
+            session = await self._get_session()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return data.get('Items', [])
+                self._log(f"Eroare Jellyfin la citirea itemelor prin Id: HTTP {response.status}")
+        except Exception as e:
+            self._log(f"Eroare la citirea itemelor prin Id: {e}")
+        return []
 
     async def check_new_content_loop(self):
-        """Background loop to check for new content"""
+        """Background scheduler: each (guild, server) is checked on its own guild's interval"""
         await self.bot.wait_until_ready()
         while True:
-            min_interval = 6
             try:
-                all_guilds = await self.config.all_guilds()
-
-                for guild_id, settings in all_guilds.items():
-                    if 'check_interval' in settings and settings['check_interval'] > 0:
-                        min_interval = min(min_interval, settings['check_interval'])
-
-                for guild_id, settings in all_guilds.items():
-                    guild = self.bot.get_guild(guild_id)
-                    if guild and settings.get('servers'):
-                        for server in settings['servers']:
-                            if self._is_server_configured(server):
-                                await self.check_and_announce_new_content(guild, server, settings)
+                await self._sync_schedule()
+                due_keys = self._pop_due()
+                if due_keys:
+                    await self._run_scheduled_checks(due_keys)
+                await self._wait_for_next_due()
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 self._log(f"Eroare în check_new_content_loop: {e}")
-            finally:
-                await asyncio.sleep(min_interval * 3600)
+                await asyncio.sleep(60)
+
+    def _interval_seconds(self, guild_settings, server=None):
+        """Return the check interval in seconds; webhook servers only poll for reconciliation"""
+        hours = guild_settings.get('check_interval') or 6
+        interval = max(1, hours) * 3600
+        if server and server.get('webhook_token') and self._webhook_runner is not None:
+            interval = max(interval, self._webhook_reconcile)
+        return interval
+
+    def _jitter(self, interval):
+        """Random delay added to each due time so servers are not polled all at once"""
+        return random.uniform(0, min(interval * 0.05, self.MAX_SCHEDULE_JITTER))
+
+    def _schedule(self, key, due):
+        self._next_due[key] = due
+        heapq.heappush(self._schedule_heap, (due, key[0], key[1]))
+
+    def _pop_due(self):
+        """Pop every (guild_id, server_name) whose due time has passed"""
+        now = time.time()
+        due_keys = []
+        while self._schedule_heap and self._schedule_heap[0][0] <= now:
+            due, guild_id, server_name = heapq.heappop(self._schedule_heap)
+            key = (guild_id, server_name)
+            # Intrare învechită (serverul a fost replanificat sau șters)
+            if self._next_due.get(key) != due:
+                continue
+            del self._next_due[key]
+            due_keys.append(key)
+        return due_keys
+
+    async def _wait_for_next_due(self):
+        """Sleep until the next server is due or until the schedule is invalidated"""
+        timeout = None
+        if self._schedule_heap:
+            timeout = max(0, self._schedule_heap[0][0] - time.time())
+        try:
+            await asyncio.wait_for(self._schedule_wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return
+        self._schedule_wakeup.clear()
+
+    async def _sync_schedule(self):
+        """Add newly configured servers to the schedule and drop removed ones"""
+        all_guilds = await self.config.all_guilds()
+        self._webhook_reconcile = max(1, await self.config.webhook_reconcile_hours()) * 3600
+        now = time.time()
+        active = set()
+        webhook_targets = {}
+        schedule_groups = {}
+
+        for guild_id, settings in all_guilds.items():
+            if not self.bot.get_guild(guild_id):
+                continue
+            self._apply_state(guild_id, settings.get('servers', []))
+            for server in settings.get('servers', []):
+                if not self._is_server_configured(server):
+                    continue
+                key = (guild_id, server['name'])
+                active.add(key)
+                schedule_groups[key] = self._fetch_group(server)
+                if server.get('webhook_token'):
+                    webhook_targets[server['webhook_token']] = key
+                interval = self._interval_seconds(settings, server)
+                if key in self._next_due:
+                    continue
+                # Respectăm intervalul față de ultima verificare, chiar și după restart
+                due = now
+                if server.get('initialized') and server.get('last_check'):
+                    due = max(now, server['last_check'] + interval)
+                self._schedule(key, due + self._jitter(interval))
+
+        for key in list(self._next_due):
+            if key not in active:
+                del self._next_due[key]
+        self._webhook_targets = webhook_targets
+        self._schedule_groups = schedule_groups
+
+    @staticmethod
+    def _fetch_group(server):
+        """Subscriptions with the same key share one fetch and one enrichment"""
+        return (server['base_url'], server['api_key'], server.get('tmdb_api_key') or None)
+
+    def _reschedule(self, guild, name=None):
+        """Drop scheduled entries for a guild (or one server) so they are recomputed immediately"""
+        for key in list(self._next_due):
+            if key[0] == guild.id and (name is None or key[1] == name):
+                del self._next_due[key]
+        self._schedule_wakeup.set()
+
+    async def _run_scheduled_checks(self, due_keys):
+        """Run the due checks, fetching once per Jellyfin server shared by several guilds"""
+        settings_cache = {}
+        groups = {}
+        now = time.time()
+
+        # Abonamentele la același server care urmează curând sunt rulate odată cu cele scadente
+        due_groups = {self._schedule_groups.get(key) for key in due_keys}
+        for key, due in list(self._next_due.items()):
+            if self._schedule_groups.get(key) in due_groups and due - now <= self.SHARED_FETCH_WINDOW:
+                del self._next_due[key]
+                due_keys.append(key)
+
+        for guild_id, server_name in due_keys:
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                continue
+            if guild_id not in settings_cache:
+                settings_cache[guild_id] = await self.config.guild(guild).all()
+                self._apply_state(guild_id, settings_cache[guild_id].get('servers', []))
+            settings = settings_cache[guild_id]
+            server = next((s for s in settings.get('servers', []) if s.get('name') == server_name), None)
+            if not server or not self._is_server_configured(server):
+                continue
+            groups.setdefault(self._fetch_group(server), []).append((guild, server, settings))
+
+        for subscriptions in groups.values():
+            results = {}
+            try:
+                results = await self._check_subscriptions(subscriptions)
+            except Exception as e:
+                self._log(f"[{subscriptions[0][1]['name']}] Eroare la verificarea programată: {e}")
+
+            for guild, server, settings in subscriptions:
+                key = (guild.id, server['name'])
+                interval = self._interval_seconds(settings, server)
+                # Dacă au rămas iteme peste limită, revenim curând în loc să așteptăm tot intervalul
+                delay = self.BACKLOG_RETRY_DELAY if results.get(key) else interval
+                self._schedule(key, time.time() + delay + self._jitter(interval))
 
     def _is_server_configured(self, server):
         """Check if a server has all required settings"""
@@ -81,160 +476,673 @@ class JellyfinNewContent(commands.Cog):
 
     async def check_and_announce_new_content(self, guild, server, guild_settings, debug_channel=None):
         """Check for new content and announce it for a specific server.
-        
-        If debug_channel is provided, detailed logs are also sent there as Discord messages.
+
+        Returns True if the per-run limit was hit and more items are still waiting.
+        If debug_channel is provided, detailed logs are also sent there, batched into a few
+        messages, followed by the full log as an attached file.
         """
-        async def log(msg):
-            self._log(f"[{server['name']}] {msg}")
-            if debug_channel:
-                await debug_channel.send(f"`[{server['name']}]` {msg}")
+        debug_log = DebugLogSink(debug_channel) if debug_channel else None
+        try:
+            results = await self._check_subscriptions([(guild, server, guild_settings)], debug_log=debug_log)
+        finally:
+            if debug_log:
+                safe_name = re.sub(r'[^A-Za-z0-9_-]+', '_', server['name'])
+                await debug_log.close(f"newcontent-debug-{safe_name}-{datetime.now():%Y%m%d-%H%M%S}.log")
+        return results.get((guild.id, server['name']), False)
+
+    async def _check_subscriptions(self, subscriptions, debug_log=None):
+        """Fetch and enrich new items once for every subscription to the same Jellyfin server.
+
+        `subscriptions` is a list of (guild, server, guild_settings) sharing base_url, api_key and
+        tmdb_api_key (see _fetch_group).
+        Items are consumed in DateCreated order from the lowest (DateCreated, Id) high-water mark;
+        each subscription keeps its own cursor. Rendered announcements go to the outbox and are
+        sent by the delivery worker, so a cursor only advances past items that are safely queued.
+        Returns {(guild_id, server_name): more_pending}.
+        """
+        lead = subscriptions[0][1]
 
-        channel = guild.get_channel(server['announcement_channel_id'])
-        if not channel:
-            await log(f"❌ Canalul de anunțuri (ID: {server['announcement_channel_id']}) nu a fost găsit în guild!")
-            return
+        async def log(msg, server=lead):
+            self._log(f"[{server['name']}] {msg}")
+            if debug_log:
+                await debug_log.write(f"`[{server['name']}]` {msg}")
 
-        last_check = server.get('last_check')
         now = datetime.now(timezone.utc).timestamp()
+        results = {}
+        active = []
+
+        for guild, server, guild_settings in subscriptions:
+            key = (guild.id, server['name'])
+            results[key] = False
+
+            channel = guild.get_channel(server['announcement_channel_id'])
+            if not channel:
+                await log(f"❌ Canalul de anunțuri (ID: {server['announcement_channel_id']}) nu a fost găsit în guild!", server)
+                continue
+
+            last_check = server.get('last_check')
+            if not last_check or not server.get('initialized', False):
+                await log("⚠️ Serverul nu este inițializat — setez timestamp-ul acum și ies. Folosește `forceinit` după configurare.", server)
+                self._set_server_state(guild.id, server, last_check=now, initialized=True, cursor_date=now, cursor_id="")
+                continue
+
+            # Serverele configurate înainte de high-water mark pornesc de la last_check
+            cursor = (server.get('cursor_date') or last_check, server.get('cursor_id') or "")
+            active.append(self._new_subscription(key, guild, server, guild_settings, channel, cursor))
+
+        if not active:
+            return results
+
+        if len(active) > 1:
+            await log(f"🔗 Fetch comun pentru {len(active)} abonamente la același server Jellyfin.")
+
+        start_cursor = min(sub['cursor'] for sub in active)
+        cursor_dt = datetime.fromtimestamp(start_cursor[0]).strftime("%d.%m.%Y %H:%M:%S")
+        await log(f"🔍 Caut conținut adăugat după: **{cursor_dt}**")
+
+        tmdb_api_key = lead.get('tmdb_api_key') or None
+        translate = any(sub['translate'] for sub in active)
+
+        # Itemele sunt pregătite în loturi, ca descrierile unui lot să fie traduse într-un singur apel
+        chunk = []
+        current_server.set(lead['base_url'])
+        items = self.iter_new_content(lead['base_url'], lead['api_key'], start_cursor, log_fn=log)
+        check_started = time.perf_counter()
+        fetched = 0
+        try:
+            async for item in items:
+                fetched += 1
+                item_key = (item['_created_ts'], item.get('Id') or "")
+                targets = []
+                skipped = []
+                for sub in active:
+                    if sub['done'] or item_key <= sub['cursor']:
+                        continue
+                    if sub['queued'] >= sub['limit']:
+                        await log(f"⚠️ Limita de {sub['limit']} anunțuri atinsă — restul vor fi anunțate la următoarea rulare.", sub['server'])
+                        sub['done'] = True
+                        results[sub['key']] = True
+                        continue
+                    # Itemele deja anunțate (prin webhook, sau readuse de un refresh de metadate)
+                    if item.get('Id') in sub['seen']:
+                        skipped.append(sub)
+                        continue
+                    # Episoadele și sezoanele sunt grupate pe serial, nu anunțate individual
+                    if item.get('Type') in self.EPISODE_TYPES:
+                        self._bucket_episode(sub, item)
+                        skipped.append(sub)
+                        continue
+                    if item.get('Type') == 'Series':
+                        self._mark_new_series(sub, item)
+                    sub['queued'] += 1
+                    targets.append(sub)
+
+                if all(sub['done'] for sub in active):
+                    break
+                if targets or skipped:
+                    chunk.append((item, item_key, targets, skipped))
+                if len(chunk) >= self.TRANSLATION_BATCH_ITEMS:
+                    await self._enqueue_chunk(chunk, tmdb_api_key, translate, log)
+                    chunk = []
+
+            if chunk:
+                await self._enqueue_chunk(chunk, tmdb_api_key, translate, log)
+        finally:
+            await items.aclose()
+            self._stats.record("check", time.perf_counter() - check_started, fetched)
+            # Grupurile de episoade ajung pe disc înainte de Id-urile văzute și de cursor
+            self._save_episode_buckets()
+            for sub in active:
+                sub['seen'].flush()
+                cursor_date, cursor_id = sub['cursor']
+                self._set_server_state(sub['key'][0], sub['server'], cursor_date=cursor_date, cursor_id=cursor_id, last_check=now)
+            self._outbox_wakeup.set()
+
+        for sub in active:
+            if sub['bucketed']:
+                minutes = sub['episode_window'] // 60
+                await log(f"📺 {sub['bucketed']} episod(e)/sezon(e) grupate pe serial (anunț după {minutes} min).", sub['server'])
+            if sub['enqueued']:
+                await log(f"✅ {sub['enqueued']} item(e) noi puse în coada de anunțuri.", sub['server'])
+            else:
+                await log("ℹ️ Niciun item nou găsit după filtrare.", sub['server'])
+        return results
+
+    def _new_subscription(self, key, guild, server, guild_settings, channel, cursor=None):
+        """Per-run fetch state for one (guild, server) subscription"""
+        digest = guild_settings.get('digest_mode', False)
+        return {
+            'key': key,
+            'guild': guild,
+            'server': server,
+            'channel': channel,
+            'translate': guild_settings.get('enable_translation', True),
+            'digest': digest,
+            # În modul digest nu trimitem un mesaj per item, deci limita poate fi mult mai mare
+            'limit': self.DIGEST_MAX_ITEMS_PER_RUN if digest else self.MAX_ANNOUNCEMENTS_PER_RUN,
+            'cursor': cursor,
+            'seen': self._seen_index(key),
+            'episode_window': max(0, guild_settings.get('episode_window', 60)) * 60,
+            'bucketed': 0,
+            'queued': 0,
+            'enqueued': 0,
+            'done': False,
+        }
 
-        if not last_check or not server.get('initialized', False):
-            await log("⚠️ Serverul nu este inițializat — setez timestamp-ul acum și ies. Folosește `forceinit` după configurare.")
-            server['last_check'] = now
-            server['initialized'] = True
-            await self._update_server_in_config(guild, server)
-            return
+    async def _enqueue_chunk(self, chunk, tmdb_api_key, translate, log):
+        """Enrich a chunk of items together and queue the rendered announcements in the outbox.
+
+        `chunk` holds (item, item_key, target_subscriptions, skipped_subscriptions). The whole
+        chunk is written in one transaction; cursors advance only after that commit.
+        """
+        # Itemele doar sărite (webhook, episoade grupate) nu au nevoie de TMDb sau traducere
+        to_enrich = [entry[0] for entry in chunk if entry[2]]
+        try:
+            enriched = await self._enrich_items(to_enrich, tmdb_api_key, translate, log) if to_enrich else []
+        except Exception as e:
+            await log(f"❌ Eroare la pregătirea itemelor: {e}")
+            enriched = [None] * len(to_enrich)
+        enriched = iter(enriched)
+
+        rows = []
+        queued = []
+        for item, item_key, targets, skipped in chunk:
+            enrichment = next(enriched) if targets else None
+            rendered = {}
+            for sub in targets:
+                try:
+                    render_key = (sub['server']['name'], sub['server']['base_url'], sub['translate'])
+                    if render_key not in rendered:
+                        rendered[render_key] = self._build_announcement(item, enrichment, sub['server'], sub['translate'])
+                    content, embed = rendered[render_key]
+                except Exception as e:
+                    await log(f"❌ Eroare la pregătirea anunțului pentru `{item.get('Name', '?')}`: {e}", sub['server'])
+                    continue
+                item_id = item.get('Id') or f"{item.get('Name', '?')}@{item_key[0]}"
+                rows.append({
+                    'guild_id': sub['key'][0],
+                    'channel_id': sub['channel'].id,
+                    'server': sub['server']['name'],
+                    'item_id': item_id,
+                    'digest': int(sub['digest']),
+                    'content': content,
+                    'embed': json.dumps(embed.to_dict()),
+                    'line': self._compact_line(item, sub['server']),
+                })
+                queued.append((sub, item_id))
+
+        self._outbox.enqueue(rows)
+        for sub, item_id in queued:
+            sub['seen'].add(item_id)
+            sub['enqueued'] += 1
+        for item, item_key, targets, skipped in chunk:
+            for sub in targets + skipped:
+                # Cursorul doar avansează (itemele din webhook nu au cursor)
+                if sub['cursor'] is None or item_key > sub['cursor']:
+                    sub['cursor'] = item_key
+
+    def _compact_line(self, item, server):
+        title = item.get('Name', 'Unknown Title')
+        year = item.get('ProductionYear', 'Unknown Year')
+        media_type = "Film" if item.get('Type') == "Movie" else "Serial"
+        line = f"• **{title}** ({year}) — {media_type}"
+        if item.get('Id'):
+            line += f" · [Vezi]({server['base_url']}/web/index.html#!/details?id={item['Id']})"
+        return line
+
+    async def _announce_items(self, channel, items, server, guild_settings, log, push_key=None):
+        """Queue a list of pushed items in order, respecting the per-run limit"""
+        key = push_key or (channel.guild.id, server['name'])
+        sub = self._new_subscription(key, channel.guild, server, guild_settings, channel)
+        episodes = [item for item in items if item.get('Type') in self.EPISODE_TYPES]
+        items = [item for item in items if item.get('Type') not in self.EPISODE_TYPES]
+        for item in items:
+            if item.get('Type') == 'Series':
+                self._mark_new_series(sub, item)
+        for item in episodes:
+            self._bucket_episode(sub, item)
+        if len(items) > sub['limit']:
+            await log(f"⚠️ Limitat la {sub['limit']} anunțuri (din {len(items)} găsite).")
+            items = items[:sub['limit']]
+
+        for start in range(0, len(items), self.TRANSLATION_BATCH_ITEMS):
+            chunk = [
+                (item, (0, item.get('Id') or ""), [sub], [])
+                for item in items[start:start + self.TRANSLATION_BATCH_ITEMS]
+            ]
+            await self._enqueue_chunk(chunk, server.get('tmdb_api_key'), sub['translate'], log)
+        self._save_episode_buckets()
+        sub['seen'].flush()
+        self._outbox_wakeup.set()
 
-        last_check_dt = datetime.fromtimestamp(last_check).strftime("%d.%m.%Y %H:%M:%S")
-        await log(f"🔍 Caut conținut adăugat după: **{last_check_dt}**")
+    # -------------------------------------------------------------------------
+    # EPISOADE (grupare pe serial)
+    # -------------------------------------------------------------------------
 
-        new_items = await self.get_new_content(
-            server['base_url'],
-            server['api_key'],
-            last_check,
-            log_fn=log
-        )
+    def _mark_new_series(self, sub, item):
+        """Remember when a new series was announced, so its initial episodes are not announced again"""
+        key = (sub['key'][0], sub['server']['name'], item.get('Id'))
+        self._new_series[key] = self._item_created_ts(item)
+        while len(self._new_series) > 5000:
+            del self._new_series[next(iter(self._new_series))]
 
-        server['last_check'] = now
-        await self._update_server_in_config(guild, server)
+    def _item_created_ts(self, item):
+        if '_created_ts' in item:
+            return item['_created_ts']
+        try:
+            return self._parse_jellyfin_date(item.get('DateCreated'))
+        except (ValueError, TypeError):
+            return time.time()
+
+    def _bucket_episode(self, sub, item):
+        """Add an Episode/Season item to its series bucket; the bucket is announced when its window ends"""
+        window = sub['episode_window']
+        series_id = item.get('SeriesId')
+        if not window or not series_id:
+            return
+        key = (sub['key'][0], sub['server']['name'], series_id)
+        sub['seen'].add(item.get('Id'))
+
+        # Episodele care sosesc odată cu un serial nou sunt acoperite de anunțul serialului
+        series_created = self._new_series.get(key)
+        if series_created is not None and self._item_created_ts(item) - series_created <= window:
+            return
 
-        if not new_items:
-            await log("ℹ️ Niciun item nou găsit după filtrare.")
+        bucket = self._episode_buckets.get(key)
+        if bucket is None:
+            # Doar identificatorii: setările serverului (URL, chei, canal) sunt citite la anunț
+            opened = time.time()
+            bucket = self._episode_buckets[key] = {
+                'guild_id': sub['key'][0],
+                'server_name': sub['server']['name'],
+                'series_id': series_id,
+                'series_name': item.get('SeriesName') or item.get('Name', 'Unknown Title'),
+                'episodes': {},
+                'seasons': set(),
+                'unnumbered': 0,
+                'opened': opened,
+                'due': opened + window,
+            }
+            self._episode_wakeup.set()
+
+        if item.get('Type') == 'Season':
+            if item.get('IndexNumber') is not None:
+                bucket['seasons'].add(item['IndexNumber'])
+        elif item.get('IndexNumber') is None:
+            bucket['unnumbered'] += 1
+        else:
+            start = item['IndexNumber']
+            end = item.get('IndexNumberEnd') or start
+            season = item.get('ParentIndexNumber') or 0
+            bucket['episodes'].setdefault(season, set()).update(range(start, end + 1))
+        self._dirty_buckets.add(key)
+        sub['bucketed'] += 1
+
+    def _save_episode_buckets(self):
+        """Write the buckets changed since the last save to the outbox database"""
+        keys = [key for key in self._dirty_buckets if key in self._episode_buckets]
+        self._dirty_buckets.clear()
+        if not keys:
+            return
+        self._outbox.save_buckets([
+            (key, json.dumps({
+                **self._episode_buckets[key],
+                'episodes': {str(season): sorted(numbers) for season, numbers in self._episode_buckets[key]['episodes'].items()},
+                'seasons': sorted(self._episode_buckets[key]['seasons']),
+            }))
+            for key in keys
+        ])
+
+    def _load_episode_buckets(self):
+        """Buckets left open by the previous run (restart, reload or crash)"""
+        buckets = {}
+        for key, data in self._outbox.load_buckets().items():
+            bucket = json.loads(data)
+            bucket['episodes'] = {int(season): set(numbers) for season, numbers in bucket['episodes'].items()}
+            bucket['seasons'] = set(bucket['seasons'])
+            # Grupurile salvate de versiunea anterioară conțineau toate setările serverului
+            if 'server' in bucket:
+                bucket['server_name'] = bucket.pop('server').get('name')
+                bucket.pop('channel_id', None)
+                bucket.pop('digest', None)
+            bucket.setdefault('opened', bucket['due'])
+            buckets[key] = bucket
+        return buckets
+
+    def _episode_summary(self, bucket):
+        """Render a bucket as e.g. "S01E05–E06, E08; S02E01–E12" """
+        parts = []
+        for season in sorted(set(bucket['episodes']) | bucket['seasons']):
+            episodes = sorted(bucket['episodes'].get(season, ()))
+            if not episodes:
+                parts.append(f"Sezonul {season}")
+                continue
+            ranges = []
+            start = prev = episodes[0]
+            for episode in episodes[1:] + [None]:
+                if episode == prev + 1:
+                    prev = episode
+                    continue
+                ranges.append(f"E{start:02d}" if start == prev else f"E{start:02d}–E{prev:02d}")
+                start = prev = episode
+            parts.append(f"S{season:02d}" + ", ".join(ranges))
+        if bucket['unnumbered']:
+            parts.append(f"{bucket['unnumbered']} episod(e) fără număr")
+        return "; ".join(parts)
+
+    async def episode_flush_loop(self):
+        """Announce each series bucket once its coalescing window has passed"""
+        await self.bot.wait_until_ready()
+        while True:
+            self._episode_wakeup.clear()
+            now = time.time()
+            due = [key for key, bucket in self._episode_buckets.items() if bucket['due'] <= now]
+            for key in due:
+                bucket = self._episode_buckets.pop(key)
+                self._dirty_buckets.discard(key)
+                try:
+                    await self._flush_episode_bucket(bucket)
+                except asyncio.CancelledError:
+                    self._episode_buckets.setdefault(key, bucket)
+                    raise
+                except Exception as e:
+                    self._log(f"[{bucket['server_name']}] Eroare la anunțarea episoadelor pentru {bucket['series_name']}: {e}")
+                # Anunțul este în outbox (sau nu a putut fi construit); grupul nu mai trebuie reluat
+                self._outbox.delete_bucket(key)
+                if key in self._episode_buckets:
+                    # Un grup nou pentru același serial, deschis cât timp acesta era anunțat
+                    self._dirty_buckets.add(key)
+                    self._save_episode_buckets()
+            if due:
+                self._outbox_wakeup.set()
+
+            next_due = min((bucket['due'] for bucket in self._episode_buckets.values()), default=None)
+            timeout = None if next_due is None else max(0.0, next_due - time.time())
+            try:
+                await asyncio.wait_for(self._episode_wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _flush_episode_bucket(self, bucket):
+        """Queue one "S02E01–E12" announcement for a series bucket, with the server's current settings"""
+        summary = self._episode_summary(bucket)
+        if not summary:
             return
+        server_name = bucket['server_name']
+        series_name = bucket['series_name']
+        guild = self.bot.get_guild(bucket['guild_id'])
+        settings = await self.config.guild(guild).all() if guild else {}
+        server = next((s for s in settings.get('servers', []) if s.get('name') == server_name), None)
+        if not server or not self._is_server_configured(server):
+            self._log(f"[{server_name}] Serverul nu mai este configurat; episoadele noi din {series_name} nu sunt anunțate.")
+            return
+        web_url = f"{server['base_url']}/web/index.html#!/details?id={bucket['series_id']}"
 
-        await log(f"✅ {len(new_items)} item(e) noi găsite.")
+        tmdb_data = None
+        current_server.set(server['base_url'])
+        if server.get('tmdb_api_key'):
+            # Episoadele au ProviderIds proprii; id-ul TMDb al serialului vine din serialul însuși
+            series = await self.get_items_by_ids(server['base_url'], server['api_key'], [bucket['series_id']])
+            series = series[0] if series else {}
+            tmdb_data = await self.search_tmdb(
+                series.get('Name', series_name), series.get('ProductionYear', ""), False,
+                server['tmdb_api_key'], tmdb_id=self._tmdb_id(series)
+            )
 
-        if len(new_items) > self.MAX_ANNOUNCEMENTS_PER_RUN:
-            await log(f"⚠️ Limitat la {self.MAX_ANNOUNCEMENTS_PER_RUN} anunțuri (din {len(new_items)} găsite).")
-            new_items = new_items[:self.MAX_ANNOUNCEMENTS_PER_RUN]
+        short_summary = summary if len(summary) <= 1000 else summary[:997] + "..."
+        embed = discord.Embed(
+            title=series_name,
+            description=f"Episoade noi: **{short_summary}**",
+            color=discord.Color.green()
+        )
+        if tmdb_data and tmdb_data.get('poster_path'):
+            embed.set_thumbnail(url=f"{self.poster_base_url}{tmdb_data['poster_path']}")
+        episode_count = sum(len(episodes) for episodes in bucket['episodes'].values()) + bucket['unnumbered']
+        if episode_count:
+            embed.add_field(name="Episoade", value=str(episode_count), inline=True)
+        embed.add_field(name="Vizionare Online:", value=f"[{server_name}]({web_url})", inline=False)
+
+        line_summary = summary if len(summary) <= 200 else summary[:197] + "..."
+        self._outbox.enqueue([{
+            'guild_id': bucket['guild_id'],
+            'channel_id': server['announcement_channel_id'],
+            'server': server_name,
+            # Momentul deschiderii deosebește un grup nou cu aceleași episoade (ex: sezon reimportat)
+            'item_id': f"{bucket['series_id']}:{bucket['opened']}:{summary}",
+            'digest': int(settings.get('digest_mode', False)),
+            'content': f"**Episoade noi adăugate pe {server_name}:**",
+            'embed': json.dumps(embed.to_dict()),
+            'line': f"• **{series_name}** — {line_summary} · [Vezi]({web_url})",
+        }])
 
-        for item in new_items:
+    # -------------------------------------------------------------------------
+    # LIVRARE (OUTBOX)
+    # -------------------------------------------------------------------------
+
+    async def outbox_delivery_loop(self):
+        """Drain the outbox: send due announcements, back off on failures, sleep until the next one"""
+        await self.bot.wait_until_ready()
+        while True:
+            self._outbox_wakeup.clear()
             try:
-                await self.announce_item(channel, item, server, guild_settings)
-                await asyncio.sleep(1)
+                await self._drain_outbox()
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                await log(f"❌ Eroare la anunțarea itemului `{item.get('Name', '?')}`: {e}")
+                self._log(f"Eroare în livrarea anunțurilor: {e}")
+                await asyncio.sleep(self.OUTBOX_BACKOFF_BASE)
+
+            next_due = self._outbox.next_due()
+            timeout = None if next_due is None else max(0.0, next_due - time.time())
+            try:
+                await asyncio.wait_for(self._outbox_wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _backoff(self, attempts):
+        delay = min(self.OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1), self.OUTBOX_BACKOFF_MAX)
+        return delay + random.uniform(0, delay / 10)
+
+    async def _drain_outbox(self):
+        """Send every due row, grouped per channel so digest rows can share messages"""
+        rows = self._outbox.due()
+        groups = {}
+        for row in rows:
+            groups.setdefault((row['channel_id'], row['server'], row['digest']), []).append(row)
+
+        for (channel_id, server_name, digest), group in groups.items():
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                self._outbox.mark_failed([row['id'] for row in group], "Canalul de anunțuri nu mai există")
+                self._log(f"[{server_name}] ❌ Canalul {channel_id} nu mai există — {len(group)} anunț(uri) abandonate.")
+                continue
+
+            if digest:
+                messages = self._pack_digest(group, server_name)
+            else:
+                messages = [
+                    ([row], {'content': row['content'], 'embed': discord.Embed.from_dict(json.loads(row['embed']))})
+                    for row in group
+                ]
+
+            base_url = self._schedule_groups.get((group[0]['guild_id'], server_name), (None,))[0]
+            for index, (batch, kwargs) in enumerate(messages):
+                ids = [row['id'] for row in batch]
+                try:
+                    with self._stats.timer("send", items=len(batch), server=base_url):
+                        await channel.send(**kwargs)
+                except discord.HTTPException as e:
+                    self._stats.retry("send", server=base_url)
+                    attempts = max(row['attempts'] for row in batch) + 1
+                    if isinstance(e, discord.NotFound) or attempts >= self.OUTBOX_MAX_ATTEMPTS:
+                        self._outbox.mark_failed(ids, str(e))
+                        self._log(f"[{server_name}] ❌ Anunț abandonat după {attempts} încercări: {e}")
+                        continue
+                    retry_at = time.time() + self._backoff(attempts)
+                    self._outbox.mark_retry(ids, str(e), retry_at)
+                    # Restul mesajelor din canal așteaptă după cel eșuat, ca ordinea să rămână aceeași
+                    held = [row['id'] for later, _ in messages[index + 1:] for row in later]
+                    self._outbox.mark_retry(held, None, retry_at, count_attempt=False)
+                    self._log(f"[{server_name}] ⚠️ Trimitere eșuată (încercarea {attempts}), reîncerc în {int(retry_at - time.time())}s: {e}")
+                    break
+                self._outbox.mark_sent(ids)
+                await asyncio.sleep(self.OUTBOX_SEND_INTERVAL)
+
+    def _pack_digest(self, rows, server_name):
+        """Group digest rows into messages: packed embeds, or a compact list for large bursts"""
+        messages = []
+        if len(rows) >= self.DIGEST_COMPACT_THRESHOLD:
+            page = []
+            size = 0
+            for row in rows + [None]:
+                if page and (row is None or size + len(row['line']) + 1 > self.DIGEST_COMPACT_PAGE_CHARS):
+                    embed = discord.Embed(
+                        title=f"📺 {len(page)} titluri noi pe {server_name}",
+                        description="\n".join(r['line'] for r in page),
+                        color=discord.Color.green()
+                    )
+                    messages.append((page, {'embed': embed}))
+                    page = []
+                    size = 0
+                if row is not None:
+                    page.append(row)
+                    size += len(row['line']) + 1
+            return messages
+
+        batch = []
+        embeds = []
+        size = 0
+        for row in rows + [None]:
+            embed = discord.Embed.from_dict(json.loads(row['embed'])) if row is not None else None
+            if batch and (
+                embed is None
+                or len(batch) >= self.DISCORD_MAX_EMBEDS
+                or size + len(embed) > self.DISCORD_MAX_EMBED_CHARS
+            ):
+                if len(batch) == 1:
+                    content = batch[0]['content']
+                else:
+                    content = f"**{len(batch)} titluri noi adăugate pe {server_name}:**"
+                messages.append((batch, {'content': content, 'embeds': embeds}))
+                batch = []
+                embeds = []
+                size = 0
+            if row is not None:
+                batch.append(row)
+                embeds.append(embed)
+                size += len(embed)
+        return messages
 
     async def _update_server_in_config(self, guild, updated_server):
-        """Update a specific server in the config"""
-        servers = await self.config.guild(guild).servers()
+        """Update a specific server in the config (including its current state fields)"""
+        servers = await self._get_servers(guild)
         for i, server in enumerate(servers):
             if server.get('name') == updated_server.get('name'):
                 servers[i] = updated_server
                 break
         await self.config.guild(guild).servers.set(servers)
+        self._state.pop((guild.id, updated_server.get('name')), None)
 
-    async def get_new_content(self, base_url, api_key, last_check, log_fn=None):
-        """Get new movies and TV shows added since last check"""
-        async def log(msg):
-            self._log(msg)
-            if log_fn:
-                await log_fn(msg)
+    # -------------------------------------------------------------------------
+    # STARE (write-behind)
+    # -------------------------------------------------------------------------
 
-        # Convertim last_check în format ISO pentru Jellyfin
-        min_date = datetime.fromtimestamp(last_check, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.0000000Z")
+    async def _get_servers(self, guild):
+        """Servers from Config with pending state changes applied"""
+        servers = await self.config.guild(guild).servers()
+        return self._apply_state(guild.id, servers)
 
-        search_url = (
-            f"{base_url}/Items?"
-            f"IncludeItemTypes=Movie,Series&"
-            f"SortBy=DateCreated,SortName&SortOrder=Descending&"
-            f"Recursive=true&"
-            f"Fields=DateCreated,Genres,Overview,CommunityRating,ProductionYear&"
-            f"MinDateLastSaved={min_date}&"
-            f"Limit=50&"
-            f"api_key={api_key}"
-        )
+    def _apply_state(self, guild_id, servers):
+        """Overlay pending (not yet flushed) state fields onto server dicts read from Config"""
+        for server in servers:
+            pending = self._state.get((guild_id, server.get('name')))
+            if pending:
+                server.update(pending)
+        return servers
+
+    def _set_server_state(self, guild_id, server, **fields):
+        """Record cursor/check fields in memory; they reach Config on the next flush"""
+        server.update(fields)
+        self._state.setdefault((guild_id, server['name']), {}).update(fields)
+
+    async def state_flush_loop(self):
+        """Periodically write pending state fields to Config"""
+        while True:
+            await asyncio.sleep(self.STATE_FLUSH_INTERVAL)
+            try:
+                await self._flush_state()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._log(f"Eroare la salvarea stării serverelor: {e}")
 
-        await log(f"📡 Request către Jellyfin (din {min_date[:10]}): `{base_url}/Items?...`")
+    async def _flush_state(self):
+        """Write all pending state fields, one Config write per guild.
+
+        Fields stay in `_state` (and keep overlaying Config reads) until their guild's write
+        succeeds; a guild whose write fails is logged and retried on the next flush.
+        """
+        by_guild = {}
+        for (guild_id, server_name), fields in self._state.items():
+            by_guild.setdefault(guild_id, {})[server_name] = dict(fields)
 
+        for guild_id, updates in by_guild.items():
+            try:
+                async with self.config.guild_from_id(guild_id).servers() as servers:
+                    for server in servers:
+                        fields = updates.get(server.get('name'))
+                        if fields:
+                            server.update(fields)
+            except Exception as e:
+                self._log(f"Eroare la salvarea stării serverelor pentru guild {guild_id}: {e}")
+                continue
+            # Scoatem doar câmpurile scrise; cele actualizate între timp rămân pentru următorul flush
+            for server_name, fields in updates.items():
+                key = (guild_id, server_name)
+                current = self._state.get(key)
+                if current is None:
+                    continue
+                for field, value in fields.items():
+                    if field in current and current[field] == value:
+                        del current[field]
+                if not current:
+                    del self._state[key]
+
+    @staticmethod
+    def _parse_jellyfin_date(value):
+        """Parse a Jellyfin ISO date (7-digit fractions, trailing Z) into a UTC timestamp"""
+        value = value.replace('Z', '+00:00')
+        # Python < 3.11 acceptă maxim 6 zecimale la secunde
+        value = re.sub(r'\.(\d+)', lambda m: '.' + m.group(1)[:6].ljust(6, '0'), value, count=1)
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+    async def _fetch_items_page(self, url, log):
+        """Fetch one page of /Items with retries; returns None if every attempt failed"""
         max_retries = 3
         retry_delay = 2
 
         for attempt in range(max_retries):
+            if attempt:
+                self._stats.retry("jellyfin")
             try:
                 session = await self._get_session()
-                async with session.get(search_url) as response:
-                    await log(f"📶 Răspuns Jellyfin: HTTP {response.status}")
-
-                    if response.status == 200:
-                        data = await response.json()
-                        items = data.get('Items', [])
-                        await log(f"📦 Total iteme returnate de Jellyfin (Movie + Series): **{len(items)}**")
-
-                        if not items:
-                            await log("⚠️ Jellyfin a returnat 0 iteme. Verifică dacă librăria are conținut și dacă API key-ul este corect.")
-                            return []
-
-                        # Afișăm primele 5 iteme pentru context
-                        preview = ", ".join(
-                            f"`{i.get('Name', '?')} ({i.get('Type', '?')}) — {i.get('DateCreated', '?')[:19]}`"
-                            for i in items[:5]
-                        )
-                        await log(f"🔎 Primele iteme din răspuns: {preview}")
-
-                        # Filtrare după timestamp
-                        filtered_items = []
-                        skipped_old = 0
-                        skipped_date_error = 0
-
-                        for item in items:
-                            date_created = item.get('DateCreated')
-                            item_name = item.get('Name', '?')
-                            item_type = item.get('Type', '?')
-
-                            if not date_created:
-                                await log(f"⚠️ Itemul `{item_name}` nu are câmpul DateCreated — ignorat.")
-                                skipped_date_error += 1
-                                continue
-
-                            try:
-                                item_date = datetime.fromisoformat(date_created.replace('Z', '+00:00'))
-                                item_timestamp = item_date.timestamp()
-
-                                if item_timestamp > last_check:
-                                    await log(f"✅ NOU: `{item_name}` ({item_type}) — adăugat la {date_created[:19]}")
-                                    filtered_items.append(item)
-                                else:
-                                    skipped_old += 1
-                                    # Oprim după primul item mai vechi (lista e sortată descrescător)
-                                    break
-
-                            except (ValueError, TypeError) as e:
-                                await log(f"❌ Eroare la parsarea datei pentru `{item_name}`: {e} — ignorat.")
-                                skipped_date_error += 1
-
-                        await log(
-                            f"📊 Rezultat filtrare: **{len(filtered_items)} noi**, "
-                            f"{skipped_old} mai vechi (oprit la primul vechi), "
-                            f"{skipped_date_error} cu erori de dată."
-                        )
-                        return filtered_items
-
-                    elif response.status == 401:
-                        await log("❌ HTTP 401 — API key Jellyfin invalid sau expirat!")
-                    elif response.status == 404:
-                        await log("❌ HTTP 404 — URL-ul serverului Jellyfin este greșit sau serverul nu rulează.")
-                    else:
-                        await log(f"❌ HTTP {response.status} — eroare necunoscută de la Jellyfin.")
+                with self._stats.timer("jellyfin", items=0) as timing:
+                    async with session.get(url) as response:
+                        status = response.status
+                        if status == 200:
+                            data = await response.json()
+                            timing['items'] = len(data.get('Items', []))
+                if status == 200:
+                    return data.get('Items', [])
+                elif status == 401:
+                    await log("❌ HTTP 401 — API key Jellyfin invalid sau expirat!")
+                elif status == 404:
+                    await log("❌ HTTP 404 — URL-ul serverului Jellyfin este greșit sau serverul nu rulează.")
+                else:
+                    await log(f"❌ HTTP {status} — eroare necunoscută de la Jellyfin.")
 
             except aiohttp.ClientConnectorError as e:
                 await log(f"❌ Nu mă pot conecta la Jellyfin (tentativa {attempt+1}/{max_retries}): {e}")
@@ -245,107 +1153,354 @@ class JellyfinNewContent(commands.Cog):
                 await log(f"⏳ Reîncerc în {retry_delay} secunde...")
                 await asyncio.sleep(retry_delay)
 
-        await log("❌ Toate tentativele au eșuat. Se returnează listă goală.")
-        return []
+        return None
+
+    async def iter_new_content(self, base_url, api_key, cursor, log_fn=None, page_size=50):
+        """Yield movies and TV shows created after the (DateCreated, Id) cursor, oldest first.
+
+        Pages through /Items newest first and stops at the first page that reaches below the
+        cursor, so a metadata refresh (which moves DateLastSaved of old items) does not turn
+        every check into a scan of the whole library. Only (DateCreated, Id) pairs are kept
+        while paging; the items are then fetched by Id, one page at a time, in strictly
+        increasing (DateCreated, Id) order — the same order as the cursor. Each yielded
+        item carries its parsed `_created_ts`.
+        """
+        async def log(msg):
+            self._log(msg)
+            if log_fn:
+                await log_fn(msg)
+
+        cursor_ts, cursor_id = cursor
+        # MinDateLastSaved restrânge setul; DateCreated + Id decid ce este cu adevărat nou
+        min_date = datetime.fromtimestamp(cursor_ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.0000000Z")
+        await log(f"📡 Request către Jellyfin (din {min_date[:10]}): `{base_url}/Items?...`")
+
+        start_index = 0
+        pages = 0
+        skipped_old = 0
+        skipped_date_error = 0
+        # (DateCreated, Id) ale itemelor noi; paginile se pot suprapune dacă apar iteme noi în timpul parcurgerii
+        new_keys = {}
+
+        while True:
+            search_url = (
+                f"{base_url}/Items?"
+                f"IncludeItemTypes=Movie,Series,Season,Episode&"
+                f"SortBy=DateCreated,SortName&SortOrder=Descending&"
+                f"Recursive=true&"
+                f"Fields=DateCreated&"
+                f"MinDateLastSaved={min_date}&"
+                f"StartIndex={start_index}&"
+                f"Limit={page_size}&"
+                f"api_key={api_key}"
+            )
+
+            items = await self._fetch_items_page(search_url, log)
+            if items is None:
+                # Fără pagina lipsă am sări peste iteme; nimic nu este anunțat, cursorul rămâne pe loc
+                await log("❌ Toate tentativele au eșuat. Reluăm de la ultimul item procesat data viitoare.")
+                return
+
+            pages += 1
+            await log(f"📦 Pagina {pages}: **{len(items)}** iteme returnate de Jellyfin (de la indexul {start_index}).")
+
+            reached_cursor = False
+            for item in items:
+                date_created = item.get('DateCreated')
+                item_name = item.get('Name', '?')
+
+                if not date_created:
+                    await log(f"⚠️ Itemul `{item_name}` nu are câmpul DateCreated — ignorat.")
+                    skipped_date_error += 1
+                    continue
+
+                try:
+                    created_ts = self._parse_jellyfin_date(date_created)
+                except (ValueError, TypeError) as e:
+                    await log(f"❌ Eroare la parsarea datei pentru `{item_name}`: {e} — ignorat.")
+                    skipped_date_error += 1
+                    continue
+
+                # Itemele modificate recent dar create înainte de cursor sunt ignorate
+                if (created_ts, item.get('Id') or "") <= (cursor_ts, cursor_id):
+                    skipped_old += 1
+                    # Itemele cu aceeași dată ca cursorul pot fi încă noi (ordinea lor e după nume)
+                    if created_ts < cursor_ts:
+                        reached_cursor = True
+                    continue
+                if item.get('Id'):
+                    new_keys[item['Id']] = created_ts
+
+            if reached_cursor or len(items) < page_size:
+                break
+            start_index += page_size
+
+        ordered = sorted((created_ts, item_id) for item_id, created_ts in new_keys.items())
+        await log(
+            f"📊 Rezultat filtrare: **{len(ordered)} noi** în {pages} pagin(i), "
+            f"{skipped_old} mai vechi decât cursorul, "
+            f"{skipped_date_error} cu erori de dată."
+        )
+
+        # Detaliile complete, în ordine crescătoare, câte o pagină
+        for offset in range(0, len(ordered), page_size):
+            batch = ordered[offset:offset + page_size]
+            details_url = (
+                f"{base_url}/Items?"
+                f"Ids={','.join(item_id for _, item_id in batch)}&"
+                f"Fields=DateCreated,Genres,Overview,CommunityRating,ProductionYear,ProviderIds&"
+                f"api_key={api_key}"
+            )
+            details = await self._fetch_items_page(details_url, log)
+            if details is None:
+                # Cursorul se oprește înaintea lotului lipsă, care este reluat data viitoare
+                await log("❌ Detaliile itemelor noi nu au putut fi obținute. Reluăm de aici data viitoare.")
+                return
+            by_id = {item.get('Id'): item for item in details}
+            for created_ts, item_id in batch:
+                item = by_id.get(item_id)
+                if item is None:
+                    # Șters între timp
+                    continue
+                item['_created_ts'] = created_ts
+                await log(f"✅ NOU: `{item.get('Name', '?')}` ({item.get('Type', '?')}) — adăugat la {item.get('DateCreated', '')[:19]}")
+                yield item
 
     async def translate_text(self, text, target_lang="ro"):
-        """Translate text using Google Translate via deep-translator"""
-        if not text or text == 'No description available.':
+        """Translate text using Google Translate via deep-translator (cached on disk)"""
+        if not self._needs_translation(text):
             return text
-        
+
+        translated = await self._translation_cache.translate(
+            text, target_lang, lambda t: self._translate_remote(t, target_lang)
+        )
+        return translated or text
+
+    def _needs_translation(self, text):
+        """Skip empty placeholders and text that already looks Romanian"""
+        if not text or text == 'No description available.':
+            return False
         # FIX #5: nu traducem dacă textul pare deja în română
         # (detecție simplă după caractere specifice)
-        romanian_chars = set('ăâîșțĂÂÎȘȚ')
-        if any(c in romanian_chars for c in text):
-            return text
-        
+        return not any(c in 'ăâîșțĂÂÎȘȚ' for c in text)
+
+    async def translate_many(self, texts, target_lang="ro", log_fn=None):
+        """Translate several texts, packing cache misses into as few backend calls as possible.
+
+        Texts are joined with a delimiter up to TRANSLATION_BATCH_CHARS; if the delimiters do
+        not survive the round-trip, that batch falls back to one call per text. Texts already
+        being translated by a concurrent check are awaited, not sent again (TranslationCache).
+        """
+        pending = [text for text in dict.fromkeys(texts) if self._needs_translation(text)]
+        if not pending:
+            return list(texts)
+
+        async def translate_packed(misses):
+            results = []
+            for batch in self._pack_translation_batches(misses):
+                results.extend(await self._translate_batch(batch, target_lang, log_fn))
+            return results
+
+        translated = await self._translation_cache.translate_many(pending, target_lang, translate_packed)
+        translated = dict(zip(pending, translated))
+        return [translated.get(text) or text for text in texts]
+
+    def _pack_translation_batches(self, texts):
+        """Group texts greedily so each joined batch stays under the backend's character limit"""
+        batches = []
+        current = []
+        size = 0
+        for text in texts:
+            extra = len(text) + (len(self.TRANSLATION_DELIMITER) if current else 0)
+            if current and size + extra > self.TRANSLATION_BATCH_CHARS:
+                batches.append(current)
+                current = []
+                extra = len(text)
+                size = 0
+            current.append(text)
+            size += extra
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _translate_batch(self, batch, target_lang, log_fn=None):
+        """Translate a packed batch in one call; degrade to per-text calls if it cannot be split back.
+
+        Returns one translation (or None) per text; the caller stores them in the cache.
+        """
+        async def log(msg):
+            self._log(msg)
+            if log_fn:
+                await log_fn(msg)
+
+        if len(batch) == 1:
+            return [await self._translate_remote(batch[0], target_lang)]
+
+        joined = self.TRANSLATION_DELIMITER.join(batch)
+        started = time.perf_counter()
+        translated = await self._translate_remote(joined, target_lang, items=len(batch))
+        elapsed = time.perf_counter() - started
+
+        parts = re.split(r'\s*\|\|\|\s*', translated.strip()) if translated else []
+        if len(parts) == len(batch):
+            await log(f"🌐 Traducere în lot: {len(batch)} texte, {len(joined)} caractere, {elapsed:.2f}s")
+            return parts
+
+        await log(
+            f"⚠️ Traducerea în lot a eșuat ({len(parts)}/{len(batch)} fragmente, {elapsed:.2f}s) — "
+            f"traduc fiecare text separat."
+        )
+        return [await self._translate_remote(text, target_lang) for text in batch]
+
+    def _get_translator(self, target_lang):
+        """Reuse one GoogleTranslator per target language"""
+        if target_lang not in self._translators:
+            self._translators[target_lang] = GoogleTranslator(source='auto', target=target_lang)
+        return self._translators[target_lang]
+
+    async def _translate_remote(self, text, target_lang, items=1):
+        """Call the translation backend with retries; returns None if every attempt failed"""
         max_retries = 3
         retry_delay = 2
-        
-        for attempt in range(max_retries):
-            try:
-                loop = asyncio.get_event_loop()
-                translator = GoogleTranslator(source='auto', target=target_lang)
-                translated = await loop.run_in_executor(None, translator.translate, text)
-                return translated
-            except Exception as e:
-                print(f"Error translating text on attempt {attempt+1}: {e}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(retry_delay)
-        
-        return text
 
-    async def search_tmdb(self, title, year, is_movie, tmdb_api_key):
-        """Search TMDb for additional media info"""
+        with self._stats.timer("translate", items=items):
+            for attempt in range(max_retries):
+                if attempt:
+                    self._stats.retry("translate")
+                try:
+                    loop = asyncio.get_event_loop()
+                    translator = self._get_translator(target_lang)
+                    translated = await loop.run_in_executor(None, translator.translate, text)
+                    return translated
+                except Exception as e:
+                    print(f"Error translating text on attempt {attempt+1}: {e}")
+                    if attempt < max_retries - 1:
+                        await asyncio.sleep(retry_delay)
+
+            return None
+
+    async def search_tmdb(self, title, year, is_movie, tmdb_api_key, tmdb_id=None):
+        """Fetch TMDb data: directly by id when Jellyfin already knows it, otherwise by title search"""
         if not tmdb_api_key:
             return None
-            
+
         media_type = "movie" if is_movie else "tv"
+        if tmdb_id:
+            # Detaliile și imaginile vin într-un singur apel
+            details_url = (
+                f"{self.tmdb_base_url}/{media_type}/{tmdb_id}?api_key={tmdb_api_key}"
+                f"&append_to_response=images&include_image_language=ro,en,null"
+            )
+            details = await self._tmdb_get(details_url)
+            if details:
+                return {
+                    'poster_path': details.get('poster_path') or self._first_poster(details),
+                    'overview': details.get('overview'),
+                    'tmdb_id': details.get('id', tmdb_id)
+                }
+
+        # Fallback: căutare după titlu; rezultatul conține deja posterul și descrierea
         search_url = f"{self.tmdb_base_url}/search/{media_type}?api_key={tmdb_api_key}&query={title}&year={year}"
-        
+        data = await self._tmdb_get(search_url)
+        results = (data or {}).get('results', [])
+        if results:
+            tmdb_data = results[0]
+            return {
+                'poster_path': tmdb_data.get('poster_path'),
+                'overview': tmdb_data.get('overview'),
+                'tmdb_id': tmdb_data.get('id')
+            }
+        return None
+
+    async def _tmdb_get(self, url):
+        """GET a TMDb endpoint with retries; returns the JSON body, or None (404 is not retried)"""
         timeout = aiohttp.ClientTimeout(total=30)
         max_retries = 3
         retry_delay = 2
-        
-        for attempt in range(max_retries):
-            try:
-                session = await self._get_session()  # FIX #4: sesiune reutilizabilă
-                async with session.get(search_url, timeout=timeout) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        results = data.get('results', [])
-                        if results:
-                            tmdb_data = results[0]
-                            tmdb_id = tmdb_data.get('id')
-                            
-                            if tmdb_id:
-                                details_url = f"{self.tmdb_base_url}/{media_type}/{tmdb_id}?api_key={tmdb_api_key}"
-                                async with session.get(details_url, timeout=timeout) as details_response:
-                                    if details_response.status == 200:
-                                        details = await details_response.json()
-                                        return {
-                                            'poster_path': details.get('poster_path'),
-                                            'overview': details.get('overview'),
-                                            'tmdb_id': tmdb_id
-                                        }
-                            
-                            return {
-                                'poster_path': tmdb_data.get('poster_path'),
-                                'overview': tmdb_data.get('overview'),
-                                'tmdb_id': tmdb_id
-                            }
-                    elif response.status == 429:
-                        await asyncio.sleep(retry_delay * (attempt + 2))
-                        continue
-                    else:
-                        print(f"TMDb API error: Status {response.status}")
-            except Exception as e:
-                print(f"Error searching TMDb on attempt {attempt+1}: {e}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(retry_delay)
-        
-        return None
 
-    async def announce_item(self, channel, item, server, guild_settings):
-        """Create and send an announcement for a new item"""
+        with self._stats.timer("tmdb"):
+            for attempt in range(max_retries):
+                if attempt:
+                    self._stats.retry("tmdb")
+                try:
+                    session = await self._get_session()  # FIX #4: sesiune reutilizabilă
+                    async with session.get(url, timeout=timeout) as response:
+                        if response.status == 200:
+                            return await response.json()
+                        elif response.status == 404:
+                            return None
+                        elif response.status == 429:
+                            await asyncio.sleep(retry_delay * (attempt + 2))
+                            continue
+                        else:
+                            print(f"TMDb API error: Status {response.status}")
+                except Exception as e:
+                    print(f"Error searching TMDb on attempt {attempt+1}: {e}")
+                    if attempt < max_retries - 1:
+                        await asyncio.sleep(retry_delay)
+
+            return None
+
+    @staticmethod
+    def _first_poster(details):
+        posters = (details.get('images') or {}).get('posters') or []
+        return posters[0].get('file_path') if posters else None
+
+    @staticmethod
+    def _tmdb_id(item):
+        """TMDb id from the item's ProviderIds (Jellyfin fills it in when the metadata matched)"""
+        provider_ids = item.get('ProviderIds') or {}
+        return next((value for key, value in provider_ids.items() if key.lower() == 'tmdb' and value), None)
+
+    async def _enrich_items(self, items, tmdb_api_key, translate, log=None):
+        """Look up TMDb data for each item and translate all overviews in one batch.
+
+        Done once per item, whatever the number of guilds that will announce it.
+        """
+        enrichments = []
+        for item in items:
+            title = item.get('Name', 'Unknown Title')
+            year = item.get('ProductionYear', 'Unknown Year')
+            is_movie = item.get('Type') == "Movie"
+
+            overview = item.get('Overview') or 'No description available.'
+
+            tmdb_data = None
+            if tmdb_api_key:
+                tmdb_data = await self.search_tmdb(title, year, is_movie, tmdb_api_key, tmdb_id=self._tmdb_id(item))
+
+            if tmdb_data and tmdb_data.get('overview'):
+                overview = tmdb_data['overview']
+
+            enrichments.append({
+                'overview': overview,
+                'translated_overview': overview,
+                'poster_path': tmdb_data.get('poster_path') if tmdb_data else None,
+            })
+
+        if translate and enrichments:
+            translated = await self.translate_many(
+                [e['overview'] for e in enrichments], target_lang="ro", log_fn=log
+            )
+            for enrichment, text in zip(enrichments, translated):
+                enrichment['translated_overview'] = text
+
+        return enrichments
+
+    def _build_announcement(self, item, enrichment, server, translate):
+        """Render the announcement (message text and embed) for one item on one server"""
         title = item.get('Name', 'Unknown Title')
         year = item.get('ProductionYear', 'Unknown Year')
         is_movie = item.get('Type') == "Movie"
         media_type = "Film" if is_movie else "Serial"
-        
-        overview = item.get('Overview', 'No description available.')
-        
-        tmdb_data = None
-        if server.get('tmdb_api_key'):
-            tmdb_data = await self.search_tmdb(title, year, is_movie, server['tmdb_api_key'])
-        
-        if tmdb_data and tmdb_data.get('overview'):
-            overview = tmdb_data['overview']
-        
-        enable_translation = guild_settings.get('enable_translation', True)
-        if enable_translation and overview and overview != 'No description available.':
-            overview = await self.translate_text(overview, target_lang="ro")
-        
+
+        enrichment = enrichment or {}
+        if translate:
+            overview = enrichment.get('translated_overview')
+        else:
+            overview = enrichment.get('overview')
+        overview = overview or item.get('Overview') or 'No description available.'
+
         if len(overview) > 1000:
             overview = overview[:997] + "..."
 
@@ -354,38 +1509,37 @@ class JellyfinNewContent(commands.Cog):
             description=overview,
             color=discord.Color.green()
         )
-        
-        if tmdb_data and tmdb_data.get('poster_path'):
-            poster_url = f"{self.poster_base_url}{tmdb_data['poster_path']}"
+
+        if enrichment.get('poster_path'):
+            poster_url = f"{self.poster_base_url}{enrichment['poster_path']}"
             embed.set_thumbnail(url=poster_url)
-        
+
         embed.add_field(name="Tip", value=media_type, inline=True)
-        
+
         if genres := item.get('Genres', [])[:3]:
             embed.add_field(name="Genuri", value=", ".join(genres), inline=True)
-        
+
         if community_rating := item.get('CommunityRating'):
             embed.add_field(name="Rating", value=f"⭐ {community_rating:.1f}", inline=True)
 
+        server_name = server.get('name', 'Server')
         item_id = item.get('Id')
         if item_id:
             web_url = f"{server['base_url']}/web/index.html#!/details?id={item_id}"
-            server_name = server.get('name', 'Server')
             embed.add_field(name="Vizionare Online:", value=f"[{server_name}]({web_url})", inline=False)
-            
+
         added_date = item.get('DateCreated')
         if added_date:
             # FIX #9: try/except cu log în loc de except gol
             try:
                 # Formatăm data mai frumos
-                parsed_date = datetime.fromisoformat(added_date.replace('Z', '+00:00'))
+                parsed_date = datetime.fromtimestamp(self._parse_jellyfin_date(added_date), tz=timezone.utc)
                 formatted_date = parsed_date.strftime("%d.%m.%Y %H:%M")
                 embed.set_footer(text=f"Adăugat: {formatted_date}")
             except Exception as e:
                 print(f"Error formatting date '{added_date}': {e}")
-        
-        server_name = server.get('name', 'Server')
-        await channel.send(f"**{media_type} nou adăugat pe {server_name}:**", embed=embed)
+
+        return f"**{media_type} nou adăugat pe {server_name}:**", embed
 
     # -------------------------------------------------------------------------
     # COMENZI
@@ -409,14 +1563,24 @@ class JellyfinNewContent(commands.Cog):
                 f"`{ctx.prefix}newcontent setchannel <NUME> <#CANAL>` - Setează canalul pentru anunțuri\n\n"
                 "**Configurare traducere:**\n"
                 f"`{ctx.prefix}newcontent toggletranslation` - Activează/dezactivează traducerea automată\n\n"
+                "**Mod digest:**\n"
+                f"`{ctx.prefix}newcontent toggledigest` - Grupează anunțurile (până la 10 embed-uri per mesaj, listă compactă pentru rafale mari)\n\n"
                 "**Configurare globală:**\n"
                 f"`{ctx.prefix}newcontent setinterval <ORE>` - Setează intervalul de verificare\n"
+                f"`{ctx.prefix}newcontent setepisodewindow <MINUTE>` - Fereastra de grupare a episoadelor noi (0 = dezactivat)\n"
                 f"`{ctx.prefix}newcontent settings` - Arată setările globale\n\n"
                 "**Utilitare:**\n"
                 f"`{ctx.prefix}newcontent check <NUME>` - Verifică manual conținut nou pe un server\n"
                 f"`{ctx.prefix}newcontent debug <NUME>` - Verificare detaliată cu logging în canal (pentru depanare)\n"
                 f"`{ctx.prefix}newcontent reset <NUME>` - Resetează timestamp-ul de verificare\n"
-                f"`{ctx.prefix}newcontent forceinit <NUME>` - Forțează inițializarea fără anunțuri"
+                f"`{ctx.prefix}newcontent forceinit <NUME>` - Forțează inițializarea fără anunțuri\n"
+                f"`{ctx.prefix}newcontent stats [NUME]` - Timpi per fază (Jellyfin, TMDb, traducere, Discord) pe ultimele 24h\n"
+                f"`{ctx.prefix}newcontent outbox` - Arată coada de anunțuri (`outbox retry` retrimite anunțurile eșuate)\n\n"
+                "**Webhook (anunțuri instant):**\n"
+                f"`{ctx.prefix}newcontent webhook enable <NUME>` - Activează primirea evenimentelor ItemAdded\n"
+                f"`{ctx.prefix}newcontent webhook disable <NUME>` - Revine la polling simplu\n"
+                f"`{ctx.prefix}newcontent webhook listen <PORT>` - Pornește endpoint-ul local (owner)\n"
+                f"`{ctx.prefix}newcontent webhook stop` - Oprește endpoint-ul local (owner)"
             )
             await ctx.send(help_text)
 
@@ -424,7 +1588,7 @@ class JellyfinNewContent(commands.Cog):
     @commands.admin_or_permissions(administrator=True)
     async def add_server(self, ctx, name: str):
         """Add a new Jellyfin server"""
-        servers = await self.config.guild(ctx.guild).servers()
+        servers = await self._get_servers(ctx.guild)
         
         if any(s.get('name') == name for s in servers):
             return await ctx.send(f"❌ Un server cu numele `{name}` există deja!")
@@ -436,7 +1600,10 @@ class JellyfinNewContent(commands.Cog):
             'tmdb_api_key': None,
             'announcement_channel_id': None,
             'last_check': None,
-            'initialized': False
+            'cursor_date': None,
+            'cursor_id': "",
+            'initialized': False,
+            'webhook_token': None
         }
         
         servers.append(new_server)
@@ -447,20 +1614,23 @@ class JellyfinNewContent(commands.Cog):
     @commands.admin_or_permissions(administrator=True)
     async def remove_server(self, ctx, name: str):
         """Remove a Jellyfin server"""
-        servers = await self.config.guild(ctx.guild).servers()
+        servers = await self._get_servers(ctx.guild)
         updated_servers = [s for s in servers if s.get('name') != name]
         
         if len(updated_servers) == len(servers):
             return await ctx.send(f"❌ Nu există niciun server cu numele `{name}`!")
         
         await self.config.guild(ctx.guild).servers.set(updated_servers)
+        self._state.pop((ctx.guild.id, name), None)
+        self._reschedule(ctx.guild, name)
+        self._drop_seen_index((ctx.guild.id, name))
         await ctx.send(f"✅ Serverul `{name}` a fost șters.")
 
     @newcontent.command(name="listservers")
     @commands.admin_or_permissions(administrator=True)
     async def list_servers(self, ctx):
         """List all configured Jellyfin servers"""
-        servers = await self.config.guild(ctx.guild).servers()
+        servers = await self._get_servers(ctx.guild)
         
         if not servers:
             return await ctx.send("📝 Nu există servere configurate. Folosește `addserver` pentru a adăuga unul.")
@@ -492,7 +1662,7 @@ class JellyfinNewContent(commands.Cog):
     @commands.admin_or_permissions(administrator=True)
     async def server_info(self, ctx, name: str):
         """Show detailed information about a server"""
-        servers = await self.config.guild(ctx.guild).servers()
+        servers = await self._get_servers(ctx.guild)
         server = next((s for s in servers if s.get('name') == name), None)
         
         if not server:
@@ -526,7 +1696,7 @@ class JellyfinNewContent(commands.Cog):
     @commands.admin_or_permissions(administrator=True)
     async def set_url(self, ctx, name: str, url: str):
         """Set the Jellyfin server URL"""
-        servers = await self.config.guild(ctx.guild).servers()
+        servers = await self._get_servers(ctx.guild)
         server = next((s for s in servers if s.get('name') == name), None)
         
         if not server:
@@ -535,13 +1705,14 @@ class JellyfinNewContent(commands.Cog):
         url = url.rstrip('/')
         server['base_url'] = url
         await self._update_server_in_config(ctx.guild, server)
+        self._reschedule(ctx.guild, name)
         await ctx.send(f"✅ URL-ul pentru serverul `{name}` a fost setat la: {url}")
 
     @newcontent.command(name="setapi")
     @commands.admin_or_permissions(administrator=True)
     async def set_api(self, ctx, name: str, api_key: str):
         """Set the Jellyfin API key"""
-        servers = await self.config.guild(ctx.guild).servers()
+        servers = await self._get_servers(ctx.guild)
         server = next((s for s in servers if s.get('name') == name), None)
         
         if not server:
@@ -549,6 +1720,7 @@ class JellyfinNewContent(commands.Cog):
         
         server['api_key'] = api_key
         await self._update_server_in_config(ctx.guild, server)
+        self._reschedule(ctx.guild, name)
         await ctx.send(f"✅ Cheia API Jellyfin pentru serverul `{name}` a fost setată.")
         
         # FIX #6: try/except la ștergerea mesajului
@@ -563,7 +1735,7 @@ class JellyfinNewContent(commands.Cog):
     @commands.admin_or_permissions(administrator=True)
     async def set_tmdb(self, ctx, name: str, api_key: str):
         """Set the TMDb API key for a server"""
-        servers = await self.config.guild(ctx.guild).servers()
+        servers = await self._get_servers(ctx.guild)
         server = next((s for s in servers if s.get('name') == name), None)
         
         if not server:
@@ -585,7 +1757,7 @@ class JellyfinNewContent(commands.Cog):
     @commands.admin_or_permissions(administrator=True)
     async def set_channel(self, ctx, name: str, channel: discord.TextChannel):
         """Set the announcement channel for a server"""
-        servers = await self.config.guild(ctx.guild).servers()
+        servers = await self._get_servers(ctx.guild)
         server = next((s for s in servers if s.get('name') == name), None)
         
         if not server:
@@ -593,6 +1765,7 @@ class JellyfinNewContent(commands.Cog):
         
         server['announcement_channel_id'] = channel.id
         await self._update_server_in_config(ctx.guild, server)
+        self._reschedule(ctx.guild, name)
         await ctx.send(f"✅ Canalul pentru anunțuri pe serverul `{name}` a fost setat la: {channel.mention}")
 
     @newcontent.command(name="toggletranslation")
@@ -605,6 +1778,34 @@ class JellyfinNewContent(commands.Cog):
         status = "activată" if new_value else "dezactivată"
         await ctx.send(f"✅ Traducerea automată a fost {status}.")
 
+    @newcontent.command(name="toggledigest")
+    @commands.admin_or_permissions(administrator=True)
+    async def toggle_digest(self, ctx):
+        """Toggle digest mode (several titles per message instead of one message per title)"""
+        current = await self.config.guild(ctx.guild).digest_mode()
+        new_value = not current
+        await self.config.guild(ctx.guild).digest_mode.set(new_value)
+        if new_value:
+            await ctx.send(
+                f"✅ Modul digest a fost activat. Până la {self.DISCORD_MAX_EMBEDS} titluri per mesaj; "
+                f"rafalele de peste {self.DIGEST_COMPACT_THRESHOLD} titluri sunt trimise ca listă compactă "
+                f"(maxim {self.DIGEST_MAX_ITEMS_PER_RUN} titluri per verificare)."
+            )
+        else:
+            await ctx.send("✅ Modul digest a fost dezactivat. Fiecare titlu va fi anunțat separat.")
+
+    @newcontent.command(name="setepisodewindow")
+    @commands.admin_or_permissions(administrator=True)
+    async def set_episode_window(self, ctx, minutes: int):
+        """Set how long new episodes of a series are collected before one announcement (0 = off)"""
+        if minutes < 0:
+            return await ctx.send("❌ Fereastra trebuie să fie de cel puțin 0 minute.")
+        await self.config.guild(ctx.guild).episode_window.set(minutes)
+        if minutes:
+            await ctx.send(f"✅ Episoadele noi ale unui serial vor fi grupate timp de {minutes} minute într-un singur anunț.")
+        else:
+            await ctx.send("✅ Episoadele și sezoanele noi nu vor mai fi anunțate.")
+
     @newcontent.command(name="setinterval")
     @commands.admin_or_permissions(administrator=True)
     async def set_interval(self, ctx, hours: int):
@@ -612,6 +1813,7 @@ class JellyfinNewContent(commands.Cog):
         if hours < 1:
             return await ctx.send("❌ Intervalul trebuie să fie de cel puțin 1 oră.")
         await self.config.guild(ctx.guild).check_interval.set(hours)
+        self._reschedule(ctx.guild)
         await ctx.send(f"✅ Intervalul de verificare a fost setat la {hours} ore.")
 
     @newcontent.command(name="settings")
@@ -627,8 +1829,20 @@ class JellyfinNewContent(commands.Cog):
             value="Activată ✓" if settings.get('enable_translation', True) else "Dezactivată ✗",
             inline=True
         )
+        embed.add_field(
+            name="Mod Digest",
+            value="Activat ✓" if settings.get('digest_mode', False) else "Dezactivat ✗",
+            inline=True
+        )
+        episode_window = settings.get('episode_window', 60)
+        embed.add_field(
+            name="Grupare Episoade",
+            value=f"{episode_window} minute" if episode_window else "Dezactivată ✗",
+            inline=True
+        )
         embed.add_field(name="Număr Servere", value=str(len(settings.get('servers', []))), inline=True)
-        embed.add_field(name="Limită Anunțuri/Run", value=str(self.MAX_ANNOUNCEMENTS_PER_RUN), inline=True)
+        limit = self.DIGEST_MAX_ITEMS_PER_RUN if settings.get('digest_mode', False) else self.MAX_ANNOUNCEMENTS_PER_RUN
+        embed.add_field(name="Limită Anunțuri/Run", value=str(limit), inline=True)
         
         await ctx.send(embed=embed)
 
@@ -636,7 +1850,7 @@ class JellyfinNewContent(commands.Cog):
     @commands.admin_or_permissions(administrator=True)
     async def manual_check(self, ctx, name: str):
         """Manually check for new content on a specific server"""
-        servers = await self.config.guild(ctx.guild).servers()
+        servers = await self._get_servers(ctx.guild)
         server = next((s for s in servers if s.get('name') == name), None)
         
         if not server:
@@ -657,7 +1871,7 @@ class JellyfinNewContent(commands.Cog):
     @commands.admin_or_permissions(administrator=True)
     async def debug_check(self, ctx, name: str):
         """Rulează o verificare detaliată și afișează fiecare pas direct în canal"""
-        servers = await self.config.guild(ctx.guild).servers()
+        servers = await self._get_servers(ctx.guild)
         server = next((s for s in servers if s.get('name') == name), None)
 
         if not server:
@@ -688,7 +1902,7 @@ class JellyfinNewContent(commands.Cog):
     @commands.admin_or_permissions(administrator=True)
     async def reset_timestamp(self, ctx, name: str):
         """Reset the last check timestamp for a server"""
-        servers = await self.config.guild(ctx.guild).servers()
+        servers = await self._get_servers(ctx.guild)
         server = next((s for s in servers if s.get('name') == name), None)
         
         if not server:
@@ -696,14 +1910,17 @@ class JellyfinNewContent(commands.Cog):
         
         server['last_check'] = None
         server['initialized'] = False
+        server['cursor_date'] = None
+        server['cursor_id'] = ""
         await self._update_server_in_config(ctx.guild, server)
+        self._reschedule(ctx.guild, name)
         await ctx.send(f"✅ Timestamp-ul pentru serverul `{name}` a fost resetat.")
 
     @newcontent.command(name="forceinit")
     @commands.admin_or_permissions(administrator=True)
     async def force_init(self, ctx, name: str):
         """Force initialization for a server without announcing existing content"""
-        servers = await self.config.guild(ctx.guild).servers()
+        servers = await self._get_servers(ctx.guild)
         server = next((s for s in servers if s.get('name') == name), None)
         
         if not server:
@@ -713,5 +1930,179 @@ class JellyfinNewContent(commands.Cog):
         now = datetime.now(timezone.utc).timestamp()
         server['last_check'] = now
         server['initialized'] = True
+        server['cursor_date'] = now
+        server['cursor_id'] = ""
         await self._update_server_in_config(ctx.guild, server)
+        self._reschedule(ctx.guild, name)
         await ctx.send(f"✅ Serverul `{name}` a fost inițializat fără a anunța conținutul existent.")
+
+    @newcontent.command(name="stats")
+    @commands.admin_or_permissions(administrator=True)
+    async def show_stats(self, ctx, name: str = None):
+        """Show per-phase timings (percentiles over the last 24 hours) for each server"""
+        servers = await self._get_servers(ctx.guild)
+        if name:
+            servers = [s for s in servers if s.get('name') == name]
+            if not servers:
+                return await ctx.send(f"❌ Nu există niciun server cu numele `{name}`!")
+        servers = [s for s in servers if s.get('base_url')]
+        if not servers:
+            return await ctx.send("❌ Nu există niciun server configurat.")
+
+        phase_names = {
+            "check": "Verificare completă",
+            "jellyfin": "Jellyfin (pagini)",
+            "tmdb": "TMDb",
+            "translate": "Traducere",
+            "send": "Trimitere Discord",
+        }
+        hours = self._stats.window // 3600
+        for server in servers:
+            summary = self._stats.summary(server['base_url'])
+            embed = discord.Embed(
+                title=f"📊 Statistici: {server['name']}",
+                description=f"Ultimele {hours} ore" + ("" if summary else " — nicio activitate înregistrată."),
+                color=discord.Color.blue()
+            )
+            for phase, data in summary.items():
+                lines = [f"{data['count']} apeluri · {data['items']} iteme · {data['retries']} reîncercări"]
+                if data['count']:
+                    lines.append(
+                        f"p50 {data['p50']:.2f}s · p90 {data['p90']:.2f}s · "
+                        f"p99 {data['p99']:.2f}s · max {data['max']:.2f}s"
+                    )
+                    histogram = []
+                    for bound, count in data['histogram']:
+                        if count:
+                            label = f"≤{bound:g}s" if bound is not None else f">{self._stats.BUCKETS[-1]:g}s"
+                            histogram.append(f"{label}: {count}")
+                    lines.append(" · ".join(histogram))
+                embed.add_field(name=phase_names.get(phase, phase), value="\n".join(lines), inline=False)
+            await ctx.send(embed=embed)
+
+    @newcontent.group(name="outbox", invoke_without_command=True)
+    @commands.admin_or_permissions(administrator=True)
+    async def outbox(self, ctx):
+        """Show the announcement queue for this guild"""
+        counts = self._outbox.counts(ctx.guild.id)
+        embed = discord.Embed(title="📬 Coada de anunțuri", color=discord.Color.blue())
+        embed.add_field(name="În așteptare", value=str(counts.get('pending', 0)), inline=True)
+        embed.add_field(name="Trimise", value=str(counts.get('sent', 0)), inline=True)
+        embed.add_field(name="Eșuate", value=str(counts.get('failed', 0)), inline=True)
+        if counts.get('failed'):
+            embed.set_footer(text=f"Folosește {ctx.prefix}newcontent outbox retry pentru a retrimite anunțurile eșuate.")
+        await ctx.send(embed=embed)
+
+    @outbox.command(name="retry")
+    @commands.admin_or_permissions(administrator=True)
+    async def outbox_retry(self, ctx):
+        """Requeue announcements that failed to send"""
+        count = self._outbox.retry_failed(ctx.guild.id)
+        self._outbox_wakeup.set()
+        await ctx.send(f"✅ {count} anunț(uri) eșuate au fost puse din nou în coadă.")
+
+    # -------------------------------------------------------------------------
+    # COMENZI WEBHOOK
+    # -------------------------------------------------------------------------
+
+    @newcontent.group(name="webhook")
+    async def webhook(self, ctx):
+        """Manage push announcements from the Jellyfin Webhook plugin"""
+        if ctx.invoked_subcommand is None:
+            settings = await self.config.all()
+            status = "Pornit ✓" if self._webhook_runner is not None else "Oprit ✗"
+            await ctx.send(
+                f"**Endpoint webhook:** {status} "
+                f"(`{settings['webhook_host']}:{settings['webhook_port']}`)\n"
+                f"**Debounce:** {settings['webhook_debounce']} secunde\n"
+                f"**Reconciliere prin polling:** la fiecare {settings['webhook_reconcile_hours']} ore"
+            )
+
+    @webhook.command(name="listen")
+    @commands.is_owner()
+    async def webhook_listen(self, ctx, port: int, host: str = "0.0.0.0"):
+        """Start the local webhook endpoint on the given port"""
+        await self.config.webhook_port.set(port)
+        await self.config.webhook_host.set(host)
+        await self.config.webhook_enabled.set(True)
+        if await self._start_webhook_server():
+            await ctx.send(f"✅ Endpoint-ul webhook ascultă pe `{host}:{port}`.")
+        else:
+            await ctx.send(f"❌ Nu am putut porni endpoint-ul pe `{host}:{port}`. Verifică dacă portul este liber.")
+
+    @webhook.command(name="stop")
+    @commands.is_owner()
+    async def webhook_stop(self, ctx):
+        """Stop the local webhook endpoint (polling takes over again)"""
+        await self.config.webhook_enabled.set(False)
+        await self._stop_webhook_server()
+        for guild in self.bot.guilds:
+            self._reschedule(guild)
+        await ctx.send("✅ Endpoint-ul webhook a fost oprit. Serverele revin la intervalul normal de verificare.")
+
+    @webhook.command(name="debounce")
+    @commands.is_owner()
+    async def webhook_debounce(self, ctx, seconds: int):
+        """Set how long to wait for more events before announcing a batch"""
+        if seconds < 1:
+            return await ctx.send("❌ Valoarea trebuie să fie de cel puțin 1 secundă.")
+        await self.config.webhook_debounce.set(seconds)
+        await ctx.send(f"✅ Debounce setat la {seconds} secunde.")
+
+    @webhook.command(name="reconcile")
+    @commands.is_owner()
+    async def webhook_reconcile(self, ctx, hours: int):
+        """Set the fallback polling interval for servers that use webhooks"""
+        if hours < 1:
+            return await ctx.send("❌ Intervalul trebuie să fie de cel puțin 1 oră.")
+        await self.config.webhook_reconcile_hours.set(hours)
+        for guild in self.bot.guilds:
+            self._reschedule(guild)
+        await ctx.send(f"✅ Reconcilierea prin polling va rula la fiecare {hours} ore.")
+
+    @webhook.command(name="enable")
+    @commands.admin_or_permissions(administrator=True)
+    async def webhook_enable(self, ctx, name: str):
+        """Enable webhook announcements for a server and get its URL"""
+        servers = await self._get_servers(ctx.guild)
+        server = next((s for s in servers if s.get('name') == name), None)
+
+        if not server:
+            return await ctx.send(f"❌ Nu există niciun server cu numele `{name}`!")
+
+        server['webhook_token'] = server.get('webhook_token') or secrets.token_urlsafe(24)
+        await self._update_server_in_config(ctx.guild, server)
+        self._reschedule(ctx.guild, name)
+
+        port = await self.config.webhook_port()
+        details = (
+            f"🔗 **Webhook pentru `{name}`**\n"
+            f"URL: `http://<IP-BOT>:{port}/jellyfin/newcontent/{server['webhook_token']}`\n\n"
+            "În plugin-ul Webhook din Jellyfin adaugă o destinație **Generic** cu tipul de "
+            "notificare **Item Added** și template-ul:\n"
+            '```json\n{"NotificationType": "{{NotificationType}}", "ItemId": "{{ItemId}}", "ItemType": "{{ItemType}}"}\n```'
+        )
+        # URL-ul conține un secret, îl trimitem în privat dacă se poate
+        try:
+            await ctx.author.send(details)
+            await ctx.send(f"✅ Webhook activat pentru `{name}`. Ți-am trimis URL-ul în privat.")
+        except discord.Forbidden:
+            await ctx.send(details)
+
+        if self._webhook_runner is None:
+            await ctx.send(f"⚠️ Endpoint-ul local nu rulează. Owner-ul botului trebuie să folosească `{ctx.prefix}newcontent webhook listen <PORT>`.")
+
+    @webhook.command(name="disable")
+    @commands.admin_or_permissions(administrator=True)
+    async def webhook_disable(self, ctx, name: str):
+        """Disable webhook announcements for a server"""
+        servers = await self._get_servers(ctx.guild)
+        server = next((s for s in servers if s.get('name') == name), None)
+
+        if not server:
+            return await ctx.send(f"❌ Nu există niciun server cu numele `{name}`!")
+
+        server['webhook_token'] = None
+        await self._update_server_in_config(ctx.guild, server)
+        self._reschedule(ctx.guild, name)
+        await ctx.send(f"✅ Webhook dezactivat pentru `{name}`. Serverul revine la verificarea periodică.")
@@ -0,0 +1,150 @@
+import sqlite3
+import time
+
+
+class Outbox:
+    """Durable queue of rendered announcements waiting to be sent to Discord.
+
+    Rows are unique per (guild_id, item_id), so an item fetched twice (polling and
+    webhook, or a run interrupted before its cursor was saved) is only delivered once.
+    Sent rows are kept for `keep_days` to preserve that guarantee, then pruned.
+    """
+
+    def __init__(self, path, keep_days=30):
+        self.keep_seconds = keep_days * 86400
+
+        self._db = sqlite3.connect(str(path), timeout=10)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " guild_id INTEGER NOT NULL,"
+                " channel_id INTEGER NOT NULL,"
+                " server TEXT NOT NULL,"
+                " item_id TEXT NOT NULL,"
+                " digest INTEGER NOT NULL DEFAULT 0,"
+                " content TEXT NOT NULL,"
+                " embed TEXT NOT NULL,"
+                " line TEXT NOT NULL,"
+                " status TEXT NOT NULL DEFAULT 'pending',"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " next_attempt REAL NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_error TEXT,"
+                " UNIQUE (guild_id, item_id))"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt)"
+            )
+            # Grupurile de episoade încă deschise, ca să nu se piardă la un restart
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS episode_buckets ("
+                " guild_id INTEGER NOT NULL,"
+                " server TEXT NOT NULL,"
+                " series_id TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " PRIMARY KEY (guild_id, server, series_id))"
+            )
+
+    def enqueue(self, rows):
+        """Insert announcements; rows already present for (guild_id, item_id) are ignored.
+
+        Each row is a dict with guild_id, channel_id, server, item_id, digest, content,
+        embed (JSON) and line. Returns the number of rows actually added.
+        """
+        now = time.time()
+        with self._db:
+            cursor = self._db.executemany(
+                "INSERT OR IGNORE INTO outbox"
+                " (guild_id, channel_id, server, item_id, digest, content, embed, line, next_attempt, created)"
+                " VALUES (:guild_id, :channel_id, :server, :item_id, :digest, :content, :embed, :line, :now, :now)",
+                [dict(row, now=now) for row in rows],
+            )
+        return cursor.rowcount
+
+    def due(self, now=None, limit=500):
+        """Pending rows whose next attempt is due, oldest first"""
+        now = time.time() if now is None else now
+        return self._db.execute(
+            "SELECT * FROM outbox WHERE status = 'pending' AND next_attempt <= ? ORDER BY id LIMIT ?",
+            (now, limit),
+        ).fetchall()
+
+    def next_due(self):
+        """Timestamp of the earliest pending row, or None if the outbox is drained"""
+        row = self._db.execute(
+            "SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending'"
+        ).fetchone()
+        return row[0]
+
+    def mark_sent(self, ids):
+        with self._db:
+            self._db.executemany(
+                "UPDATE outbox SET status = 'sent', last_error = NULL WHERE id = ?",
+                [(row_id,) for row_id in ids],
+            )
+
+    def mark_retry(self, ids, error, next_attempt, count_attempt=True):
+        """Reschedule rows; `count_attempt` is False for rows held back behind a failed one"""
+        with self._db:
+            self._db.executemany(
+                "UPDATE outbox SET attempts = attempts + ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                [(int(count_attempt), next_attempt, error, row_id) for row_id in ids],
+            )
+
+    def mark_failed(self, ids, error):
+        with self._db:
+            self._db.executemany(
+                "UPDATE outbox SET status = 'failed', last_error = ? WHERE id = ?",
+                [(error, row_id) for row_id in ids],
+            )
+
+    def retry_failed(self, guild_id):
+        """Put a guild's failed rows back in the queue; returns how many were requeued"""
+        with self._db:
+            cursor = self._db.execute(
+                "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt = ?"
+                " WHERE guild_id = ? AND status = 'failed'",
+                (time.time(), guild_id),
+            )
+        return cursor.rowcount
+
+    def counts(self, guild_id):
+        """Row counts per status for one guild"""
+        rows = self._db.execute(
+            "SELECT status, COUNT(*) FROM outbox WHERE guild_id = ? GROUP BY status", (guild_id,)
+        ).fetchall()
+        return {status: count for status, count in rows}
+
+    def prune(self):
+        """Drop sent rows older than the retention window"""
+        with self._db:
+            self._db.execute(
+                "DELETE FROM outbox WHERE status = 'sent' AND created < ?",
+                (time.time() - self.keep_seconds,),
+            )
+
+    def save_buckets(self, buckets):
+        """Write open episode buckets, given as ((guild_id, server, series_id), JSON) pairs"""
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO episode_buckets (guild_id, server, series_id, data) VALUES (?, ?, ?, ?)",
+                [(*key, data) for key, data in buckets],
+            )
+
+    def load_buckets(self):
+        """All open episode buckets as {(guild_id, server, series_id): JSON}"""
+        rows = self._db.execute("SELECT guild_id, server, series_id, data FROM episode_buckets").fetchall()
+        return {(row['guild_id'], row['server'], row['series_id']): row['data'] for row in rows}
+
+    def delete_bucket(self, key):
+        with self._db:
+            self._db.execute(
+                "DELETE FROM episode_buckets WHERE guild_id = ? AND server = ? AND series_id = ?", key
+            )
+
+    def close(self):
+        self.prune()
+        self._db.close()
@@ -0,0 +1,53 @@
+import hashlib
+import heapq
+import os
+from array import array
+from bisect import bisect_left
+
+
+class SeenIndex:
+    """Compact set of already-announced Jellyfin item Ids, persisted as a flat file.
+
+    Ids are stored as 64-bit hashes in a sorted array (8 bytes per Id, ~8 MB per
+    million), looked up with a binary search. New Ids are kept in a small set and
+    merged into the array on `flush()`, which rewrites the file atomically.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._ids = array('Q')
+        self._pending = set()
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                self._ids.frombytes(f.read())
+
+    @staticmethod
+    def hash_id(item_id):
+        return int.from_bytes(hashlib.blake2b(str(item_id).encode('utf-8'), digest_size=8).digest(), 'little')
+
+    def __contains__(self, item_id):
+        if not item_id:
+            return False
+        value = self.hash_id(item_id)
+        if value in self._pending:
+            return True
+        index = bisect_left(self._ids, value)
+        return index < len(self._ids) and self._ids[index] == value
+
+    def __len__(self):
+        return len(self._ids) + len(self._pending)
+
+    def add(self, item_id):
+        if item_id and item_id not in self:
+            self._pending.add(self.hash_id(item_id))
+
+    def flush(self):
+        """Merge pending Ids into the sorted array and write it to disk"""
+        if not self._pending:
+            return
+        self._ids = array('Q', heapq.merge(self._ids, sorted(self._pending)))
+        self._pending.clear()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            self._ids.tofile(f)
+        os.replace(tmp_path, self.path)
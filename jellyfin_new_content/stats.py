@@ -0,0 +1,84 @@
+import contextvars
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Serverul Jellyfin (base_url) pentru care se lucrează în task-ul curent; fazele care nu
+# primesc serverul explicit (TMDb, traducere) sunt contabilizate la acesta
+current_server = contextvars.ContextVar("jellyfin_current_server", default=None)
+
+
+class PhaseStats:
+    """Rolling per-server latency samples, item counts and retries for each pipeline phase"""
+
+    PHASES = ("check", "jellyfin", "tmdb", "translate", "send")
+    BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 30)  # limitele superioare ale histogramei, în secunde
+
+    def __init__(self, window=24 * 3600, max_samples=5000):
+        self.window = window
+        self.max_samples = max_samples
+        self._samples = {}  # (server, phase) -> deque of (timestamp, seconds, items)
+        self._retries = {}  # (server, phase) -> deque of timestamps
+
+    def record(self, phase, seconds, items=1, server=None):
+        server = server or current_server.get()
+        if server is None:
+            return
+        samples = self._samples.setdefault((server, phase), deque(maxlen=self.max_samples))
+        samples.append((time.time(), seconds, items))
+
+    def retry(self, phase, server=None):
+        server = server or current_server.get()
+        if server is None:
+            return
+        retries = self._retries.setdefault((server, phase), deque(maxlen=self.max_samples))
+        retries.append(time.time())
+
+    @contextmanager
+    def timer(self, phase, items=1, server=None):
+        """Time a block; `items` may be updated through the yielded dict"""
+        counter = {'items': items}
+        started = time.perf_counter()
+        try:
+            yield counter
+        finally:
+            self.record(phase, time.perf_counter() - started, counter['items'], server)
+
+    @staticmethod
+    def _percentile(values, fraction):
+        index = min(len(values) - 1, max(0, round(fraction * (len(values) - 1))))
+        return values[index]
+
+    def histogram(self, durations):
+        """Count durations per bucket; the last entry (None) holds everything above the largest bound"""
+        counts = [0] * (len(self.BUCKETS) + 1)
+        for seconds in durations:
+            index = next((i for i, bound in enumerate(self.BUCKETS) if seconds <= bound), len(self.BUCKETS))
+            counts[index] += 1
+        return list(zip(self.BUCKETS + (None,), counts))
+
+    def summary(self, server):
+        """Per-phase stats over the rolling window: counts, retries, latency percentiles and histogram"""
+        cutoff = time.time() - self.window
+        result = {}
+        for phase in self.PHASES:
+            samples = self._samples.get((server, phase), ())
+            durations = sorted(seconds for ts, seconds, _ in samples if ts >= cutoff)
+            retries = sum(1 for ts in self._retries.get((server, phase), ()) if ts >= cutoff)
+            if not durations and not retries:
+                continue
+            entry = {
+                'count': len(durations),
+                'items': sum(items for ts, _, items in samples if ts >= cutoff),
+                'retries': retries,
+            }
+            if durations:
+                entry.update(
+                    p50=self._percentile(durations, 0.50),
+                    p90=self._percentile(durations, 0.90),
+                    p99=self._percentile(durations, 0.99),
+                    max=durations[-1],
+                    histogram=self.histogram(durations),
+                )
+            result[phase] = entry
+        return result
@@ -1,13 +1,20 @@
 from redbot.core import commands, Config
+from redbot.core.data_manager import cog_data_path
 import asyncio
 import aiohttp
 import random
+import time
 import discord
+from collections import deque
 from datetime import datetime, timedelta
 from deep_translator import GoogleTranslator
 
+from .sampler import MAX_PEOPLE, CatalogSnapshot, ShuffleBag
+from .similarity import SimilarityIndex
+from .translation_cache import TranslationCache
+
 class JellyfinRecommendation(commands.Cog):
-    """Provide random Jellyfin recommendations every Monday"""
+    """Provide random Jellyfin recommendations every week (Monday 18:00 by default)"""
 
     def __init__(self, bot):
         self.bot = bot
@@ -17,115 +24,169 @@ class JellyfinRecommendation(commands.Cog):
             force_registration=True
         )
         
-        # Setări implicite pentru anime și porn
+        # Setările unei categorii de recomandări; o categorie salvată conține doar ce a fost setat
+        self.CATEGORY_DEFAULTS = {
+            "base_url": None,
+            "api_key": None,
+            "channel_id": None,
+            "tmdb_api_key": None,
+            "server_name": "Freia [SERVER 2]",
+            "library_id": None,
+            "library_name": None,
+            # De unde vin descrierea și posterul: "tmdb" sau "jellyfin"
+            "source": "jellyfin",
+            "color": discord.Color.blue().value,
+            # Programare săptămânală (ora locală)
+            "schedule": {"weekday": 0, "hour": 18, "minute": 0},
+        }
         default_guild = {
-            "anime": {
-                "base_url": None,
-                "api_key": None,
-                "channel_id": None,
-                "tmdb_api_key": None,
-                "server_name": "Freia [SERVER 2]"
-            },
-            "porn": {
-                "base_url": None,
-                "api_key": None,
-                "channel_id": None,
-                "tmdb_api_key": None,
-                "server_name": "Freia [SERVER 2]"
-            }
+            # nume categorie -> setări (vezi CATEGORY_DEFAULTS)
+            "categories": {},
+            "categories_migrated": False,
+            # Ultima apariție tratată a programării, per categorie
+            "last_run": {}
         }
         
         self.config.register_guild(**default_guild)
+        # Contul Jellyfin al membrului per categorie, pentru `recomanda pentrumine`
+        self.config.register_member(jellyfin_accounts={})
         self.bg_task = None
+        # (guild_id, categorie) -> (scadență, task care pregătește embed-ul înainte de postare)
+        self._prepared = {}
+        self._schedule_changed = asyncio.Event()
+        self.PREPARE_AHEAD = timedelta(minutes=5)
+        self.MISSED_RUN_GRACE = timedelta(hours=6)
+        self.WEEKDAYS = ["luni", "marti", "miercuri", "joi", "vineri", "sambata", "duminica"]
+        self.RESERVED_CATEGORY_NAMES = ("pentrumine", "cont")
+        # Câte pregătiri/postări rulează simultan, indiferent de numărul de servere și categorii
+        self.DISPATCH_WORKERS = 4
+        self._dispatch_slots = asyncio.Semaphore(self.DISPATCH_WORKERS)
+        self._session: aiohttp.ClientSession = None
+        # (base_url, api_key) -> (utilizatori, expiră_la); lista /Users nu mai este cerută la fiecare item
+        self._users = {}
+        self.USER_ID_TTL = 3600
+        self.DETAIL_FIELDS = "Overview,Genres,CommunityRating,ProductionYear,ProviderIds,ImageTags"
+        # Snapshot local al bibliotecii per (base_url, api_key, library_id) și istoricul recomandărilor per (guild, categorie)
+        self._catalogs = {}
+        self._catalog_tasks = {}
+        self._bags = {}
+        self.CATALOG_TTL = 6 * 3600
+        # Similaritățile item-item per cheie de catalog, recalculate la fiecare snapshot nou
+        self._similarity = {}
+        self._similarity_tasks = {}
+        self.PERSONAL_SEEDS = 10
+        # Rezerva de recomandări gata pregătite pentru comenzile manuale:
+        # (guild_id, categorie) -> (amprenta setărilor, deque de (pregătit_la, embed))
+        self._pools = {}
+        self._pool_tasks = {}
+        self._warm_task = None
+        self.POOL_SIZE = 3
+        self.POOL_LOW_WATER = 2
+        self.POOL_MAX_AGE = 6 * 3600
+        self._history_dir = cog_data_path(self) / "history"
+        self._history_dir.mkdir(parents=True, exist_ok=True)
         self.start_tasks()
         self.tmdb_base_url = "https://api.themoviedb.org/3"
         self.poster_base_url = "https://image.tmdb.org/t/p/w500"
+        self._translation_cache = TranslationCache()
+        self._translator = GoogleTranslator(source='auto', target='ro')
 
     def start_tasks(self):
-        self.bg_task = self.bot.loop.create_task(self.monday_recommendation_loop())
-        
-    def cog_unload(self):
+        self.bg_task = self.bot.loop.create_task(self.weekly_recommendation_loop())
+
+    async def cog_load(self):
+        # Rezervele se umplu imediat după load/reload, nu abia la prima comandă
+        self._warm_task = asyncio.ensure_future(self._warm_pools())
+
+    async def cog_unload(self):
         if self.bg_task:
             self.bg_task.cancel()
+        if self._warm_task:
+            self._warm_task.cancel()
+        for _, task in self._prepared.values():
+            task.cancel()
+        tasks = list(self._catalog_tasks.values()) + list(self._similarity_tasks.values()) + list(self._pool_tasks.values())
+        for task in tasks:
+            task.cancel()
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._translation_cache.close()
+
+    async def red_delete_data_for_user(self, *, requester, user_id):
+        """Șterge contul Jellyfin legat de membru în toate serverele"""
+        for guild_id in (await self.config.all_members()).keys():
+            await self.config.member_from_ids(guild_id, user_id).clear()
 
     async def translate_to_romanian(self, text):
-        """Traduce textul în română folosind Google Translate"""
+        """Traduce textul în română folosind Google Translate (cu cache pe disc)"""
         if not text or text == 'Fără descriere disponibilă.':
             return text
-        
+
+        translated = await self._translation_cache.translate(text, 'ro', self._translate_remote)
+        return translated or text
+
+    async def _translate_remote(self, text):
+        """Apel efectiv către Google Translate; întoarce None la eroare"""
         try:
             loop = asyncio.get_event_loop()
-            translated = await loop.run_in_executor(
-                None, 
-                lambda: GoogleTranslator(source='auto', target='ro').translate(text)
-            )
-            return translated
+            return await loop.run_in_executor(None, self._translator.translate, text)
         except Exception as e:
             print(f"Eroare la traducere: {e}")
-            return text
+            return None
 
-    async def monday_recommendation_loop(self):
-        """Background loop for Monday recommendations"""
-        await self.bot.wait_until_ready()
-        while True:
-            now = datetime.now()
-            if now.weekday() == 0 and now.hour == 18:
-                all_guilds = await self.config.all_guilds()
-                for guild_id, settings in all_guilds.items():
-                    guild = self.bot.get_guild(guild_id)
-                    if guild:
-                        # Trimite recomandare anime dacă este configurat
-                        if all(k in settings.get('anime', {}) and settings['anime'][k] for k in ['base_url', 'api_key', 'channel_id']):
-                            await self.send_recommendation(guild, 'anime')
-                        # Trimite recomandare porn dacă este configurat
-                        if all(k in settings.get('porn', {}) and settings['porn'][k] for k in ['base_url', 'api_key', 'channel_id']):
-                            await self.send_recommendation(guild, 'porn')
-            await asyncio.sleep(3600)
-
-    async def search_tmdb(self, title, year, is_movie, tmdb_api_key):
-        """Caută pe TMDb și returnează datele filmului/serialului cu retry și timeout extins"""
+    async def search_tmdb(self, title, year, is_movie, tmdb_api_key, tmdb_id=None):
+        """Obține datele TMDb: direct după id dacă Jellyfin îl cunoaște, altfel prin căutare după titlu"""
         if not tmdb_api_key:
             return None
-            
+
         media_type = "movie" if is_movie else "tv"
+        if tmdb_id:
+            # Detaliile și imaginile vin într-un singur apel
+            details_url = (
+                f"{self.tmdb_base_url}/{media_type}/{tmdb_id}?api_key={tmdb_api_key}"
+                f"&append_to_response=images&include_image_language=ro,en,null"
+            )
+            details = await self._tmdb_get(details_url)
+            if details:
+                posters = (details.get('images') or {}).get('posters') or []
+                return {
+                    'poster_path': details.get('poster_path') or (posters[0].get('file_path') if posters else None),
+                    'overview': details.get('overview'),
+                    'tmdb_id': details.get('id', tmdb_id)
+                }
+
+        # Fallback: căutare după titlu; rezultatul conține deja posterul și descrierea
         search_url = f"{self.tmdb_base_url}/search/{media_type}?api_key={tmdb_api_key}&query={title}&year={year}"
-        
+        data = await self._tmdb_get(search_url)
+        results = (data or {}).get('results', [])
+        if results:
+            tmdb_data = results[0]
+            return {
+                'poster_path': tmdb_data.get('poster_path'),
+                'overview': tmdb_data.get('overview'),
+                'tmdb_id': tmdb_data.get('id')
+            }
+        return None
+
+    async def _tmdb_get(self, url):
+        """GET către TMDb cu retry și timeout extins; întoarce JSON-ul sau None (404 nu se reîncearcă)"""
         timeout = aiohttp.ClientTimeout(total=30)
         max_retries = 3
         retry_delay = 2
-        
+
         for attempt in range(max_retries):
             try:
-                async with aiohttp.ClientSession(timeout=timeout) as session:
-                    async with session.get(search_url) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            results = data.get('results', [])
-                            if results:
-                                tmdb_data = results[0]
-                                tmdb_id = tmdb_data.get('id')
-                                
-                                if tmdb_id:
-                                    details_url = f"{self.tmdb_base_url}/{media_type}/{tmdb_id}?api_key={tmdb_api_key}"
-                                    async with session.get(details_url) as details_response:
-                                        if details_response.status == 200:
-                                            details = await details_response.json()
-                                            return {
-                                                'poster_path': details.get('poster_path'),
-                                                'overview': details.get('overview'),
-                                                'tmdb_id': tmdb_id
-                                            }
-                                
-                                return {
-                                    'poster_path': tmdb_data.get('poster_path'),
-                                    'overview': tmdb_data.get('overview'),
-                                    'tmdb_id': tmdb_id
-                                }
-                        elif response.status == 429:
-                            await asyncio.sleep(retry_delay * (attempt + 2))
-                            continue
-                        else:
-                            print(f"TMDb API error: Status {response.status}")
+                session = await self._get_session()
+                async with session.get(url, timeout=timeout) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    elif response.status == 404:
+                        return None
+                    elif response.status == 429:
+                        await asyncio.sleep(retry_delay * (attempt + 2))
+                        continue
+                    else:
+                        print(f"TMDb API error: Status {response.status}")
             except asyncio.TimeoutError:
                 print(f"TMDb API timeout on attempt {attempt+1}")
                 if attempt < max_retries - 1:
@@ -134,53 +195,135 @@ class JellyfinRecommendation(commands.Cog):
                 print(f"Error searching TMDb on attempt {attempt+1}: {e}")
                 if attempt < max_retries - 1:
                     await asyncio.sleep(retry_delay)
-        
+
         print("Failed to get TMDb data after all retry attempts")
         return None
 
+    @staticmethod
+    def _tmdb_id(item):
+        """Id-ul TMDb din ProviderIds (completat de Jellyfin când metadatele au fost potrivite)"""
+        provider_ids = item.get('ProviderIds') or {}
+        return next((value for key, value in provider_ids.items() if key.lower() == 'tmdb' and value), None)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Sesiune aiohttp comună pentru toate cererile cog-ului"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def _get_users(self, base_url, api_key):
+        """Lista utilizatorilor Jellyfin, ținută în cache per (base_url, api_key) cu TTL; None la eroare"""
+        key = (base_url, api_key)
+        cached = self._users.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        try:
+            session = await self._get_session()
+            async with session.get(f"{base_url}/Users?api_key={api_key}") as response:
+                if response.status != 200:
+                    print(f"Error fetching Jellyfin users: Status {response.status}")
+                    return None
+                users = await response.json()
+        except Exception as e:
+            print(f"Error fetching Jellyfin users: {e}")
+            return None
+
+        # Și lipsa utilizatorilor este ținută în cache; erorile de rețea nu
+        self._users[key] = (users, time.monotonic() + self.USER_ID_TTL)
+        return users
+
+    async def _resolve_user_id(self, base_url, api_key):
+        """Id-ul primului utilizator Jellyfin"""
+        users = await self._get_users(base_url, api_key)
+        return users[0]['Id'] if users else None
+
     async def get_item_details(self, base_url, api_key, item_id):
         """Obține detalii complete despre un item din Jellyfin"""
-        details_url = f"{base_url}/Users/{{UserId}}/Items/{item_id}?api_key={api_key}"
-        
-        # Încearcă să obțină UserId
-        users_url = f"{base_url}/Users?api_key={api_key}"
-        
+        user_id = await self._resolve_user_id(base_url, api_key)
+        if user_id:
+            details_url = f"{base_url}/Users/{user_id}/Items/{item_id}?api_key={api_key}"
+        else:
+            # Fallback la Items endpoint fără UserId
+            details_url = f"{base_url}/Items/{item_id}?api_key={api_key}"
+
         try:
-            async with aiohttp.ClientSession() as session:
-                # Obține primul user
-                async with session.get(users_url) as response:
-                    if response.status == 200:
-                        users = await response.json()
-                        if users:
-                            user_id = users[0]['Id']
-                            details_url = f"{base_url}/Users/{user_id}/Items/{item_id}?api_key={api_key}"
-                        else:
-                            # Fallback la Items endpoint fără UserId
-                            details_url = f"{base_url}/Items/{item_id}?api_key={api_key}"
-                    else:
-                        details_url = f"{base_url}/Items/{item_id}?api_key={api_key}"
-                
-                # Obține detaliile item-ului
-                async with session.get(details_url) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        print(f"Error fetching item details: Status {response.status}")
-                        return None
+            session = await self._get_session()
+            async with session.get(details_url) as response:
+                if response.status == 200:
+                    return await response.json()
+                else:
+                    print(f"Error fetching item details: Status {response.status}")
+                    return None
         except Exception as e:
             print(f"Error in get_item_details: {e}")
             return None
 
-    async def send_recommendation(self, guild, media_type):
-        """Send a recommendation to the configured channel"""
-        settings = await self.config.guild(guild).get_raw(media_type)
-        if not all(k in settings and settings[k] for k in ['base_url', 'api_key', 'channel_id']):
-            return
+    async def get_items_details(self, base_url, api_key, item_ids, user_id=None):
+        """Obține detaliile mai multor iteme într-un singur apel /Items?Ids=...; întoarce {Id: item}"""
+        if not item_ids:
+            return {}
+        user_id = user_id or await self._resolve_user_id(base_url, api_key)
+        params = (
+            f"Ids={','.join(item_ids)}&"
+            f"Fields={self.DETAIL_FIELDS}&"
+            f"api_key={api_key}"
+        )
+        url = f"{base_url}/Users/{user_id}/Items?{params}" if user_id else f"{base_url}/Items?{params}"
+
+        try:
+            session = await self._get_session()
+            async with session.get(url) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return {item['Id']: item for item in data.get('Items', []) if item.get('Id')}
+                print(f"Error fetching item details: Status {response.status}")
+        except Exception as e:
+            print(f"Error in get_items_details: {e}")
+        return {}
 
-        item = await self.get_random_recommendation(settings['base_url'], settings['api_key'])
+    async def prepare_recommendation(self, settings, name, guild_id):
+        """Alege un item din categorie și construiește embed-ul complet (TMDb, descriere tradusă, poster)"""
+        reserved = await self._reserve_recommendation(settings, name, guild_id)
+        if reserved is None:
+            return None
+        self._mark_served(guild_id, name, reserved[1])
+        return reserved[0]
+
+    async def _reserve_recommendation(self, settings, name, guild_id):
+        """Ca prepare_recommendation, dar titlul intră în istoric abia la _mark_served.
+
+        Întoarce (embed, item_id) sau None; item_id este None dacă titlul nu vine din sac.
+        O recomandare rezervată care nu mai este trimisă se eliberează cu _release.
+        """
+        history_key = f"{guild_id}-{name}"
+        item = await self._draw_unrecommended(
+            settings['base_url'], settings['api_key'], history_key, settings.get('library_id')
+        )
+        item_id = item['Id'] if item else None
+        if item is None:
+            item = await self._random_item(settings['base_url'], settings['api_key'], settings.get('library_id'))
         if not item:
-            return
+            return None
+        try:
+            embed = await self._build_embed(settings, name, item)
+        except BaseException:
+            self._release(guild_id, name, item_id)
+            raise
+        return embed, item_id
 
+    def _mark_served(self, guild_id, name, item_id):
+        """Trece în istoric titlul unei recomandări trimise"""
+        if item_id:
+            self._get_bag(f"{guild_id}-{name}").commit(item_id)
+
+    def _release(self, guild_id, name, item_id):
+        """Pune înapoi în sac titlul unei recomandări rezervate care nu a mai fost trimisă"""
+        if item_id:
+            self._get_bag(f"{guild_id}-{name}").release(item_id)
+
+    async def _build_embed(self, settings, name, item):
+        """Embed-ul unei recomandări pentru un item Jellyfin deja ales"""
         title = item.get('Name', 'Titlu necunoscut')
         year = item.get('ProductionYear', 'An necunoscut')
         is_movie = item.get('Type') == "Movie"
@@ -190,11 +333,11 @@ class JellyfinRecommendation(commands.Cog):
         overview = None
         poster_url = None
         
-        # Pentru anime, folosește TMDb
-        if media_type == 'anime':
+        # Categoriile cu sursa TMDb (ex: anime) iau descrierea și posterul de acolo
+        if settings.get('source') == 'tmdb':
             tmdb_data = None
             if settings.get('tmdb_api_key'):
-                tmdb_data = await self.search_tmdb(title, year, is_movie, settings['tmdb_api_key'])
+                tmdb_data = await self.search_tmdb(title, year, is_movie, settings['tmdb_api_key'], tmdb_id=self._tmdb_id(item))
             
             if tmdb_data and tmdb_data.get('overview'):
                 overview = tmdb_data['overview']
@@ -203,7 +346,7 @@ class JellyfinRecommendation(commands.Cog):
             if tmdb_data and tmdb_data.get('poster_path'):
                 poster_url = f"{self.poster_base_url}{tmdb_data['poster_path']}"
         
-        # Pentru porn, folosește datele din Jellyfin
+        # Celelalte folosesc datele din Jellyfin
         else:
             # Încearcă să obții detalii complete din Jellyfin
             full_item = await self.get_item_details(settings['base_url'], settings['api_key'], item_id)
@@ -231,6 +374,10 @@ class JellyfinRecommendation(commands.Cog):
             # Folosește posterul din Jellyfin
             if item_id and item.get('ImageTags', {}).get('Primary'):
                 poster_url = f"{settings['base_url']}/Items/{item_id}/Images/Primary?api_key={settings['api_key']}"
+
+        # Posterul este cerut o dată în avans: îl încălzim în cache și nu publicăm un link mort
+        if poster_url and not await self._poster_available(poster_url):
+            poster_url = None
         
         if not overview or overview.strip() == '':
             overview = 'Fără descriere disponibilă.'
@@ -238,7 +385,7 @@ class JellyfinRecommendation(commands.Cog):
         if len(overview) > 1000:
             overview = overview[:997] + "..."
 
-        color = discord.Color.blue() if media_type == 'anime' else discord.Color.red()
+        color = discord.Color(settings.get('color', discord.Color.blue().value))
         embed = discord.Embed(
             title=f"{title} ({year})",
             description=overview,
@@ -263,146 +410,528 @@ class JellyfinRecommendation(commands.Cog):
 
         embed.add_field(name="*Notă:*", value=f"*Descriere tradusă automat din engleză folosind deep_translate.*", inline=False)
         
-        cmd_text = f"`.recomanda {media_type}`"
+        cmd_text = f"`.recomanda {name}`"
         embed.add_field(name="Caută mai multe recomandări:", value=f"Folosește comanda {cmd_text} pentru a primi o recomandare personalizată oricând dorești!", inline=False)
+        return embed
 
-        channel = guild.get_channel(settings['channel_id'])
-        if channel:
-            await channel.send("**Recomandarea de săptămâna aceasta:**", embed=embed)
+    async def _poster_available(self, url):
+        """Cere posterul o dată; întoarce False dacă link-ul nu funcționează"""
+        try:
+            session = await self._get_session()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                await response.read()
+                return response.status == 200
+        except Exception as e:
+            print(f"Posterul nu a putut fi descărcat ({url}): {e}")
+            return False
 
-    # ===== COMENZI ANIME =====
-    @commands.command()
-    @commands.admin_or_permissions(administrator=True)
-    async def animerecseturl(self, ctx, url: str):
-        """Set the Jellyfin server URL for anime recommendations"""
-        url = url.rstrip('/')
-        await self.config.guild(ctx.guild).anime.base_url.set(url)
-        await ctx.send(f"URL-ul serverului Jellyfin pentru anime a fost setat la: {url}")
+    async def send_recommendation(self, guild, name, reserved=None):
+        """Send a recommendation (prepared in advance, if available) to the category's channel
 
-    @commands.command()
-    @commands.admin_or_permissions(administrator=True)
-    async def animerecsetapi(self, ctx, api_key: str):
-        """Set the Jellyfin API key for anime recommendations"""
-        await self.config.guild(ctx.guild).anime.api_key.set(api_key)
-        await ctx.send("Cheia API Jellyfin pentru anime a fost setată.")
-        await ctx.message.delete()
-        
-    @commands.command()
-    @commands.admin_or_permissions(administrator=True)
-    async def animerecsettmdbapi(self, ctx, api_key: str):
-        """Setează cheia API pentru TMDb pentru anime"""
-        await self.config.guild(ctx.guild).anime.tmdb_api_key.set(api_key)
-        await ctx.send("Cheia API TMDb pentru anime a fost setată.")
-        await ctx.message.delete()
+        `reserved` is an (embed, item_id) pair from _reserve_recommendation; its title enters
+        the history only once it is posted.
+        """
+        item_id = reserved[1] if reserved else None
+        try:
+            stored = (await self.config.guild(guild).categories()).get(name)
+            if not stored:
+                return
+            category = self._category(stored)
+            if not all(category.get(k) for k in ['base_url', 'api_key', 'channel_id']):
+                return
 
-    @commands.command()
-    @commands.admin_or_permissions(administrator=True)
-    async def setanimerecommendationchannel(self, ctx, channel: discord.TextChannel):
-        """Set the channel for Monday anime recommendations"""
-        await self.config.guild(ctx.guild).anime.channel_id.set(channel.id)
-        await ctx.send(f"Canalul pentru recomandări anime a fost setat la: {channel.mention}")
+            if reserved is None:
+                reserved = await self._reserve_recommendation(category, name, guild.id)
+                if reserved is None:
+                    return
+                item_id = reserved[1]
 
-    @commands.command()
-    @commands.admin_or_permissions(administrator=True)
-    async def setanimeservername(self, ctx, *, server_name: str):
-        """Setează numele serverului care va apărea în link-ul de vizionare pentru anime"""
-        await self.config.guild(ctx.guild).anime.server_name.set(server_name)
-        await ctx.send(f"Numele serverului pentru anime a fost setat la: {server_name}")
+            channel = guild.get_channel(category['channel_id'])
+            if channel:
+                await channel.send("**Recomandarea de săptămâna aceasta:**", embed=reserved[0])
+                self._mark_served(guild.id, name, item_id)
+                item_id = None
+        finally:
+            self._release(guild.id, name, item_id)
 
-    @commands.command()
-    @commands.admin_or_permissions(administrator=True)
-    async def showanimesecsettings(self, ctx):
-        """Show current anime recommendation settings"""
-        settings = await self.config.guild(ctx.guild).anime.all()
-        channel = ctx.guild.get_channel(settings['channel_id']) if settings.get('channel_id') else None
-        
-        embed = discord.Embed(
-            title="Setări Recomandări Jellyfin Anime",
-            color=discord.Color.blue()
+    # ===== CATEGORII =====
+    def _category(self, stored):
+        """Setările complete ale unei categorii (valorile lipsă iau valorile implicite)"""
+        category = {**self.CATEGORY_DEFAULTS, **stored}
+        category['schedule'] = {**self.CATEGORY_DEFAULTS['schedule'], **(stored.get('schedule') or {})}
+        return category
+
+    async def _migrate_categories(self):
+        """Mută setările vechi `anime` / `porn` (și programarea comună) în categorii, o singură dată per server"""
+        legacy = (
+            ('anime', 'tmdb', discord.Color.blue().value),
+            ('porn', 'jellyfin', discord.Color.red().value),
         )
-        embed.add_field(name="URL Server", value=settings.get('base_url') or "Nesetat", inline=False)
-        embed.add_field(name="API Key Jellyfin", value="Setat ✓" if settings.get('api_key') else "Nesetat ✗", inline=False)
-        embed.add_field(name="API Key TMDb", value="Setat ✓" if settings.get('tmdb_api_key') else "Nesetat ✗", inline=False)
-        embed.add_field(name="Nume Server", value=settings.get('server_name', 'Freia [SERVER 2]'), inline=False)
-        embed.add_field(name="Canal Recomandări", value=channel.mention if channel else "Nesetat", inline=False)
-        
-        await ctx.send(embed=embed)
+        for guild_id, settings in (await self.config.all_guilds()).items():
+            if settings.get('categories_migrated'):
+                continue
+            guild_config = self.config.guild_from_id(guild_id)
+            schedule = {**self.CATEGORY_DEFAULTS['schedule'], **(settings.get('schedule') or {})}
+            async with guild_config.categories() as categories:
+                for name, source, color in legacy:
+                    old = settings.get(name) or {}
+                    if name in categories or not any(old.get(k) for k in ['base_url', 'api_key', 'channel_id']):
+                        continue
+                    categories[name] = {
+                        **{k: v for k, v in old.items() if k in self.CATEGORY_DEFAULTS},
+                        'source': source,
+                        'color': color,
+                        'schedule': dict(schedule),
+                    }
+                    print(f"Setările {name} din serverul {guild_id} au fost mutate în categoria `{name}`")
+            for name in ('anime', 'porn', 'schedule'):
+                await guild_config.clear_raw(name)
+            await guild_config.categories_migrated.set(True)
+
+    async def _bounded(self, coro):
+        """Rulează o corutină într-unul din cele DISPATCH_WORKERS locuri de lucru"""
+        async with self._dispatch_slots:
+            return await coro
 
-    # ===== COMENZI PORN =====
-    @commands.command()
+    # ===== PROGRAMARE SĂPTĂMÂNALĂ =====
+    @staticmethod
+    def _occurrence_after(schedule, after):
+        """Prima apariție a programării (zi, oră, minut — ora locală) strict după `after`"""
+        candidate = after.replace(hour=schedule['hour'], minute=schedule['minute'], second=0, microsecond=0)
+        candidate += timedelta(days=(schedule['weekday'] - after.weekday()) % 7)
+        if candidate <= after:
+            candidate += timedelta(days=7)
+        return candidate
+
+    async def weekly_recommendation_loop(self):
+        """Background scheduler: sleeps exactly until the next prepare/post time"""
+        await self.bot.wait_until_ready()
+        try:
+            await self._migrate_categories()
+        except Exception as e:
+            print(f"Eroare la migrarea setărilor în categorii: {e}")
+        while True:
+            try:
+                next_wake = await self._run_recommendation_schedule()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Eroare în programarea recomandărilor: {e}")
+                next_wake = time.time() + 300
+
+            timeout = None if next_wake is None else max(0.0, next_wake - time.time())
+            try:
+                await asyncio.wait_for(self._schedule_changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._schedule_changed.clear()
+
+    async def _run_recommendation_schedule(self):
+        """Post due recommendations, start preparing upcoming ones; returns the next wake-up timestamp"""
+        now = datetime.now()
+        next_wake = None
+        due_posts = []
+        all_guilds = await self.config.all_guilds()
+
+        for guild_id, settings in all_guilds.items():
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                continue
+            last_run = settings.get('last_run') or {}
+
+            for name, stored in (settings.get('categories') or {}).items():
+                category = self._category(stored)
+                if not all(category.get(k) for k in ['base_url', 'api_key', 'channel_id']):
+                    continue
+                schedule = category['schedule']
+                key = (guild_id, name)
+
+                if not last_run.get(name):
+                    # Prima programare pornește de acum, fără a posta imediat
+                    await self.config.guild(guild).last_run.set_raw(name, value=now.timestamp())
+                    last_run[name] = now.timestamp()
+                base = datetime.fromtimestamp(last_run[name])
+                due = self._occurrence_after(schedule, base)
+                if due <= now:
+                    # Dacă botul a fost oprit mai multe săptămâni, contează doar ultima apariție
+                    latest = due
+                    while (following := self._occurrence_after(schedule, latest)) <= now:
+                        latest = following
+                    # Marcajul se salvează înainte de trimitere: după un restart nu se postează de două ori
+                    await self.config.guild(guild).last_run.set_raw(name, value=latest.timestamp())
+                    prepared = self._prepared.pop(key, None)
+                    if now - latest <= self.MISSED_RUN_GRACE:
+                        due_posts.append(self._post_due(guild, name, latest, prepared))
+                    else:
+                        if prepared:
+                            self._cancel_prepared(key, prepared)
+                        print(f"Recomandarea {name} din {latest:%d.%m.%Y %H:%M} a fost ratată (bot oprit) — sărim peste ea.")
+                    due = self._occurrence_after(schedule, latest)
+
+                prepare_at = due - self.PREPARE_AHEAD
+                prepared = self._prepared.get(key)
+                if prepared and prepared[0] != due.timestamp():
+                    # Programarea s-a schimbat: pregătirea veche nu mai este valabilă
+                    self._cancel_prepared(key, self._prepared.pop(key))
+                    prepared = None
+                if prepared is None and prepare_at <= now:
+                    task = asyncio.ensure_future(self._bounded(self._reserve_recommendation(category, name, guild_id)))
+                    self._prepared[key] = (due.timestamp(), task)
+                    prepared = self._prepared[key]
+
+                wake = due if prepared else prepare_at
+                if next_wake is None or wake.timestamp() < next_wake:
+                    next_wake = wake.timestamp()
+
+        # Postările scadente pleacă în paralel (limitat de DISPATCH_WORKERS), nu una după alta
+        if due_posts:
+            await asyncio.gather(*due_posts)
+        return next_wake
+
+    async def _post_due(self, guild, name, latest, prepared):
+        """Trimite recomandarea scadentă a unei categorii, folosind embed-ul pregătit dacă există"""
+        reserved = None
+        if prepared and prepared[0] == latest.timestamp() and not prepared[1].cancelled():
+            # Așteptarea pregătirii nu ocupă un loc de lucru: pregătirea însăși are nevoie de unul
+            try:
+                reserved = await prepared[1]
+            except Exception as e:
+                print(f"Pregătirea recomandării {name} a eșuat: {e}")
+        elif prepared:
+            self._cancel_prepared((guild.id, name), prepared)
+        try:
+            await self._bounded(self.send_recommendation(guild, name, reserved=reserved))
+        except Exception as e:
+            print(f"Eroare la trimiterea recomandării {name} în {guild.name}: {e}")
+
+    def _cancel_prepared(self, key, prepared):
+        """Anulează o recomandare programată pregătită; titlul ales se întoarce în sac"""
+        task = prepared[1]
+        if task.done() and not task.cancelled() and task.exception() is None and task.result():
+            self._release(*key, task.result()[1])
+        task.cancel()
+
+    def _schedule_text(self, schedule):
+        next_run = self._occurrence_after(schedule, datetime.now())
+        return (
+            f"În fiecare {self.WEEKDAYS[schedule['weekday']]} la {schedule['hour']:02d}:{schedule['minute']:02d} "
+            f"(următoarea: {next_run:%d.%m.%Y %H:%M})"
+        )
+
+    # ===== COMENZI CATEGORII =====
+    @commands.group(name="reccat")
+    @commands.guild_only()
     @commands.admin_or_permissions(administrator=True)
-    async def pornrecseturl(self, ctx, url: str):
-        """Set the Jellyfin server URL for porn recommendations"""
+    async def reccat(self, ctx):
+        """Configurează categoriile de recomandări (fiecare cu server, bibliotecă, programare și canal proprii)"""
+        pass
+
+    async def _update_category(self, ctx, name, **values):
+        """Actualizează câmpurile unei categorii existente; întoarce False (și anunță) dacă nu există"""
+        name = name.lower()
+        async with self.config.guild(ctx.guild).categories() as categories:
+            if name not in categories:
+                await ctx.send(f"❌ Categoria `{name}` nu există. Creeaz-o cu `{ctx.prefix}reccat add {name}`.")
+                return False
+            categories[name].update(values)
+            category = self._category(categories[name])
+        # O categorie abia completată (sau cu altă programare) trebuie luată în calcul de planificator
+        self._schedule_changed.set()
+        # Rezerva pregătită cu setările vechi este înlocuită acum, nu la următoarea comandă
+        self._warm_pool(ctx.guild.id, name, category)
+        return True
+
+    @reccat.command(name="add")
+    async def reccat_add(self, ctx, name: str):
+        """Adaugă o categorie nouă (ex: anime, filme, documentare)"""
+        name = name.lower()
+        if name in self.RESERVED_CATEGORY_NAMES or not name.isalnum():
+            return await ctx.send("❌ Numele categoriei trebuie să fie un singur cuvânt (litere și cifre) și să nu fie `pentrumine` sau `cont`.")
+        async with self.config.guild(ctx.guild).categories() as categories:
+            if name in categories:
+                return await ctx.send(f"Categoria `{name}` există deja.")
+            categories[name] = {}
+        await ctx.send(
+            f"✅ Categoria `{name}` a fost creată. Configureaz-o cu `{ctx.prefix}reccat url`, `api`, `channel` "
+            f"și, opțional, `tmdb`, `source`, `library`, `servername`, `schedule`."
+        )
+
+    @reccat.command(name="remove")
+    async def reccat_remove(self, ctx, name: str):
+        """Șterge o categorie"""
+        name = name.lower()
+        async with self.config.guild(ctx.guild).categories() as categories:
+            if categories.pop(name, None) is None:
+                return await ctx.send(f"❌ Categoria `{name}` nu există.")
+        await self.config.guild(ctx.guild).last_run.clear_raw(name)
+        prepared = self._prepared.pop((ctx.guild.id, name), None)
+        if prepared:
+            self._cancel_prepared((ctx.guild.id, name), prepared)
+        self._drop_pool(ctx.guild.id, name)
+        self._schedule_changed.set()
+        await ctx.send(f"✅ Categoria `{name}` a fost ștearsă.")
+
+    @reccat.command(name="list")
+    async def reccat_list(self, ctx):
+        """Listează categoriile configurate"""
+        categories = await self.config.guild(ctx.guild).categories()
+        if not categories:
+            return await ctx.send(f"Nu există categorii. Adaugă una cu `{ctx.prefix}reccat add <nume>`.")
+        lines = []
+        for name, stored in categories.items():
+            category = self._category(stored)
+            channel = ctx.guild.get_channel(category['channel_id']) if category.get('channel_id') else None
+            lines.append(
+                f"**{name}** — {category.get('base_url') or 'server nesetat'}, "
+                f"{channel.mention if channel else 'canal nesetat'}, {self._schedule_text(category['schedule'])}"
+            )
+        await ctx.send("\n".join(lines))
+
+    @reccat.command(name="url")
+    async def reccat_url(self, ctx, name: str, url: str):
+        """Setează URL-ul serverului Jellyfin al categoriei"""
         url = url.rstrip('/')
-        await self.config.guild(ctx.guild).porn.base_url.set(url)
-        await ctx.send(f"URL-ul serverului Jellyfin pentru porn a fost setat la: {url}")
+        if await self._update_category(ctx, name, base_url=url):
+            await ctx.send(f"URL-ul serverului Jellyfin pentru {name.lower()} a fost setat la: {url}")
 
-    @commands.command()
-    @commands.admin_or_permissions(administrator=True)
-    async def pornrecsetapi(self, ctx, api_key: str):
-        """Set the Jellyfin API key for porn recommendations"""
-        await self.config.guild(ctx.guild).porn.api_key.set(api_key)
-        await ctx.send("Cheia API Jellyfin pentru porn a fost setată.")
+    @reccat.command(name="api")
+    async def reccat_api(self, ctx, name: str, api_key: str):
+        """Setează cheia API Jellyfin a categoriei"""
+        if await self._update_category(ctx, name, api_key=api_key):
+            await ctx.send(f"Cheia API Jellyfin pentru {name.lower()} a fost setată.")
         await ctx.message.delete()
-        
-    @commands.command()
-    @commands.admin_or_permissions(administrator=True)
-    async def pornrecsettmdbapi(self, ctx, api_key: str):
-        """Setează cheia API pentru TMDb pentru porn"""
-        await self.config.guild(ctx.guild).porn.tmdb_api_key.set(api_key)
-        await ctx.send("Cheia API TMDb pentru porn a fost setată.")
+
+    @reccat.command(name="tmdb")
+    async def reccat_tmdb(self, ctx, name: str, api_key: str):
+        """Setează cheia API TMDb a categoriei"""
+        if await self._update_category(ctx, name, tmdb_api_key=api_key):
+            await ctx.send(f"Cheia API TMDb pentru {name.lower()} a fost setată.")
         await ctx.message.delete()
 
-    @commands.command()
-    @commands.admin_or_permissions(administrator=True)
-    async def setpornrecommendationchannel(self, ctx, channel: discord.TextChannel):
-        """Set the channel for Monday porn recommendations"""
-        await self.config.guild(ctx.guild).porn.channel_id.set(channel.id)
-        await ctx.send(f"Canalul pentru recomandări porn a fost setat la: {channel.mention}")
+    @reccat.command(name="channel")
+    async def reccat_channel(self, ctx, name: str, channel: discord.TextChannel):
+        """Setează canalul recomandărilor săptămânale ale categoriei"""
+        if await self._update_category(ctx, name, channel_id=channel.id):
+            await ctx.send(f"Canalul pentru recomandări {name.lower()} a fost setat la: {channel.mention}")
 
-    @commands.command()
-    @commands.admin_or_permissions(administrator=True)
-    async def setpornservername(self, ctx, *, server_name: str):
-        """Setează numele serverului care va apărea în link-ul de vizionare pentru porn"""
-        await self.config.guild(ctx.guild).porn.server_name.set(server_name)
-        await ctx.send(f"Numele serverului pentru porn a fost setat la: {server_name}")
+    @reccat.command(name="servername")
+    async def reccat_servername(self, ctx, name: str, *, server_name: str):
+        """Setează numele serverului care va apărea în link-ul de vizionare"""
+        if await self._update_category(ctx, name, server_name=server_name):
+            await ctx.send(f"Numele serverului pentru {name.lower()} a fost setat la: {server_name}")
 
-    @commands.command()
-    @commands.admin_or_permissions(administrator=True)
-    async def showpornrecsettings(self, ctx):
-        """Show current porn recommendation settings"""
-        settings = await self.config.guild(ctx.guild).porn.all()
+    @reccat.command(name="source")
+    async def reccat_source(self, ctx, name: str, source: str):
+        """Setează sursa descrierii și posterului: `tmdb` sau `jellyfin`"""
+        source = source.lower()
+        if source not in ('tmdb', 'jellyfin'):
+            return await ctx.send("❌ Sursa trebuie să fie `tmdb` sau `jellyfin`.")
+        if await self._update_category(ctx, name, source=source):
+            await ctx.send(f"Descrierile și posterele pentru {name.lower()} vor veni de la {source}.")
+
+    @reccat.command(name="library")
+    async def reccat_library(self, ctx, name: str, *, library: str = None):
+        """Limitează categoria la o bibliotecă Jellyfin (fără nume: toate bibliotecile)"""
+        stored = (await self.config.guild(ctx.guild).categories()).get(name.lower())
+        if library is None:
+            if await self._update_category(ctx, name, library_id=None, library_name=None):
+                await ctx.send(f"Categoria {name.lower()} folosește acum toate bibliotecile serverului.")
+            return
+        if not stored or not stored.get('base_url') or not stored.get('api_key'):
+            return await ctx.send("❌ Setează mai întâi URL-ul și cheia API ale categoriei.")
+
+        folders = await self._get_libraries(stored['base_url'], stored['api_key'])
+        if folders is None:
+            return await ctx.send("❌ Bibliotecile serverului nu au putut fi obținute.")
+        match = next((f for f in folders if f.get('Name', '').lower() == library.lower()), None)
+        if not match:
+            names = ", ".join(f"`{f.get('Name')}`" for f in folders) or "niciuna"
+            return await ctx.send(f"❌ Biblioteca `{library}` nu există. Disponibile: {names}")
+        if await self._update_category(ctx, name, library_id=match.get('ItemId'), library_name=match.get('Name')):
+            await ctx.send(f"Categoria {name.lower()} folosește acum doar biblioteca **{match.get('Name')}**.")
+
+    @reccat.command(name="schedule")
+    async def reccat_schedule(self, ctx, name: str, day: str, at: str):
+        """Setează ziua și ora recomandărilor săptămânale ale categoriei (ex: anime luni 18:00)"""
+        day_key = day.lower().translate(str.maketrans("ăâîșşțţ", "aaisstt"))
+        weekday = self.WEEKDAYS.index(day_key) if day_key in self.WEEKDAYS else None
+        if weekday is None and day.isdigit() and 0 <= int(day) <= 6:
+            weekday = int(day)
+        try:
+            hour, minute = (int(part) for part in at.split(":"))
+            valid_time = 0 <= hour <= 23 and 0 <= minute <= 59
+        except ValueError:
+            valid_time = False
+        if weekday is None or not valid_time:
+            return await ctx.send("Format invalid. Exemplu: `reccat schedule anime luni 18:00` (zilele: luni ... duminica sau 0-6).")
+
+        if name.lower() not in await self.config.guild(ctx.guild).categories():
+            return await ctx.send(f"❌ Categoria `{name.lower()}` nu există.")
+        # Programarea nouă pornește de acum, fără a recupera aparițiile trecute
+        await self.config.guild(ctx.guild).last_run.set_raw(name.lower(), value=datetime.now().timestamp())
+        schedule = {"weekday": weekday, "hour": hour, "minute": minute}
+        if not await self._update_category(ctx, name, schedule=schedule):
+            return
+
+        next_run = self._occurrence_after(schedule, datetime.now())
+        await ctx.send(
+            f"Recomandările {name.lower()} vor fi trimise în fiecare {self.WEEKDAYS[weekday]} la {hour:02d}:{minute:02d}. "
+            f"Următoarea: {next_run:%d.%m.%Y %H:%M}."
+        )
+
+    @reccat.command(name="show")
+    async def reccat_show(self, ctx, name: str):
+        """Afișează setările unei categorii"""
+        name = name.lower()
+        stored = (await self.config.guild(ctx.guild).categories()).get(name)
+        if stored is None:
+            return await ctx.send(f"❌ Categoria `{name}` nu există.")
+        settings = self._category(stored)
         channel = ctx.guild.get_channel(settings['channel_id']) if settings.get('channel_id') else None
-        
+
         embed = discord.Embed(
-            title="Setări Recomandări Jellyfin Porn",
-            color=discord.Color.red()
+            title=f"Setări Recomandări Jellyfin: {name}",
+            color=discord.Color(settings['color'])
         )
         embed.add_field(name="URL Server", value=settings.get('base_url') or "Nesetat", inline=False)
         embed.add_field(name="API Key Jellyfin", value="Setat ✓" if settings.get('api_key') else "Nesetat ✗", inline=False)
         embed.add_field(name="API Key TMDb", value="Setat ✓" if settings.get('tmdb_api_key') else "Nesetat ✗", inline=False)
+        embed.add_field(name="Sursă descriere/poster", value=settings['source'], inline=False)
+        embed.add_field(name="Bibliotecă", value=settings.get('library_name') or "Toate", inline=False)
         embed.add_field(name="Nume Server", value=settings.get('server_name', 'Freia [SERVER 2]'), inline=False)
         embed.add_field(name="Canal Recomandări", value=channel.mention if channel else "Nesetat", inline=False)
-        
+        embed.add_field(name="Programare", value=self._schedule_text(settings['schedule']), inline=False)
+
         await ctx.send(embed=embed)
 
-    async def get_random_recommendation(self, base_url, api_key):
-        """Fetch a random recommendation"""
-        search_url = f"{base_url}/Items?IncludeItemTypes=Movie,Series&Recursive=true&SortBy=Random&Limit=1&api_key={api_key}"
+    async def _get_libraries(self, base_url, api_key):
+        """Bibliotecile (VirtualFolders) serverului Jellyfin; None la eroare"""
+        try:
+            session = await self._get_session()
+            async with session.get(f"{base_url}/Library/VirtualFolders?api_key={api_key}") as response:
+                if response.status != 200:
+                    print(f"Error fetching Jellyfin libraries: Status {response.status}")
+                    return None
+                return await response.json()
+        except Exception as e:
+            print(f"Error fetching Jellyfin libraries: {e}")
+            return None
+
+    # ===== CATALOG ȘI EȘANTIONARE FĂRĂ REPETIȚII =====
+    async def _get_catalog(self, base_url, api_key, library_id=None):
+        """Snapshot-ul bibliotecii; unul expirat este folosit în continuare cât timp se reîmprospătează"""
+        key = (base_url, api_key, library_id)
+        snapshot = self._catalogs.get(key)
+        if snapshot is None:
+            return await self._refresh_catalog(key)
+        if time.time() - snapshot.created > self.CATALOG_TTL:
+            task = self._catalog_tasks.get(key)
+            if task is None or task.done():
+                self._catalog_tasks[key] = asyncio.ensure_future(self._refresh_catalog(key))
+        return snapshot
+
+    async def _refresh_catalog(self, key):
+        items = await self._fetch_catalog(*key)
+        if items is None:
+            return self._catalogs.get(key)
+        snapshot = CatalogSnapshot(items)
+        self._catalogs[key] = snapshot
+        print(f"Catalog Jellyfin reîmprospătat ({key[0]}): {len(snapshot)} titluri")
+        # Similaritățile se recalculează doar dacă au fost deja cerute pentru acest server
+        if key in self._similarity:
+            self._similarity_tasks[key] = asyncio.ensure_future(self._build_similarity(key, snapshot))
+        return snapshot
+
+    async def _fetch_catalog(self, base_url, api_key, library_id=None, page_size=1000):
+        """Toate filmele și serialele (Id, rating și trăsăturile de conținut), pagină cu pagină; None la eroare"""
+        items = []
+        start_index = 0
+        parent = f"ParentId={library_id}&" if library_id else ""
+        while True:
+            url = (
+                f"{base_url}/Items?IncludeItemTypes=Movie,Series&Recursive=true&{parent}"
+                f"Fields=Genres,CommunityRating,Tags,Studios,People&EnableImages=false&EnableUserData=false&"
+                f"StartIndex={start_index}&Limit={page_size}&api_key={api_key}"
+            )
+            try:
+                session = await self._get_session()
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=60)) as response:
+                    if response.status != 200:
+                        print(f"Jellyfin API error (catalog): Status {response.status}")
+                        return None
+                    page = (await response.json()).get('Items', [])
+            except Exception as e:
+                print(f"Error fetching Jellyfin catalog: {e}")
+                return None
+            items.extend(
+                {
+                    'Id': i.get('Id'),
+                    'Genres': i.get('Genres'),
+                    'CommunityRating': i.get('CommunityRating'),
+                    'Tags': i.get('Tags'),
+                    'Studios': i.get('Studios'),
+                    'People': (i.get('People') or [])[:MAX_PEOPLE],
+                }
+                for i in page
+            )
+            if len(page) < page_size:
+                return items
+            start_index += page_size
+
+    def _get_bag(self, history_key):
+        bag = self._bags.get(history_key)
+        if bag is None:
+            bag = self._bags[history_key] = ShuffleBag(str(self._history_dir / f"{history_key}.json"))
+        return bag
+
+    async def get_random_recommendation(self, base_url, api_key, history_key=None, library_id=None):
+        """Fetch a random recommendation that was not recommended before (while the pool lasts)"""
+        if history_key:
+            item = await self._draw_unrecommended(base_url, api_key, history_key, library_id)
+            if item:
+                self._get_bag(history_key).commit(item['Id'])
+                return item
+        return await self._random_item(base_url, api_key, library_id)
+
+    async def _draw_unrecommended(self, base_url, api_key, history_key, library_id=None):
+        """Next title from the history's shuffle-bag (not yet committed to the history), or None"""
+        snapshot = await self._get_catalog(base_url, api_key, library_id)
+        if not snapshot:
+            return None
+        bag = self._get_bag(history_key)
+        # Un titlu șters de la ultima reîmprospătare este sărit
+        for _ in range(3):
+            item_id = bag.draw(snapshot)
+            if item_id is None:
+                break
+            try:
+                items = await self.get_items_details(base_url, api_key, [item_id])
+            except BaseException:
+                bag.release(item_id)
+                raise
+            if item_id in items:
+                return items[item_id]
+            bag.skip(item_id)
+        return None
+
+    async def _random_item(self, base_url, api_key, library_id=None):
+        """Fallback: sortare aleatorie pe server (fără istoric)"""
+        parent = f"ParentId={library_id}&" if library_id else ""
+        search_url = f"{base_url}/Items?IncludeItemTypes=Movie,Series&Recursive=true&{parent}SortBy=Random&Limit=1&Fields=ProviderIds&api_key={api_key}"
 
         max_retries = 3
         retry_delay = 2
         
         for attempt in range(max_retries):
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(search_url) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            items = data.get('Items', [])
-                            return items[0] if items else None
-                        else:
-                            print(f"Jellyfin API error: Status {response.status}")
+                session = await self._get_session()
+                async with session.get(search_url) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        items = data.get('Items', [])
+                        return items[0] if items else None
+                    else:
+                        print(f"Jellyfin API error: Status {response.status}")
             except Exception as e:
                 print(f"Error fetching recommendation on attempt {attempt+1}: {e}")
                 if attempt < max_retries - 1:
@@ -410,140 +939,353 @@ class JellyfinRecommendation(commands.Cog):
         
         return None
 
+    # ===== RECOMANDĂRI PERSONALIZATE =====
+    async def _build_similarity(self, key, snapshot):
+        """Recalculează (incremental, dacă se poate) similaritățile pentru un snapshot nou, într-un thread"""
+        loop = asyncio.get_running_loop()
+        try:
+            index = await loop.run_in_executor(None, SimilarityIndex.build, snapshot, self._similarity.get(key))
+        except Exception as e:
+            print(f"Error building similarity index ({key[0]}): {e}")
+            return self._similarity.get(key)
+        self._similarity[key] = index
+        return index
+
+    async def _get_similarity(self, base_url, api_key, library_id=None):
+        """Indexul de similaritate al bibliotecii; la prima cerere așteaptă construirea lui"""
+        key = (base_url, api_key, library_id)
+        snapshot = await self._get_catalog(base_url, api_key, library_id)
+        index = self._similarity.get(key)
+        if index is not None:
+            return index
+        if snapshot is None:
+            return None
+        task = self._similarity_tasks.get(key)
+        if task is None or task.done():
+            task = self._similarity_tasks[key] = asyncio.ensure_future(self._build_similarity(key, snapshot))
+        return await asyncio.shield(task)
+
+    async def _find_jellyfin_user(self, member, name, base_url, api_key):
+        """Contul Jellyfin dovedit al unui membru, sau None.
+
+        Doar două dovezi sunt acceptate: contul legat cu `recomanda cont` (verificat cu parola)
+        sau un cont creat de membru prin JellyfinManager pe același server. Numele de Discord
+        nu este o dovadă: oricine îl poate schimba în numele altcuiva.
+        """
+        users = await self._get_users(base_url, api_key)
+        if not users:
+            return None
+        by_id = {user.get('Id'): user for user in users}
+
+        # Legăturile vechi (doar un nume, neverificat) sunt ignorate
+        linked = (await self.config.member(member).jellyfin_accounts()).get(name)
+        if isinstance(linked, dict) and linked.get('id') in by_id:
+            return by_id[linked['id']]
+
+        manager = self.bot.get_cog("JellyfinCog")
+        if manager is not None:
+            for account in await manager.member_accounts(member.id):
+                if account['server_url'].rstrip('/') == base_url.rstrip('/') and account['jellyfin_id'] in by_id:
+                    return by_id[account['jellyfin_id']]
+        return None
+
+    async def _authenticate_jellyfin(self, base_url, username, password):
+        """Utilizatorul Jellyfin (dict) dacă numele și parola sunt corecte, altfel None"""
+        headers = {
+            "Content-Type": "application/json",
+            "X-Emby-Authorization": 'MediaBrowser Client="RedBot", Device="RedBot", DeviceId="redbot-jellyfin", Version="1.0.0"'
+        }
+        try:
+            session = await self._get_session()
+            async with session.post(
+                f"{base_url}/Users/AuthenticateByName",
+                json={"Username": username, "Pw": password},
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=10),
+            ) as response:
+                if response.status != 200:
+                    return None
+                return (await response.json()).get('User')
+        except Exception as e:
+            print(f"Error authenticating Jellyfin user: {e}")
+            return None
+
+    async def _get_play_history(self, base_url, api_key, user_id, limit=200):
+        """Ultimele filme/episoade vizionate de utilizator, cele mai recente primele"""
+        url = (
+            f"{base_url}/Users/{user_id}/Items?IncludeItemTypes=Movie,Episode&Recursive=true&"
+            f"Filters=IsPlayed&SortBy=DatePlayed&SortOrder=Descending&EnableImages=false&"
+            f"Limit={limit}&api_key={api_key}"
+        )
+        try:
+            session = await self._get_session()
+            async with session.get(url) as response:
+                if response.status != 200:
+                    print(f"Error fetching play history: Status {response.status}")
+                    return None
+                return (await response.json()).get('Items', [])
+        except Exception as e:
+            print(f"Error fetching play history: {e}")
+            return None
+
+    async def get_personal_recommendation(self, base_url, api_key, user_id, library_id=None):
+        """Un titlu nevizionat asemănător cu ce a văzut recent utilizatorul; (item, titluri_sursă) sau (None, motiv)"""
+        history = await self._get_play_history(base_url, api_key, user_id)
+        if history is None:
+            return None, "Istoricul de vizionare nu a putut fi obținut."
+
+        # Episoadele contează pentru serialul lor; cele mai recente titluri cântăresc mai mult
+        watched = {}
+        for played in history:
+            item_id = played.get('SeriesId') or played.get('Id')
+            if item_id and item_id not in watched:
+                watched[item_id] = played.get('SeriesName') or played.get('Name')
+        if not watched:
+            return None, "Nu ai vizionat încă nimic pe acest server."
+        recent = list(watched)[:self.PERSONAL_SEEDS]
+        seeds = {item_id: 0.85 ** rank for rank, item_id in enumerate(recent)}
+
+        index = await self._get_similarity(base_url, api_key, library_id)
+        if index is None:
+            return None, "Catalogul serverului nu este disponibil momentan."
+        candidates = index.recommend(seeds, exclude=watched, limit=10)
+        if not candidates:
+            return None, "Nu am găsit titluri asemănătoare cu ce ai vizionat."
+
+        # Un singur apel pentru detalii și starea de vizionare a candidaților
+        details = await self.get_items_details(base_url, api_key, [item_id for item_id, _ in candidates], user_id=user_id)
+        unwatched = [
+            details[item_id] for item_id, _ in candidates
+            if item_id in details and not details[item_id].get('UserData', {}).get('Played')
+        ]
+        if not unwatched:
+            return None, "Ai vizionat deja toate titlurile asemănătoare."
+        item = random.choice(unwatched[:3])
+        return item, [watched[item_id] for item_id in recent[:3] if watched[item_id]]
+
     @commands.group(name="recomanda", invoke_without_command=True)
-    async def recomanda_group(self, ctx):
-        """Comenzi pentru recomandări de pe Jellyfin"""
-        await ctx.send("Folosește `.recomanda anime` sau `.recomanda porn` pentru a primi o recomandare!")
-
-    @recomanda_group.command(name="anime")
-    async def recomanda_anime(self, ctx):
-        """Generează manual o recomandare aleatorie de anime"""
-        settings = await self.config.guild(ctx.guild).anime.all()
-        if not all(k in settings and settings[k] for k in ['base_url', 'api_key']):
+    @commands.guild_only()
+    async def recomanda_group(self, ctx, name: str = None):
+        """Recomandare aleatorie dintr-o categorie (ex: `.recomanda anime`)"""
+        categories = await self.config.guild(ctx.guild).categories()
+        if not name:
+            available = ", ".join(f"`{n}`" for n in categories) or "niciuna"
+            return await ctx.send(
+                f"Folosește `.recomanda <categorie>` pentru a primi o recomandare (categorii: {available}), "
+                "sau `.recomanda pentrumine [categorie]` pentru una pe baza a ce ai vizionat!"
+            )
+
+        name = name.lower()
+        if name not in categories:
+            return await ctx.send(f"❌ Categoria `{name}` nu există.")
+        settings = self._category(categories[name])
+        if not all(settings.get(k) for k in ['base_url', 'api_key']):
             help_msg = (
-                "⚠️ Configurarea anime nu este completă. Folosește următoarele comenzi:\n\n"
-                f"`{ctx.prefix}animerecseturl <URL>` - Setează URL-ul serverului\n"
-                f"`{ctx.prefix}animerecsetapi <API_KEY>` - Setează cheia API Jellyfin\n"
-                f"`{ctx.prefix}animerecsettmdbapi <API_KEY>` - Setează cheia API TMDb (opțional)\n"
-                f"`{ctx.prefix}setanimerecommendationchannel <#CANAL>` - Setează canalul\n\n"
-                f"Verifică setările: `{ctx.prefix}showanimesecsettings`"
+                f"⚠️ Configurarea {name} nu este completă. Folosește următoarele comenzi:\n\n"
+                f"`{ctx.prefix}reccat url {name} <URL>` - Setează URL-ul serverului\n"
+                f"`{ctx.prefix}reccat api {name} <API_KEY>` - Setează cheia API Jellyfin\n"
+                f"`{ctx.prefix}reccat tmdb {name} <API_KEY>` - Setează cheia API TMDb (opțional)\n"
+                f"`{ctx.prefix}reccat channel {name} <#CANAL>` - Setează canalul\n\n"
+                f"Verifică setările: `{ctx.prefix}reccat show {name}`"
             )
             return await ctx.send(help_msg)
 
-        await self._send_manual_recommendation(ctx, settings, 'anime')
+        await self._send_manual_recommendation(ctx, settings, name)
 
-    @recomanda_group.command(name="porn")
-    async def recomanda_porn(self, ctx):
-        """Generează manual o recomandare aleatorie de porn"""
-        settings = await self.config.guild(ctx.guild).porn.all()
-        if not all(k in settings and settings[k] for k in ['base_url', 'api_key']):
-            help_msg = (
-                "⚠️ Configurarea porn nu este completă. Folosește următoarele comenzi:\n\n"
-                f"`{ctx.prefix}pornrecseturl <URL>` - Setează URL-ul serverului\n"
-                f"`{ctx.prefix}pornrecsetapi <API_KEY>` - Setează cheia API Jellyfin\n"
-                f"`{ctx.prefix}pornrecsettmdbapi <API_KEY>` - Setează cheia API TMDb (opțional)\n"
-                f"`{ctx.prefix}setpornrecommendationchannel <#CANAL>` - Setează canalul\n\n"
-                f"Verifică setările: `{ctx.prefix}showpornrecsettings`"
+    async def _personal_category(self, ctx, name):
+        """Categoria cerută (sau prima configurată); None, după un mesaj de eroare, dacă nu există"""
+        categories = await self.config.guild(ctx.guild).categories()
+        if name is None and categories:
+            name = next(iter(categories))
+        name = (name or "").lower()
+        if name not in categories:
+            await ctx.send(f"❌ Categoria `{name}` nu există." if name else "❌ Nu există nicio categorie configurată.")
+            return None, None
+        return name, self._category(categories[name])
+
+    @recomanda_group.command(name="pentrumine")
+    async def recomanda_pentrumine(self, ctx, name: str = None):
+        """Recomandă un titlu nevizionat, asemănător cu ce ai văzut recent pe Jellyfin"""
+        name, settings = await self._personal_category(ctx, name)
+        if not name:
+            return
+        if not all(settings.get(k) for k in ['base_url', 'api_key']):
+            return await ctx.send(f"⚠️ Configurarea {name} nu este completă.")
+
+        user = await self._find_jellyfin_user(ctx.author, name, settings['base_url'], settings['api_key'])
+        if not user:
+            return await ctx.send(
+                "❌ Nu am găsit contul tău Jellyfin. "
+                f"Leagă-l cu `{ctx.prefix}recomanda cont {name} <nume_jellyfin> <parola>`."
             )
-            return await ctx.send(help_msg)
 
-        await self._send_manual_recommendation(ctx, settings, 'porn')
+        waiting_msg = await ctx.send("Se caută o recomandare pentru tine... Așteptați vă rog.")
+        try:
+            item, reason = await self.get_personal_recommendation(
+                settings['base_url'], settings['api_key'], user['Id'], library_id=settings.get('library_id')
+            )
+            if not item:
+                await waiting_msg.delete()
+                return await ctx.send(f"Nu s-a putut genera o recomandare: {reason}")
+
+            embed = await self._build_embed(settings, name, item)
+            if reason:
+                embed.insert_field_at(0, name="Pentru că ai vizionat", value=", ".join(reason)[:1024], inline=False)
+            await waiting_msg.delete()
+            # Recomandarea dezvăluie istoricul de vizionare, deci merge doar în privat
+            try:
+                await ctx.author.send(embed=embed)
+            except discord.Forbidden:
+                return await ctx.send("❌ Nu îți pot trimite mesaje private. Activează mesajele directe și încearcă din nou.")
+            await ctx.send("✅ Ți-am trimis recomandarea în privat.")
+        except Exception as e:
+            await waiting_msg.delete()
+            await ctx.send(f"A apărut o eroare în generarea recomandării: {e}")
+
+    @recomanda_group.command(name="cont")
+    async def recomanda_cont(self, ctx, name: str, username: str = None, *, password: str = None):
+        """Leagă (sau șterge, fără nume) contul tău Jellyfin pentru `recomanda pentrumine`
+
+        Legătura este verificată cu parola contului; mesajul cu parola este șters.
+        """
+        # Șterge mesajul original pentru securitate (conține parola)
+        try:
+            await ctx.message.delete()
+        except discord.Forbidden:
+            pass
+
+        name, settings = await self._personal_category(ctx, name)
+        if not name:
+            return
+
+        if not username:
+            async with self.config.member(ctx.author).jellyfin_accounts() as accounts:
+                accounts.pop(name, None)
+            return await ctx.send(f"✅ Legătura cu contul tău Jellyfin pentru {name} a fost ștearsă.")
+
+        if password is None:
+            return await ctx.send(f"❌ Folosește `{ctx.prefix}recomanda cont {name} <nume_jellyfin> <parola>`.")
+        if not settings.get('base_url'):
+            return await ctx.send(f"⚠️ Configurarea {name} nu este completă.")
+
+        user = await self._authenticate_jellyfin(settings['base_url'], username, password)
+        if not user or not user.get('Id'):
+            return await ctx.send("❌ Numele sau parola contului Jellyfin nu sunt corecte.")
+        async with self.config.member(ctx.author).jellyfin_accounts() as accounts:
+            accounts[name] = {'id': user['Id'], 'name': user.get('Name', username)}
+        await ctx.send(f"✅ Contul tău Jellyfin pentru {name} a fost legat: **{user.get('Name', username)}**")
+
+    # ===== REZERVĂ DE RECOMANDĂRI PREGĂTITE =====
+    @staticmethod
+    def _pool_fingerprint(settings):
+        """Setările care schimbă conținutul embed-ului; o rezervă pregătită cu alte setări este aruncată"""
+        return tuple(
+            settings.get(k) for k in ('base_url', 'api_key', 'library_id', 'source', 'tmdb_api_key', 'server_name', 'color')
+        )
+
+    def _current_pool(self, key, settings):
+        """Rezerva categoriei pentru setările date; una pregătită cu alte setări este aruncată"""
+        fingerprint = self._pool_fingerprint(settings)
+        pool = self._pools.get(key)
+        if pool is None or pool[0] != fingerprint:
+            if pool is not None:
+                self._release_pool(key, pool)
+                # Umplerea pornită cu setările vechi s-ar opri abia după recomandarea în lucru
+                task = self._pool_tasks.pop(key, None)
+                if task:
+                    task.cancel()
+            pool = self._pools[key] = (fingerprint, deque())
+        return pool
+
+    def _warm_pool(self, guild_id, name, settings):
+        """Pornește umplerea rezervei unei categorii configurate, fără a aștepta o comandă"""
+        if not all(settings.get(k) for k in ('base_url', 'api_key')):
+            return
+        key = (guild_id, name)
+        pool = self._current_pool(key, settings)
+        if len(pool[1]) < self.POOL_LOW_WATER:
+            task = self._pool_tasks.get(key)
+            if task is None or task.done():
+                self._pool_tasks[key] = asyncio.ensure_future(self._refill_pool(key, settings))
+
+    async def _warm_pools(self):
+        """Umple rezervele tuturor categoriilor configurate (la load/reload)"""
+        try:
+            all_guilds = await self.config.all_guilds()
+        except Exception as e:
+            print(f"Eroare la pregătirea rezervelor de recomandări: {e}")
+            return
+        for guild_id, settings in all_guilds.items():
+            for name, stored in (settings.get('categories') or {}).items():
+                self._warm_pool(guild_id, name, self._category(stored))
+
+    def _take_prefetched(self, guild_id, name, settings):
+        """Scoate o recomandare gata pregătită din rezerva categoriei (sau None) și o reumple la nevoie"""
+        key = (guild_id, name)
+        entries = self._current_pool(key, settings)[1]
+        # Titlurile pregătite de prea mult timp ar putea să nu mai existe pe server
+        while entries and time.time() - entries[0][0] > self.POOL_MAX_AGE:
+            self._release(guild_id, name, entries.popleft()[2])
+        embed = None
+        if entries:
+            _, embed, item_id = entries.popleft()
+            self._mark_served(guild_id, name, item_id)
+
+        self._warm_pool(guild_id, name, settings)
+        return embed
+
+    async def _refill_pool(self, key, settings):
+        """Pregătește recomandări în fundal până când rezerva ajunge la POOL_SIZE"""
+        guild_id, name = key
+        fingerprint = self._pool_fingerprint(settings)
+        failures = 0
+        while failures < 3:
+            pool = self._pools.get(key)
+            if pool is None or pool[0] != fingerprint or len(pool[1]) >= self.POOL_SIZE:
+                return
+            try:
+                # Titlul ales intră în istoric abia când recomandarea este servită
+                reserved = await self._bounded(self._reserve_recommendation(settings, name, guild_id))
+            except Exception as e:
+                print(f"Eroare la pregătirea în avans a unei recomandări {name}: {e}")
+                reserved = None
+            if reserved is None:
+                failures += 1
+                continue
+            if self._pools.get(key) is not pool:
+                # Rezerva a fost aruncată între timp
+                self._release(guild_id, name, reserved[1])
+                return
+            pool[1].append((time.time(), *reserved))
+
+    def _release_pool(self, key, pool):
+        """Pune înapoi în sac titlurile unei rezerve aruncate"""
+        for entry in pool[1]:
+            self._release(*key, entry[2])
+        pool[1].clear()
+
+    def _drop_pool(self, guild_id, name):
+        pool = self._pools.pop((guild_id, name), None)
+        if pool is not None:
+            self._release_pool((guild_id, name), pool)
+        task = self._pool_tasks.pop((guild_id, name), None)
+        if task:
+            task.cancel()
+
+    async def _send_manual_recommendation(self, ctx, settings, name):
+        """Helper method to send manual recommendation (instantly, when one was prepared in advance)"""
+        embed = self._take_prefetched(ctx.guild.id, name, settings)
+        if embed is not None:
+            return await ctx.send(embed=embed)
 
-    async def _send_manual_recommendation(self, ctx, settings, media_type):
-        """Helper method to send manual recommendation"""
         waiting_msg = await ctx.send("Se caută o recomandare... Așteptați vă rog.")
 
         try:
-            item = await self.get_random_recommendation(settings['base_url'], settings['api_key'])
-            if not item:
+            embed = await self.prepare_recommendation(settings, name, ctx.guild.id)
+            if not embed:
                 await waiting_msg.delete()
                 return await ctx.send("Nu s-a putut genera o recomandare.")
 
-            title = item.get('Name', 'Titlu necunoscut')
-            year = item.get('ProductionYear', 'An necunoscut')
-            is_movie = item.get('Type') == "Movie"
-            item_id = item.get('Id')
-            
-            media_display = "Film" if is_movie else "Serial"
-            overview = None
-            poster_url = None
-            
-            # Pentru anime, folosește TMDb
-            if media_type == 'anime':
-                tmdb_data = None
-                if settings.get('tmdb_api_key'):
-                    tmdb_data = await self.search_tmdb(title, year, is_movie, settings['tmdb_api_key'])
-                
-                if tmdb_data and tmdb_data.get('overview'):
-                    overview = tmdb_data['overview']
-                    overview = await self.translate_to_romanian(overview)
-                
-                if tmdb_data and tmdb_data.get('poster_path'):
-                    poster_url = f"{self.poster_base_url}{tmdb_data['poster_path']}"
-            
-            # Pentru porn, folosește datele din Jellyfin
-            else:
-                # Încearcă să obții detalii complete din Jellyfin
-                full_item = await self.get_item_details(settings['base_url'], settings['api_key'], item_id)
-                
-                if full_item:
-                    # Încearcă mai multe câmpuri pentru descriere
-                    overview = (
-                        full_item.get('Overview') or 
-                        full_item.get('Summary') or 
-                        full_item.get('Plot') or
-                        full_item.get('Description') or
-                        item.get('Overview') or
-                        item.get('Summary')
-                    )
-                else:
-                    # Fallback la datele inițiale
-                    overview = item.get('Overview') or item.get('Summary')
-                
-                # Traduce descrierea din Jellyfin
-                if overview and overview.strip():
-                    overview = await self.translate_to_romanian(overview)
-                else:
-                    overview = 'Fără descriere disponibilă.'
-                
-                # Folosește posterul din Jellyfin
-                if item_id and item.get('ImageTags', {}).get('Primary'):
-                    poster_url = f"{settings['base_url']}/Items/{item_id}/Images/Primary?api_key={settings['api_key']}"
-            
-            if not overview or overview.strip() == '':
-                overview = 'Fără descriere disponibilă.'
-                
-            if len(overview) > 1000:
-                overview = overview[:997] + "..."
-
-            color = discord.Color.blue() if media_type == 'anime' else discord.Color.red()
-            embed = discord.Embed(
-                title=f"{title} ({year})",
-                description=overview,
-                color=color
-            )
-            
-            if poster_url:
-                embed.set_thumbnail(url=poster_url)
-            
-            embed.add_field(name="Tip", value=media_display, inline=True)
-            
-            if genres := item.get('Genres', [])[:3]:
-                embed.add_field(name="Genuri", value=", ".join(genres), inline=True)
-            
-            if community_rating := item.get('CommunityRating'):
-                embed.add_field(name="Rating", value=f"⭐ {community_rating:.1f}", inline=True)
-
-            if item_id:
-                web_url = f"{settings['base_url']}/web/index.html#!/details?id={item_id}"
-                server_name = settings.get('server_name', 'Freia [SERVER 2]')
-                embed.add_field(name="Vizionare Online:", value=f"[{server_name}]({web_url})", inline=False)
-
-            embed.add_field(name="*Notă:*", value=f"*Descriere tradusă automat din engleză folosind deep_translate.*", inline=False)
-                
-            cmd_text = f"`.recomanda {media_type}`"
-            embed.add_field(name="Caută mai multe recomandări:", value=f"Folosește comanda {cmd_text} pentru a primi o recomandare personalizată oricând dorești!", inline=False)
-
             await waiting_msg.delete()
             await ctx.send(embed=embed)
         except Exception as e:
@@ -0,0 +1,124 @@
+import itertools
+import json
+import os
+import random
+import time
+from array import array
+
+_versions = itertools.count(1)
+
+
+# Câți oameni (actori, regizori...) intră în trăsăturile unui titlu; distribuțiile lungi nu contează
+MAX_PEOPLE = 10
+
+
+class CatalogSnapshot:
+    """Item Ids of a Jellyfin library with compact rating, genre and feature columns.
+
+    Ratings live in a float array; genres and content features (genres, tags,
+    studios, people, as "g:", "t:", "s:" and "p:" prefixed names) are small tuples
+    of indexes into `genre_names` / `feature_names`, so a library of tens of
+    thousands of titles stays small.
+    """
+
+    def __init__(self, items):
+        self.ids = []
+        self.ratings = array('f')
+        self.genres = []
+        self.features = []
+        genre_index = {}
+        feature_index = {}
+        for item in items:
+            if not item.get('Id'):
+                continue
+            self.ids.append(item['Id'])
+            self.ratings.append(float(item.get('CommunityRating') or 0))
+            self.genres.append(tuple(genre_index.setdefault(g, len(genre_index)) for g in item.get('Genres') or ()))
+            names = self._feature_names(item)
+            self.features.append(tuple(sorted({feature_index.setdefault(n, len(feature_index)) for n in names})))
+        self.genre_names = list(genre_index)
+        self.feature_names = list(feature_index)
+        self.created = time.time()
+        self.version = next(_versions)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _feature_names(item):
+        names = [f"g:{g}" for g in item.get('Genres') or ()]
+        names += [f"t:{t}" for t in item.get('Tags') or ()]
+        names += [f"s:{s['Name']}" for s in item.get('Studios') or () if s.get('Name')]
+        names += [f"p:{p['Name']}" for p in (item.get('People') or ())[:MAX_PEOPLE] if p.get('Name')]
+        return names
+
+    def item_features(self, index):
+        """Feature names of the item at `index`"""
+        return frozenset(self.feature_names[f] for f in self.features[index])
+
+
+class ShuffleBag:
+    """Weighted shuffle-bag over a snapshot with a persisted history of recommended Ids.
+
+    The bag holds every title not yet recommended, in a random order biased towards
+    better-rated titles; drawing pops from it in O(1). Nothing repeats until the pool
+    is exhausted, after which the history starts over. A drawn Id only enters the
+    history on commit(); release() puts an unused one back in the bag.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.history = []
+        self._bag = []
+        self._drawn = set()
+        self._version = None
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.history = json.load(f).get('history', [])
+
+    @staticmethod
+    def _weight(rating):
+        # Rating 0-10 -> pondere 1-2: titlurile bine cotate apar mai devreme, dar toate apar
+        return 1.0 + min(max(rating, 0.0), 10.0) / 10.0
+
+    def _rebuild(self, snapshot):
+        # Titlurile extrase dar încă nerecomandate nu intră în sac de două ori
+        recommended = set(self.history) | self._drawn
+        pool = [i for i, item_id in enumerate(snapshot.ids) if item_id not in recommended]
+        if not pool:
+            # Toate titlurile au fost recomandate: o luăm de la capăt, fără a repeta ultimul
+            self.history = self.history[-1:]
+            recommended = set(self.history) | self._drawn
+            pool = [i for i, item_id in enumerate(snapshot.ids) if item_id not in recommended]
+        # Amestecare ponderată (Efraimidis–Spirakis): cheie u^(1/w); pop() ia cheia cea mai mare
+        keys = {i: random.random() ** (1.0 / self._weight(snapshot.ratings[i])) for i in pool}
+        self._bag = [snapshot.ids[i] for i in sorted(pool, key=keys.__getitem__)]
+        self._version = snapshot.version
+
+    def draw(self, snapshot):
+        """Next Id to recommend, or None for an empty library; call commit() once it is used"""
+        if self._version != snapshot.version or not self._bag:
+            self._rebuild(snapshot)
+        if not self._bag:
+            return None
+        item_id = self._bag.pop()
+        self._drawn.add(item_id)
+        return item_id
+
+    def release(self, item_id):
+        """Put back a drawn Id that was never recommended; it is drawn again after the rest of the bag"""
+        if item_id in self._drawn:
+            self._drawn.discard(item_id)
+            self._bag.insert(0, item_id)
+
+    def skip(self, item_id):
+        """Forget a drawn Id that no longer exists; it comes back only if a new snapshot has it"""
+        self._drawn.discard(item_id)
+
+    def commit(self, item_id):
+        self._drawn.discard(item_id)
+        self.history.append(item_id)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'history': self.history}, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,231 @@
+import math
+import time
+from collections import Counter
+
+import numpy as np
+
+
+class SimilarityIndex:
+    """Item-item cosine similarity over the content features of a catalog snapshot.
+
+    Items are TF-IDF weighted, L2-normalised rows of a sparse (CSR) feature matrix;
+    for every item the `K` most similar items are precomputed, so serving a
+    recommendation only merges a few neighbour lists. `build()` returns a new
+    index: a full rebuild when there is no previous one or the catalog changed a
+    lot, otherwise only the added and changed items are computed and merged into
+    the existing neighbour lists. The previous index is never modified, so it can
+    keep serving while the next one is built in a worker thread.
+    """
+
+    K = 50
+    # Ponderea fiecărui tip de trăsătură (prefixele din CatalogSnapshot)
+    GROUP_WEIGHTS = {'g': 1.0, 't': 0.8, 's': 0.6, 'p': 0.6}
+    # Reconstrucție completă peste această proporție de titluri schimbate / rânduri moarte
+    REBUILD_FRACTION = 0.2
+    # IDF-ul este recalculat cel puțin o dată pe săptămână
+    REBUILD_AGE = 7 * 86400
+
+    def __init__(self):
+        self.ids = []
+        self.row_of = {}
+        self.item_features = []
+        self.alive = np.zeros(0, dtype=bool)
+        self.vocab = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0, dtype=np.float32)
+        self.neighbours = np.full((0, self.K), -1, dtype=np.int32)
+        self.scores = np.zeros((0, self.K), dtype=np.float32)
+        self.built = 0.0
+        self.version = None
+
+    def __len__(self):
+        return len(self.row_of)
+
+    @classmethod
+    def build(cls, snapshot, previous=None):
+        """Index for `snapshot`, reusing `previous` when only a few items changed"""
+        features = {item_id: snapshot.item_features(i) for i, item_id in enumerate(snapshot.ids)}
+        if previous is not None and previous.row_of and time.time() - previous.built < cls.REBUILD_AGE:
+            index = previous._incremental(features)
+            if index is not None:
+                index.version = snapshot.version
+                return index
+        index = cls()
+        index._full(features)
+        index.version = snapshot.version
+        return index
+
+    # ===== CONSTRUCȚIE =====
+    def _weight(self, name, df, total):
+        return (math.log((1 + total) / (1 + df)) + 1) * self.GROUP_WEIGHTS.get(name[0], 1.0)
+
+    def _full(self, features):
+        self.ids = list(features)
+        self.row_of = {item_id: row for row, item_id in enumerate(self.ids)}
+        self.item_features = [features[item_id] for item_id in self.ids]
+        self.alive = np.ones(len(self.ids), dtype=bool)
+
+        df = Counter(name for names in self.item_features for name in names)
+        self.vocab = {name: col for col, name in enumerate(df)}
+        self.idf = np.array([self._weight(name, count, len(self.ids)) for name, count in df.items()], dtype=np.float32)
+
+        self.indptr, self.indices, self.data = self._rows(self.item_features)
+        self.neighbours = np.full((len(self.ids), self.K), -1, dtype=np.int32)
+        self.scores = np.zeros((len(self.ids), self.K), dtype=np.float32)
+        postings = self._postings()
+        for row in range(len(self.ids)):
+            self._set_top_k(row, self._similarities(row, postings))
+        self.built = time.time()
+
+    def _incremental(self, features):
+        """Copy of this index with `features` applied, or None when a full rebuild is due"""
+        removed = [item_id for item_id in self.row_of if item_id not in features]
+        changed = [item_id for item_id, names in features.items()
+                   if item_id in self.row_of and self.item_features[self.row_of[item_id]] != names]
+        added = [item_id for item_id in features if item_id not in self.row_of]
+        dead_rows = len(self.ids) - len(self.row_of) + len(removed) + len(changed)
+        if (len(removed) + len(changed) + len(added) > self.REBUILD_FRACTION * max(len(self.row_of), 1)
+                or dead_rows > self.REBUILD_FRACTION * (len(self.ids) + len(changed) + len(added))):
+            return None
+
+        index = SimilarityIndex()
+        index.built = self.built
+        index.ids = list(self.ids)
+        index.row_of = dict(self.row_of)
+        index.item_features = list(self.item_features)
+        index.alive = self.alive.copy()
+        index.vocab = dict(self.vocab)
+        index.idf = self.idf
+        for item_id in removed + changed:
+            index.alive[index.row_of.pop(item_id)] = False
+
+        new_ids = changed + added
+        if not new_ids:
+            index.indptr, index.indices, index.data = self.indptr, self.indices, self.data
+            index.neighbours, index.scores = self.neighbours, self.scores
+            return index
+
+        # Trăsăturile necunoscute primesc IDF-ul unei trăsături rare, până la următoarea reconstrucție
+        new_names = [name for item_id in new_ids for name in features[item_id] if name not in index.vocab]
+        for name in dict.fromkeys(new_names):
+            index.vocab[name] = len(index.vocab)
+        index.idf = np.concatenate([
+            self.idf,
+            np.array([self._weight(name, 1, len(features)) for name in dict.fromkeys(new_names)], dtype=np.float32),
+        ])
+
+        first_new = len(index.ids)
+        for item_id in new_ids:
+            index.row_of[item_id] = len(index.ids)
+            index.ids.append(item_id)
+            index.item_features.append(features[item_id])
+        index.alive = np.concatenate([index.alive, np.ones(len(new_ids), dtype=bool)])
+
+        indptr, indices, data = index._rows(index.item_features[first_new:])
+        index.indptr = np.concatenate([self.indptr, indptr[1:] + self.indptr[-1]])
+        index.indices = np.concatenate([self.indices, indices])
+        index.data = np.concatenate([self.data, data])
+        index.neighbours = np.concatenate([self.neighbours, np.full((len(new_ids), self.K), -1, dtype=np.int32)])
+        index.scores = np.concatenate([self.scores, np.zeros((len(new_ids), self.K), dtype=np.float32)])
+
+        postings = index._postings()
+        for row in range(first_new, len(index.ids)):
+            sims = index._similarities(row, postings)
+            index._set_top_k(row, sims)
+            # Titlul nou intră în listele vecinilor mai vechi pentru care este mai bun decât ultimul
+            for other in np.nonzero(sims[:first_new] > index.scores[:first_new, -1])[0]:
+                index._insert_neighbour(other, row, sims[other])
+        return index
+
+    def _rows(self, feature_sets):
+        """CSR arrays of L2-normalised TF-IDF rows for the given feature sets"""
+        indptr = np.zeros(len(feature_sets) + 1, dtype=np.int64)
+        indices = []
+        for i, names in enumerate(feature_sets):
+            cols = sorted(self.vocab[name] for name in names)
+            indices.extend(cols)
+            indptr[i + 1] = len(indices)
+        indices = np.array(indices, dtype=np.int32)
+        data = self.idf[indices] if len(indices) else np.zeros(0, dtype=np.float32)
+        lengths = np.diff(indptr)
+        if len(indices):
+            norms = np.sqrt(np.add.reduceat(data ** 2, indptr[:-1][lengths > 0]))
+            data = data / np.repeat(norms, lengths[lengths > 0])
+        return indptr, indices, data.astype(np.float32)
+
+    def _postings(self):
+        """The same matrix by column (CSC): for every feature, the rows that have it"""
+        order = np.argsort(self.indices, kind='stable')
+        rows = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int32), np.diff(self.indptr))
+        colptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=len(self.vocab)), out=colptr[1:])
+        return colptr, rows[order], self.data[order]
+
+    def _similarities(self, row, postings):
+        """Cosine similarity of `row` with every row (0 for itself and dead rows)"""
+        colptr, post_rows, post_data = postings
+        start, end = self.indptr[row], self.indptr[row + 1]
+        cols, weights = self.indices[start:end], self.data[start:end]
+        sims = np.zeros(len(self.ids), dtype=np.float32)
+        if not len(cols):
+            return sims
+        spans = [np.arange(colptr[c], colptr[c + 1]) for c in cols]
+        lengths = np.array([len(span) for span in spans])
+        positions = np.concatenate(spans)
+        sims = np.bincount(
+            post_rows[positions],
+            weights=post_data[positions] * np.repeat(weights, lengths),
+            minlength=len(self.ids),
+        ).astype(np.float32)
+        sims[row] = 0
+        sims[~self.alive] = 0
+        return sims
+
+    def _set_top_k(self, row, sims):
+        count = min(self.K, int(np.count_nonzero(sims > 0)))
+        if not count:
+            return
+        top = np.argpartition(-sims, count - 1)[:count]
+        top = top[np.argsort(-sims[top], kind='stable')]
+        self.neighbours[row, :count] = top
+        self.scores[row, :count] = sims[top]
+
+    def _insert_neighbour(self, row, neighbour, score):
+        position = int(np.searchsorted(-self.scores[row], -score, side='right'))
+        self.neighbours[row, position + 1:] = self.neighbours[row, position:-1].copy()
+        self.scores[row, position + 1:] = self.scores[row, position:-1].copy()
+        self.neighbours[row, position] = neighbour
+        self.scores[row, position] = score
+
+    # ===== SERVIRE =====
+    def recommend(self, seeds, exclude=(), limit=10):
+        """Items most similar to the weighted seeds ({Id: weight}), excluding `exclude`.
+
+        Returns a list of (Id, score), best first.
+        """
+        rows = [(self.row_of[item_id], weight) for item_id, weight in seeds.items() if item_id in self.row_of]
+        if not rows:
+            return []
+        candidates = np.concatenate([self.neighbours[row] for row, _ in rows])
+        scores = np.concatenate([self.scores[row] * weight for row, weight in rows])
+        valid = candidates >= 0
+        candidates, scores = candidates[valid], scores[valid]
+        valid = self.alive[candidates]
+        candidates, scores = candidates[valid], scores[valid]
+        if not len(candidates):
+            return []
+
+        unique, inverse = np.unique(candidates, return_inverse=True)
+        totals = np.bincount(inverse, weights=scores)
+        skip = {self.row_of[item_id] for item_id in set(exclude) | set(seeds) if item_id in self.row_of}
+        order = np.argsort(-totals, kind='stable')
+        result = []
+        for i in order:
+            if unique[i] in skip:
+                continue
+            result.append((self.ids[unique[i]], float(totals[i])))
+            if len(result) >= limit:
+                break
+        return result
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import itertools
+import sqlite3
+import time
+
+from redbot.core.data_manager import cog_data_path
+
+# Același director pentru toate cogurile Jellyfin: o descriere tradusă de un cog
+# este refolosită de celălalt (JellyfinNewContent și JellyfinRecommendation).
+CACHE_NAME = "JellyfinTranslationCache"
+
+
+class TranslationCache:
+    """On-disk translation cache keyed by a hash of (target language, text).
+
+    Entries are evicted least-recently-used once the table grows past `max_entries`.
+    Concurrent requests for the same text share a single backend call.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._inflight = {}
+        self._writes = 0
+
+        path = cog_data_path(raw_name=CACHE_NAME) / "translations.sqlite3"
+        self._db = sqlite3.connect(str(path), timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " key TEXT PRIMARY KEY,"
+                " target TEXT NOT NULL,"
+                " translated TEXT NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations(last_used)"
+            )
+
+    @staticmethod
+    def make_key(text, target):
+        return hashlib.sha256(f"{target}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, text, target):
+        """Return the cached translation, or None"""
+        key = self.make_key(text, target)
+        row = self._db.execute("SELECT translated FROM translations WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self._db:
+            self._db.execute("UPDATE translations SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, text, target, translated):
+        key = self.make_key(text, target)
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations (key, target, translated, last_used) VALUES (?, ?, ?, ?)",
+                (key, target, translated, time.time()),
+            )
+        self._writes += 1
+        # Evacuarea rulează periodic, nu la fiecare scriere
+        if self._writes % 100 == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop the least recently used entries beyond max_entries"""
+        with self._db:
+            self._db.execute(
+                "DELETE FROM translations WHERE key IN ("
+                " SELECT key FROM translations ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    async def translate(self, text, target, translate_fn):
+        """Return a cached translation or translate once via `translate_fn(text)`.
+
+        `translate_fn` is a coroutine function returning the translation, or None on
+        failure (failures are not cached).
+        """
+        cached = self.get(text, target)
+        if cached is not None:
+            return cached
+
+        key = self.make_key(text, target)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._translate_and_store(text, target, translate_fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: anularea unui apelant nu anulează traducerea așteptată de ceilalți
+        return await asyncio.shield(task)
+
+    async def translate_many(self, texts, target, translate_batch_fn):
+        """Return one translation per text (None where translation failed), in order.
+
+        Cache misses nobody is translating yet are passed together to
+        `translate_batch_fn(texts)`, a coroutine function returning one translation (or None)
+        per text. Texts already being translated, by `translate` or by another batch, are
+        awaited instead, so concurrent callers never send the same text twice.
+        """
+        loop = asyncio.get_event_loop()
+        results = {}
+        waiting = {}
+        owned = {}
+        for text in dict.fromkeys(texts):
+            cached = self.get(text, target)
+            if cached is not None:
+                results[text] = cached
+                continue
+            key = self.make_key(text, target)
+            task = self._inflight.get(key)
+            if task is None:
+                task = owned[text] = loop.create_future()
+                self._inflight[key] = task
+                task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+            waiting[text] = task
+
+        if owned:
+            # Lotul rulează separat: anularea apelantului nu lasă fără rezultat pe ceilalți
+            asyncio.ensure_future(self._translate_batch_and_store(owned, target, translate_batch_fn))
+        for text, task in waiting.items():
+            results[text] = await asyncio.shield(task)
+        return [results.get(text) for text in texts]
+
+    async def _translate_batch_and_store(self, owned, target, translate_batch_fn):
+        translated = []
+        try:
+            translated = await translate_batch_fn(list(owned))
+        except Exception:
+            # Textele rămân netraduse (None); eșecurile nu sunt păstrate în cache
+            pass
+        finally:
+            for (text, future), result in itertools.zip_longest(owned.items(), translated):
+                if result:
+                    self.put(text, target, result)
+                if not future.done():
+                    future.set_result(result)
+
+    async def _translate_and_store(self, text, target, translate_fn):
+        translated = await translate_fn(text)
+        if translated:
+            self.put(text, target, translated)
+        return translated
+
+    def close(self):
+        self.evict()
+        self._db.close()
@@ -2,17 +2,44 @@ import asyncio
 import aiohttp
 import json
 import logging
+import time
 from typing import Dict, Any, Optional, Union, List
 from datetime import datetime, timedelta, timezone
 
 import discord
 from redbot.core import commands, Config, checks
 from redbot.core.bot import Red
+from redbot.core.data_manager import cog_data_path
 from redbot.core.utils.chat_formatting import box, pagify
 from redbot.core.utils.predicates import MessagePredicate
 
+from .tracking import TrackingStore, TrackingUnitOfWork
+
 log = logging.getLogger("red.jellyfincog")
 
+
+class _ProgressReporter:
+    """Raportează progresul unei verificări în log și prin callback, cel mult o dată la `interval` secunde"""
+
+    def __init__(self, stats: Dict[str, int], callback=None, interval: float = 5.0):
+        self.stats = stats
+        self.callback = callback
+        self.interval = interval
+        self._last = time.monotonic()
+
+    async def report(self, final: bool = False):
+        if not final and time.monotonic() - self._last < self.interval:
+            return
+        self._last = time.monotonic()
+        s = self.stats
+        log.info(f"Progres verificare: {s['checked']}/{s['total']} verificați, {s['deleted']} șterși, {s['failed']} eșuați")
+        if self.callback:
+            try:
+                await self.callback(dict(s), final)
+            except Exception as e:
+                log.warning(f"Eroare la raportarea progresului: {e}")
+
+
 class JellyfinCog(commands.Cog):
     """Cog pentru gestionarea utilizatorilor pe servere Jellyfin multiple"""
     
@@ -22,6 +49,7 @@ class JellyfinCog(commands.Cog):
         
         default_global = {
             "servers": {},
+            # Format vechi al tracking-ului, mutat în tracking.sqlite3 la primul acces (vezi _tracking)
             "users": {}  # Format: {"discord_user_id": {"server_name": {"jellyfin_username": {"data": "...", "created_at": "timestamp", "jellyfin_id": "id", "status": "active"}}}}
         }
         
@@ -38,85 +66,185 @@ class JellyfinCog(commands.Cog):
         # Task pentru verificarea zilnică
         self.cleanup_task = None
         self.bot.loop.create_task(self._start_cleanup_task())
-        
-    def cog_unload(self):
+
+        # Verificarea inactivității: conturi evaluate simultan per server, lucrători pentru ștergeri
+        self.SCAN_CONCURRENCY_PER_SERVER = 5
+        self.DELETE_WORKERS = 3
+        self.PROGRESS_INTERVAL = 5.0
+        # Activitatea din /Users la mai puțin de atâtea zile de pragul de 90 este confirmată per utilizator
+        self.ACTIVITY_MARGIN_DAYS = 3
+        # Tracking-ul este scris grupat; la un crash se pierd cel mult atâtea modificări
+        self.TRACKING_CHECKPOINT_EVERY = 25
+        self._scan_lock = asyncio.Lock()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Conturile urmărite, în SQLite; datele vechi din Config sunt mutate la primul acces
+        self._tracking_store = TrackingStore(cog_data_path(self) / "tracking.sqlite3")
+        self._tracking_migrated = False
+        self._tracking_migration_lock = asyncio.Lock()
+
+        # Ștergerea conturilor membrilor care pleacă: servere procesate simultan, ștergeri simultane per server
+        self.TEARDOWN_WORKERS = 4
+        self.TEARDOWN_CONCURRENCY_PER_SERVER = 5
+        # Token-urile admin sunt refolosite între evenimente cel mult atâtea secunde
+        self.ADMIN_TOKEN_TTL = 30 * 60
+        # Coada conține fiecare server cel mult o dată; conturile așteaptă în _teardown_pending
+        self._teardown_queue = asyncio.Queue()
+        self._teardown_pending: Dict[str, Dict[str, tuple]] = {}
+        self._teardown_scheduled = set()
+        self._teardown_workers: List[asyncio.Task] = []
+        self._admin_tokens: Dict[str, tuple] = {}
+        
+    async def cog_unload(self):
         """Oprește task-ul când cog-ul este descărcat"""
         if self.cleanup_task:
             self.cleanup_task.cancel()
+        for worker in self._teardown_workers:
+            worker.cancel()
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._tracking_store.close()
+
+    async def _tracking(self) -> TrackingStore:
+        """Store-ul conturilor urmărite; la primul apel importă tracking-ul vechi din Config"""
+        if not self._tracking_migrated:
+            async with self._tracking_migration_lock:
+                if not self._tracking_migrated:
+                    await self._migrate_tracking()
+                    self._tracking_migrated = True
+        return self._tracking_store
+
+    async def _migrate_tracking(self):
+        """Mută documentul `users` din Config în SQLite (importul poate fi reluat fără efecte)"""
+        legacy = await self.config.users()
+        if not legacy:
+            return
+        added = self._tracking_store.import_users(legacy)
+        await self.config.users.clear()
+        log.info(f"Tracking migrat în SQLite: {added} conturi ({len(legacy)} utilizatori Discord)")
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Sesiune aiohttp comună pentru toate cererile către serverele Jellyfin"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
     
     @commands.Cog.listener()
     async def on_member_remove(self, member: discord.Member):
-        """Event care se declanșează când un membru părăsește serverul Discord - șterge toate conturile Jellyfin"""
+        """Event care se declanșează când un membru părăsește serverul Discord - șterge toate conturile Jellyfin.
+
+        Conturile sunt doar puse în coada de ștergere, grupate pe server Jellyfin; ștergerile
+        rulează în fundal (vezi _teardown_worker), astfel încât un val de plecări nu blochează
+        evenimentul și fiecare server este autentificat o dată pentru tot lotul.
+        """
         try:
-            users_data = await self.config.users()
-            user_id_str = str(member.id)
+            tracking = await self._tracking()
+            accounts = tracking.accounts_for_user(member.id)
             
             # Verifică dacă utilizatorul are conturi Jellyfin
-            if user_id_str not in users_data:
+            if not accounts:
                 log.info(f"Membru {member} a părăsit serverul dar nu avea conturi Jellyfin")
                 return
             
             log.info(f"=== MEMBRU PĂRĂSEȘTE SERVERUL - ȘTERGERE CONTURI ===")
-            log.info(f"Utilizator: {member} (ID: {member.id})")
-            log.info(f"Guild: {member.guild.name}")
+            log.info(f"Utilizator: {member} (ID: {member.id}), Guild: {member.guild.name}")
             
             servers_config = await self.config.servers()
-            total_deleted = 0
-            
-            # Parcurge toate serverele Jellyfin ale utilizatorului
-            for server_name, server_users in list(users_data[user_id_str].items()):
-                if server_name not in servers_config:
-                    log.warning(f"  Server {server_name} nu mai există în config, skip")
-                    continue
-                
-                server_config = servers_config[server_name]
-                log.info(f"\n  📡 Conectare la server: {server_name}")
-                
-                # Obține token de autentificare
-                token = await self._get_jellyfin_auth_token(
-                    server_config["url"],
-                    server_config["admin_user"],
-                    server_config["admin_password"]
-                )
-                
-                if not token:
-                    log.error(f"  ❌ Nu s-a putut obține token pentru {server_name}")
-                    continue
-                
-                # Șterge fiecare utilizator Jellyfin
-                for jellyfin_username, user_info in list(server_users.items()):
-                    jellyfin_id = user_info.get("jellyfin_id")
-                    
-                    if not jellyfin_id:
-                        log.warning(f"    ⚠️ {jellyfin_username} - nu are jellyfin_id")
-                        continue
-                    
-                    log.info(f"    🗑️ Ștergere: {jellyfin_username}")
-                    
-                    # Șterge de pe serverul Jellyfin
-                    success = await self._delete_jellyfin_user(
-                        server_config["url"],
-                        token,
-                        jellyfin_id
-                    )
-                    
-                    if success:
-                        log.info(f"    ✅ {jellyfin_username} șters de pe Jellyfin")
-                        total_deleted += 1
+            queued = 0
+            with TrackingUnitOfWork(tracking) as changes:
+                for row in accounts:
+                    server_name, jellyfin_username = row["server"], row["jellyfin_username"]
+                    if server_name not in servers_config:
+                        log.warning(f"  Server {server_name} nu mai există în config, {jellyfin_username} scos din tracking")
+                        changes.remove_account(member.id, server_name, jellyfin_username)
+                    elif not row["jellyfin_id"]:
+                        log.warning(f"  ⚠️ {jellyfin_username} - nu are jellyfin_id, scos din tracking")
+                        changes.remove_account(member.id, server_name, jellyfin_username)
                     else:
-                        log.error(f"    ❌ Eșec la ștergerea lui {jellyfin_username}")
-            
-            # Șterge complet utilizatorul din tracking
-            if user_id_str in users_data:
-                del users_data[user_id_str]
-                await self.config.users.set(users_data)
-                log.info(f"\n  🗑️ Tracking șters complet pentru {member}")
+                        self._queue_teardown(server_name, (member.id, jellyfin_username, row["jellyfin_id"]))
+                        queued += 1
             
-            log.info(f"\n✅ Procesare completă: {total_deleted} conturi Jellyfin șterse")
-            log.info(f"=== FINAL ===\n")
+            log.info(f"  🗑️ {queued} conturi Jellyfin puse în coada de ștergere")
             
         except Exception as e:
             log.error(f"Eroare în on_member_remove: {e}", exc_info=True)
+
+    def _queue_teardown(self, server_name: str, account: tuple):
+        """Adaugă un cont (discord_id, username, jellyfin_id) la lotul de ștergere al serverului său"""
+        self._teardown_pending.setdefault(server_name, {})[account[2]] = account
+        if server_name not in self._teardown_scheduled:
+            self._teardown_scheduled.add(server_name)
+            self._teardown_queue.put_nowait(server_name)
+        if not self._teardown_workers:
+            self._teardown_workers = [
+                asyncio.ensure_future(self._teardown_worker()) for _ in range(self.TEARDOWN_WORKERS)
+            ]
+
+    async def _teardown_worker(self):
+        """Lucrător care șterge, server cu server, loturile de conturi ale membrilor plecați"""
+        while True:
+            server_name = await self._teardown_queue.get()
+            try:
+                # Evenimentele sosite cât timp lotul rulează se adună pentru următorul lot
+                while self._teardown_pending.get(server_name):
+                    batch = list(self._teardown_pending.pop(server_name).values())
+                    await self._teardown_server(server_name, batch)
+            except Exception as e:
+                log.error(f"Eroare la ștergerea conturilor de pe {server_name}: {e}", exc_info=True)
+            finally:
+                self._teardown_scheduled.discard(server_name)
+                if self._teardown_pending.get(server_name):
+                    self._teardown_scheduled.add(server_name)
+                    self._teardown_queue.put_nowait(server_name)
+                self._teardown_queue.task_done()
+
+    async def _teardown_server(self, server_name: str, accounts: List[tuple]):
+        """Șterge un lot de conturi de pe un server Jellyfin și le scoate din tracking"""
+        servers_config = await self.config.servers()
+        tracking = await self._tracking()
+        server_config = servers_config.get(server_name)
+        log.info(f"  📡 [{server_name}] Ștergere lot de {len(accounts)} conturi ale membrilor plecați")
+
+        if server_config is None:
+            log.warning(f"  Server {server_name} nu mai există în config, skip")
+        else:
+            token = await self._get_admin_token(server_name, server_config)
+            if not token:
+                log.error(f"  ❌ Nu s-a putut obține token pentru {server_name}")
+            else:
+                slots = asyncio.Semaphore(self.TEARDOWN_CONCURRENCY_PER_SERVER)
+
+                async def delete(account):
+                    _, jellyfin_username, jellyfin_id = account
+                    async with slots:
+                        success = await self._delete_jellyfin_user(server_config["url"], token, jellyfin_id)
+                    if success:
+                        log.info(f"    [{server_name}] ✅ {jellyfin_username} șters de pe Jellyfin")
+                    else:
+                        log.error(f"    [{server_name}] ❌ Eșec la ștergerea lui {jellyfin_username}")
+                    return success
+
+                results = await asyncio.gather(*(delete(account) for account in accounts))
+                if not all(results):
+                    # Token-ul poate fi invalid; următorul lot se autentifică din nou
+                    self._admin_tokens.pop(server_name, None)
+                log.info(f"  [{server_name}] {sum(results)}/{len(accounts)} conturi șterse")
+
+        # Membrul a plecat: conturile ies din tracking, chiar dacă ștergerea a eșuat
+        with TrackingUnitOfWork(tracking) as changes:
+            for discord_user_id, jellyfin_username, _ in accounts:
+                changes.remove_account(discord_user_id, server_name, jellyfin_username)
+
+    async def _get_admin_token(self, server_name: str, server_config: Dict[str, Any]) -> Optional[str]:
+        """Token admin refolosit între evenimente; reînnoit după ADMIN_TOKEN_TTL sau la schimbarea credențialelor"""
+        credentials = (server_config["url"], server_config["admin_user"], server_config["admin_password"])
+        cached = self._admin_tokens.get(server_name)
+        if cached and cached[0] == credentials and time.monotonic() - cached[2] < self.ADMIN_TOKEN_TTL:
+            return cached[1]
+        token = await self._get_jellyfin_auth_token(*credentials)
+        if token:
+            self._admin_tokens[server_name] = (credentials, token, time.monotonic())
+        return token
     
     async def _start_cleanup_task(self):
         """Pornește task-ul de cleanup zilnic"""
@@ -151,14 +279,14 @@ class JellyfinCog(commands.Cog):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(auth_url, json=auth_data, headers=headers, timeout=10) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return data.get("AccessToken")
-                    else:
-                        log.error(f"Autentificare eșuată pentru {server_url}: {resp.status}")
-                        return None
+            session = await self._get_session()
+            async with session.post(auth_url, json=auth_data, headers=headers, timeout=10) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    return data.get("AccessToken")
+                else:
+                    log.error(f"Autentificare eșuată pentru {server_url}: {resp.status}")
+                    return None
         except Exception as e:
             log.error(f"Eroare la autentificare {server_url}: {e}")
             return None
@@ -182,34 +310,32 @@ class JellyfinCog(commands.Cog):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                # Încearcă să obțină ultimul item vizionat
-                async with session.get(items_url, params=params, headers=headers, timeout=10) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        items = data.get("Items", [])
-                        if items and len(items) > 0:
-                            # Caută UserData pentru DateLastSaved
-                            user_data = items[0].get("UserData", {})
-                            last_played_str = user_data.get("LastPlayedDate")
-                            
-                            if last_played_str:
-                                # Convertește la datetime naive
-                                dt = datetime.fromisoformat(last_played_str.replace("Z", "+00:00"))
-                                return dt.replace(tzinfo=None)
-                
-                # Dacă nu găsim activitate de playback, verificăm când s-a creat utilizatorul
-                user_url = f"{server_url}/Users/{user_id}"
-                async with session.get(user_url, headers=headers, timeout=10) as user_resp:
-                    if user_resp.status == 200:
-                        user_info = await user_resp.json()
-                        # Folosim LastLoginDate sau LastActivityDate ca fallback
-                        last_login_str = user_info.get("LastLoginDate") or user_info.get("LastActivityDate")
-                        if last_login_str:
-                            dt = datetime.fromisoformat(last_login_str.replace("Z", "+00:00"))
-                            return dt.replace(tzinfo=None)
-                
-                return None
+            session = await self._get_session()
+            # Încearcă să obțină ultimul item vizionat
+            async with session.get(items_url, params=params, headers=headers, timeout=10) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    items = data.get("Items", [])
+                    if items and len(items) > 0:
+                        # Caută UserData pentru DateLastSaved
+                        user_data = items[0].get("UserData", {})
+                        last_played_str = user_data.get("LastPlayedDate")
+                        
+                        if last_played_str:
+                            # Convertește la datetime naive
+                            return self._parse_jellyfin_date(last_played_str)
+            
+            # Dacă nu găsim activitate de playback, verificăm când s-a creat utilizatorul
+            user_url = f"{server_url}/Users/{user_id}"
+            async with session.get(user_url, headers=headers, timeout=10) as user_resp:
+                if user_resp.status == 200:
+                    user_info = await user_resp.json()
+                    # Folosim LastLoginDate sau LastActivityDate ca fallback
+                    last_login_str = user_info.get("LastLoginDate") or user_info.get("LastActivityDate")
+                    if last_login_str:
+                        return self._parse_jellyfin_date(last_login_str)
+            
+            return None
         except Exception as e:
             log.error(f"Eroare la obținerea ultimei activități pentru user {user_id}: {e}")
             return None
@@ -221,17 +347,21 @@ class JellyfinCog(commands.Cog):
         headers = {"X-MediaBrowser-Token": token}
     
         try:
-            async with aiohttp.ClientSession() as session:
-                log.info(f"Ștergere utilizator {user_id} de la {delete_url}")
-                async with session.delete(delete_url, headers=headers, timeout=10) as resp:
-                    log.info(f"Status DELETE user: {resp.status}")
-                    if resp.status == 204 or resp.status == 200:
-                        log.info("✅ Utilizator șters cu succes")
-                        return True
-                    else:
-                        error_text = await resp.text()
-                        log.error(f"DELETE a returnat {resp.status}: {error_text}")
-                        return False
+            session = await self._get_session()
+            log.info(f"Ștergere utilizator {user_id} de la {delete_url}")
+            async with session.delete(delete_url, headers=headers, timeout=10) as resp:
+                log.info(f"Status DELETE user: {resp.status}")
+                if resp.status == 204 or resp.status == 200:
+                    log.info("✅ Utilizator șters cu succes")
+                    return True
+                elif resp.status == 404:
+                    # Deja șters (ex: ștergere făcută înainte de un crash, dar nescrisă în tracking)
+                    log.info("ℹ️ Utilizatorul nu mai există pe server, considerat șters")
+                    return True
+                else:
+                    error_text = await resp.text()
+                    log.error(f"DELETE a returnat {resp.status}: {error_text}")
+                    return False
         except Exception as e:
             log.error(f"Eroare la ștergerea utilizatorului: {e}", exc_info=True)
     
@@ -240,27 +370,15 @@ class JellyfinCog(commands.Cog):
     async def _check_and_remove_role(self, discord_user_id: int, server_name: str):
         """Verifică dacă utilizatorul mai are conturi active pe serverul Jellyfin și elimină rolul dacă nu"""
         try:
-            users_data = await self.config.users()
-            user_id_str = str(discord_user_id)
-            
-            # Verifică dacă utilizatorul există în tracking
-            if user_id_str not in users_data:
-                return
-            
-            # Verifică dacă utilizatorul are conturi pe acest server
-            if server_name not in users_data[user_id_str]:
-                return
-            
             # Verifică dacă mai are conturi ACTIVE (nu șterse) pe acest server
-            server_users = users_data[user_id_str][server_name]
-            active_users = [username for username, data in server_users.items() 
-                          if data.get("status", "active") != "deleted"]
+            tracking = await self._tracking()
+            active_count, total_count = tracking.count_active(discord_user_id, server_name)
             
             log.info(f"Verificare roluri pentru user {discord_user_id} pe {server_name}")
-            log.info(f"  Conturi active: {len(active_users)} din {len(server_users)}")
+            log.info(f"  Conturi active: {active_count} din {total_count}")
             
             # Dacă nu mai are niciun cont activ, elimină rolul din toate guild-urile
-            if len(active_users) == 0:
+            if active_count == 0:
                 log.info(f"  ⚠️ Nu mai are conturi active, eliminare rol...")
                 
                 # Găsește toate guild-urile unde este configurat acest server
@@ -297,177 +415,279 @@ class JellyfinCog(commands.Cog):
                     else:
                         log.info(f"  ℹ️ Utilizatorul nu avea rolul {role.name}")
             else:
-                log.info(f"  ✅ Mai are {len(active_users)} conturi active, păstrează rolul")
+                log.info(f"  ✅ Mai are {active_count} conturi active, păstrează rolul")
                 
         except Exception as e:
             log.error(f"Eroare în _check_and_remove_role: {e}", exc_info=True)
     
-    async def _check_inactive_users(self):
-        """Verifică utilizatorii inactivi și îi gestionează"""
-        log.info("=== ÎNCEPE VERIFICAREA INACTIVITĂȚII ===")
-        
-        servers = await self.config.servers()
-        users = await self.config.users()
-        
-        log.info(f"Servere configurate: {len(servers)}")
-        log.info(f"Utilizatori în tracking: {len(users)}")
-        
-        now = datetime.now()
-        seven_days_ago = now - timedelta(days=7)
-        ninety_days_ago = now - timedelta(days=90)
-        
-        log.info(f"Data curentă: {now}")
-        log.info(f"Limită 7 zile (utilizatori noi fără login): {seven_days_ago}")
-        log.info(f"Limită 90 zile (ștergere inactivitate): {ninety_days_ago}")
-        
-        total_checked = 0
-        total_deleted = 0
-        
-        for discord_user_id, user_servers in users.items():
-            log.info(f"\n--- Verificare utilizator Discord ID: {discord_user_id} ---")
-            
-            for server_name, server_users in user_servers.items():
-                log.info(f"  Server: {server_name}")
-                
+    async def _check_inactive_users(self, progress=None):
+        """Verifică utilizatorii inactivi și îi gestionează.
+
+        Fiecare server Jellyfin este autentificat o singură dată; conturile lui sunt evaluate
+        în paralel (cel mult SCAN_CONCURRENCY_PER_SERVER simultan), iar ștergerile trec printr-un
+        grup de DELETE_WORKERS lucrători. `progress`, dacă este dat, este o funcție async
+        apelată periodic cu contoarele verificării și, la final, cu `final=True`.
+        """
+        if self._scan_lock.locked():
+            log.warning("O verificare a inactivității rulează deja, skip")
+            return None
+
+        async with self._scan_lock:
+            log.info("=== ÎNCEPE VERIFICAREA INACTIVITĂȚII ===")
+
+            servers = await self.config.servers()
+            tracking = await self._tracking()
+
+            log.info(f"Servere configurate: {len(servers)}")
+            log.info(f"Utilizatori în tracking: {tracking.counts()[0]}")
+
+            now = datetime.now()
+            log.info(f"Data curentă: {now}")
+            log.info(f"Limită 7 zile (utilizatori noi fără login): {now - timedelta(days=7)}")
+            log.info(f"Limită 90 zile (ștergere inactivitate): {now - timedelta(days=90)}")
+
+            # Numărul conturilor urmărite per server; rândurile sunt citite pe loturi, în timpul verificării
+            counts = {}
+            for server_name, count in tracking.count_by_server().items():
                 if server_name not in servers:
                     log.warning(f"  ⚠️ Server {server_name} nu mai există în configurație, skip")
                     continue
-                
-                server_config = servers[server_name]
-                log.info(f"  Conectare la: {server_config['url']}")
-                
-                token = await self._get_jellyfin_auth_token(
-                    server_config["url"],
-                    server_config["admin_user"],
-                    server_config["admin_password"]
-                )
-                
-                if not token:
-                    log.error(f"  ❌ Nu s-a putut obține token pentru {server_name}")
-                    continue
-                
-                log.info(f"  ✅ Token obținut cu succes")
-                
-                for jellyfin_username, user_data in server_users.items():
-                    total_checked += 1
-                    jellyfin_id = user_data.get("jellyfin_id")
-                    
-                    log.info(f"\n    👤 Utilizator Jellyfin: {jellyfin_username}")
-                    log.info(f"       ID: {jellyfin_id}")
-                    
-                    if not jellyfin_id:
-                        log.warning(f"       ⚠️ Nu există jellyfin_id, skip")
-                        continue
-                    
-                    # Obține ultima activitate
-                    last_activity = await self._get_user_last_activity(
-                        server_config["url"], token, jellyfin_id
+                counts[server_name] = count
+
+            stats = {
+                "total": sum(counts.values()),
+                "checked": 0,
+                "deleted": 0,
+                "failed": 0,
+                "skipped": 0,
+                "detailed": 0,
+            }
+            reporter = _ProgressReporter(stats, progress, self.PROGRESS_INTERVAL)
+            deletions = asyncio.Queue()
+            # (discord_user_id, server) ale căror roluri se verifică după scrierea tracking-ului
+            role_checks = set()
+            with TrackingUnitOfWork(tracking, self.TRACKING_CHECKPOINT_EVERY) as changes:
+                workers = [
+                    asyncio.ensure_future(self._deletion_worker(deletions, stats, reporter, changes, role_checks))
+                    for _ in range(self.DELETE_WORKERS)
+                ]
+                scans = [
+                    asyncio.ensure_future(
+                        self._scan_server(server_name, servers[server_name], tracking, count, now, deletions, stats, reporter)
                     )
-                    
-                    if not last_activity:
-                        log.warning(f"       ⚠️ Nu s-a putut obține last_activity")
-                        # Dacă nu putem obține activitatea, folosim data creării
-                        created_at_str = user_data.get("created_at")
-                        if created_at_str:
-                            created_at = datetime.fromisoformat(created_at_str)
-                            if created_at.tzinfo is not None:
-                                created_at = created_at.replace(tzinfo=None)
-                            last_activity = created_at
-                            log.info(f"       📅 Folosim created_at ca fallback: {created_at}")
-                            
-                            # Verificăm dacă utilizatorul nu s-a conectat niciodată
-                            # Dacă last_activity == created_at, înseamnă că nu are istoric de vizionare
-                            days_since_creation = (now - created_at).days
-                            log.info(f"       📊 Zile de la creare: {days_since_creation}")
-                            
-                            # Dacă utilizatorul a fost creat acum 7+ zile și nu s-a conectat niciodată
-                            if created_at <= seven_days_ago:
-                                log.info(f"       🗑️ UTILIZATOR FĂRĂ LOGIN - Șters (>7 zile fără conectare)")
-                                
-                                success = await self._delete_jellyfin_user(
-                                    server_config["url"], token, jellyfin_id
-                                )
-                                
-                                if success:
-                                    log.info(f"       ✅ Utilizator șters cu succes (niciodată conectat)")
-                                    
-                                    # Trimite notificare specială pentru utilizatori fără login
-                                    await self._send_cleanup_notification(
-                                        server_name, jellyfin_username, discord_user_id, "deleted_no_login", created_at
-                                    )
-                                    
-                                    # Șterge complet din tracking
-                                    del users[str(discord_user_id)][server_name][jellyfin_username]
-                                    
-                                    # Dacă nu mai are utilizatori pe acest server, șterge server-ul
-                                    if not users[str(discord_user_id)][server_name]:
-                                        del users[str(discord_user_id)][server_name]
-                                    
-                                    # Dacă nu mai are niciun utilizator, șterge user-ul complet
-                                    if not users[str(discord_user_id)]:
-                                        del users[str(discord_user_id)]
-                                    
-                                    await self.config.users.set(users)
-                                    total_deleted += 1
-                                    log.info(f"       🗑️ Utilizator șters complet din tracking")
-                                    
-                                    # Verifică și elimină rolul dacă nu mai are conturi active
-                                    await self._check_and_remove_role(discord_user_id, server_name)
-                                else:
-                                    log.error(f"       ❌ Ștergerea a eșuat")
-                                continue  # Trecem la următorul utilizator
-                        else:
-                            log.error(f"       ❌ Nu există nici created_at, skip complet")
-                            continue
-                    else:
-                        log.info(f"       📅 Last activity găsit: {last_activity}")
-                    
-                    # Calculează zilele de inactivitate
-                    days_inactive = (now - last_activity).days
-                    log.info(f"       ⏰ Zile de inactivitate: {days_inactive}")
-                    
-                    # Verifică dacă trebuie șters (90+ zile)
-                    if last_activity <= ninety_days_ago:
-                        log.info(f"       🗑️ TREBUIE ȘTERS (>90 zile)")
-                        
-                        success = await self._delete_jellyfin_user(
-                            server_config["url"], token, jellyfin_id
-                        )
-                        
-                        if success:
-                            log.info(f"       ✅ Utilizator șters cu succes")
-                            
-                            # Trimite notificare
-                            await self._send_cleanup_notification(
-                                server_name, jellyfin_username, discord_user_id, "deleted", last_activity
-                            )
-                            
-                            # Șterge complet din tracking
-                            del users[str(discord_user_id)][server_name][jellyfin_username]
-                            
-                            # Dacă nu mai are utilizatori pe acest server, șterge server-ul
-                            if not users[str(discord_user_id)][server_name]:
-                                del users[str(discord_user_id)][server_name]
-                            
-                            # Dacă nu mai are niciun utilizator, șterge user-ul complet
-                            if not users[str(discord_user_id)]:
-                                del users[str(discord_user_id)]
-                            
-                            await self.config.users.set(users)
-                            total_deleted += 1
-                            log.info(f"       🗑️ Utilizator șters complet din tracking")
-                            
-                            # Verifică și elimină rolul dacă nu mai are conturi active
-                            await self._check_and_remove_role(discord_user_id, server_name)
-                        else:
-                            log.error(f"       ❌ Ștergerea a eșuat")
-                    else:
-                        log.info(f"       ✅ Nu necesită acțiuni (zile inactive: {days_inactive})")
-        
-        log.info(f"\n=== VERIFICARE COMPLETATĂ ===")
-        log.info(f"Total verificați: {total_checked}")
-        log.info(f"Total șterși: {total_deleted}")
-    
+                    for server_name, count in counts.items()
+                ]
+                try:
+                    await asyncio.gather(*scans)
+                    await deletions.join()
+                finally:
+                    # Dacă o scanare a eșuat, celelalte sunt oprite înainte de lucrători: nimic nu mai pune în coadă
+                    for scan in scans:
+                        scan.cancel()
+                    await asyncio.gather(*scans, return_exceptions=True)
+                    for worker in workers:
+                        worker.cancel()
+
+            # Verifică și elimină rolurile celor care nu mai au conturi active
+            for discord_user_id, server_name in role_checks:
+                await self._check_and_remove_role(discord_user_id, server_name)
+
+            log.info(f"\n=== VERIFICARE COMPLETATĂ ===")
+            log.info(f"Total verificați: {stats['checked']}")
+            log.info(f"Total șterși: {stats['deleted']}")
+            log.info(f"Interogări detaliate de activitate (praguri 7/90 zile): {stats['detailed']}")
+            if stats["failed"] or stats["skipped"]:
+                log.info(f"Conturi eșuate (evaluare sau ștergere): {stats['failed']}, conturi sărite (server inaccesibil): {stats['skipped']}")
+            await reporter.report(final=True)
+            return stats
+
+    async def _scan_server(self, server_name: str, server_config: Dict[str, Any], tracking: TrackingStore,
+                           count: int, now: datetime, deletions: asyncio.Queue, stats: Dict[str, int], reporter):
+        """Evaluează conturile unui server cu un singur token; conturile de șters intră în coada de ștergeri.
+
+        Conturile sunt citite din tracking pe loturi, pe măsură ce sunt evaluate.
+        """
+        log.info(f"  Server: {server_name} ({count} conturi) - conectare la: {server_config['url']}")
+
+        token = await self._get_jellyfin_auth_token(
+            server_config["url"],
+            server_config["admin_user"],
+            server_config["admin_password"]
+        )
+
+        if not token:
+            log.error(f"  ❌ Nu s-a putut obține token pentru {server_name}")
+            stats["skipped"] += count
+            await reporter.report()
+            return
+
+        log.info(f"  ✅ Token obținut cu succes pentru {server_name}")
+
+        # Ultima activitate a tuturor utilizatorilor, într-un singur apel
+        activity = await self._get_users_activity(server_config["url"], token)
+        if activity is None:
+            log.warning(f"  ⚠️ Lista /Users de pe {server_name} nu a putut fi obținută, interogare per utilizator")
+        else:
+            log.info(f"  📋 Activitate obținută pentru {len(activity)} utilizatori de pe {server_name}")
+        accounts = (
+            (row["discord_id"], row["jellyfin_username"], dict(row))
+            for row in tracking.iter_accounts(server_name)
+        )
+
+        async def evaluate():
+            # Cei SCAN_CONCURRENCY_PER_SERVER evaluatori își împart același iterator
+            for account in accounts:
+                try:
+                    decision = await self._evaluate_account(server_name, server_config, token, account, now, activity, stats)
+                except Exception as e:
+                    # Un cont cu date greșite (ex: created_at invalid) nu oprește verificarea
+                    log.error(f"    [{server_name}] ❌ Eroare la evaluarea lui {account[1]}: {e}", exc_info=True)
+                    stats["failed"] += 1
+                    decision = None
+                stats["checked"] += 1
+                if decision:
+                    await deletions.put((server_name, server_config, token, account, decision))
+                await reporter.report()
+
+        await asyncio.gather(*(evaluate() for _ in range(self.SCAN_CONCURRENCY_PER_SERVER)))
+
+    async def _evaluate_account(self, server_name: str, server_config: Dict[str, Any], token: str,
+                                account: tuple, now: datetime, activity: Optional[Dict[str, datetime]],
+                                stats: Dict[str, int]) -> Optional[tuple]:
+        """Decide ce se întâmplă cu un cont: None (păstrat) sau (acțiune, data de referință).
+
+        `activity` este harta Id -> ultima activitate obținută o dată per server din `/Users`;
+        interogarea detaliată per utilizator se face doar lângă pragurile de 7/90 de zile
+        (sau pentru toate conturile, dacă harta nu a putut fi obținută).
+        """
+        discord_user_id, jellyfin_username, user_data = account
+        jellyfin_id = user_data.get("jellyfin_id")
+        prefix = f"    [{server_name}] 👤 {jellyfin_username} (ID: {jellyfin_id})"
+
+        if not jellyfin_id:
+            log.warning(f"{prefix}: ⚠️ Nu există jellyfin_id, skip")
+            return None
+
+        created_at = None
+        if user_data.get("created_at"):
+            created_at = datetime.fromisoformat(user_data["created_at"])
+            if created_at.tzinfo is not None:
+                created_at = created_at.replace(tzinfo=None)
+
+        # Obține ultima activitate
+        if activity is None:
+            last_activity = await self._get_user_last_activity(server_config["url"], token, jellyfin_id)
+            stats["detailed"] += 1
+        else:
+            last_activity = activity.get(jellyfin_id)
+            if self._needs_detailed_activity(last_activity, created_at, now):
+                detailed = await self._get_user_last_activity(server_config["url"], token, jellyfin_id)
+                stats["detailed"] += 1
+                if detailed and (last_activity is None or detailed > last_activity):
+                    last_activity = detailed
+
+        if not last_activity:
+            # Dacă nu putem obține activitatea, folosim data creării
+            if not created_at:
+                log.error(f"{prefix}: ❌ Nu există nici last_activity, nici created_at, skip complet")
+                return None
+            log.info(f"{prefix}: 📅 Fără last_activity, created_at: {created_at} ({(now - created_at).days} zile)")
+
+            # Dacă utilizatorul a fost creat acum 7+ zile și nu s-a conectat niciodată
+            if created_at <= now - timedelta(days=7):
+                log.info(f"{prefix}: 🗑️ UTILIZATOR FĂRĂ LOGIN - de șters (>7 zile fără conectare)")
+                return ("deleted_no_login", created_at)
+            return None
+
+        # Calculează zilele de inactivitate
+        days_inactive = (now - last_activity).days
+        if last_activity <= now - timedelta(days=90):
+            log.info(f"{prefix}: 🗑️ TREBUIE ȘTERS (last activity {last_activity}, {days_inactive} zile)")
+            return ("deleted", last_activity)
+
+        log.info(f"{prefix}: ✅ Nu necesită acțiuni (zile inactive: {days_inactive})")
+        return None
+
+    def _needs_detailed_activity(self, last_activity: Optional[datetime], created_at: Optional[datetime],
+                                 now: datetime) -> bool:
+        """Dacă activitatea din `/Users` nu ajunge pentru o decizie sigură"""
+        if last_activity is None:
+            # Fără nicio activitate: confirmăm doar înainte de o ștergere pentru „niciodată conectat”
+            return created_at is None or created_at <= now - timedelta(days=7)
+        return abs((now - last_activity) - timedelta(days=90)) <= timedelta(days=self.ACTIVITY_MARGIN_DAYS)
+
+    async def _get_users_activity(self, server_url: str, token: str) -> Optional[Dict[str, datetime]]:
+        """Ultima activitate a tuturor utilizatorilor unui server, dintr-un singur apel `/Users`.
+
+        Returnează {jellyfin_id: cea mai recentă dintre LastActivityDate/LastLoginDate}
+        (utilizatorii fără nicio dată lipsesc din hartă) sau None la eroare.
+        """
+        headers = {"X-MediaBrowser-Token": token}
+        try:
+            session = await self._get_session()
+            async with session.get(f"{server_url}/Users", headers=headers, timeout=30) as resp:
+                if resp.status != 200:
+                    log.error(f"Lista utilizatorilor de pe {server_url} a returnat {resp.status}")
+                    return None
+                users = await resp.json()
+        except Exception as e:
+            log.error(f"Eroare la obținerea listei de utilizatori de pe {server_url}: {e}")
+            return None
+
+        activity = {}
+        for user in users:
+            dates = [
+                self._parse_jellyfin_date(user.get(field))
+                for field in ("LastActivityDate", "LastLoginDate")
+            ]
+            dates = [dt for dt in dates if dt]
+            if user.get("Id") and dates:
+                activity[user["Id"]] = max(dates)
+        return activity
+
+    @staticmethod
+    def _parse_jellyfin_date(value: Optional[str]) -> Optional[datetime]:
+        """Convertește o dată Jellyfin (ISO, UTC, până la 7 zecimale) în datetime naive"""
+        if not value:
+            return None
+        value = value.replace("Z", "+00:00")
+        # Jellyfin trimite 7 zecimale; fromisoformat acceptă cel mult 6
+        if "." in value:
+            head, tail = value.split(".", 1)
+            digits = len(tail) - len(tail.lstrip("0123456789"))
+            value = f"{head}.{tail[:min(digits, 6)]}{tail[digits:]}"
+        try:
+            return datetime.fromisoformat(value).replace(tzinfo=None)
+        except ValueError:
+            return None
+
+    async def _deletion_worker(self, deletions: asyncio.Queue, stats: Dict[str, int], reporter,
+                               changes: TrackingUnitOfWork, role_checks: set):
+        """Lucrător care aplică ștergerile din coadă, una câte una"""
+        while True:
+            server_name, server_config, token, account, (action, reference_date) = await deletions.get()
+            discord_user_id, jellyfin_username, user_data = account
+            try:
+                success = await self._delete_jellyfin_user(server_config["url"], token, user_data["jellyfin_id"])
+                if not success:
+                    log.error(f"    [{server_name}] ❌ Ștergerea lui {jellyfin_username} a eșuat")
+                    stats["failed"] += 1
+                    continue
+
+                log.info(f"    [{server_name}] ✅ {jellyfin_username} șters cu succes ({action})")
+                await self._send_cleanup_notification(
+                    server_name, jellyfin_username, discord_user_id, action, reference_date
+                )
+                changes.remove_account(discord_user_id, server_name, jellyfin_username)
+                role_checks.add((discord_user_id, server_name))
+                stats["deleted"] += 1
+            except Exception as e:
+                log.error(f"Eroare la ștergerea lui {jellyfin_username} de pe {server_name}: {e}", exc_info=True)
+                stats["failed"] += 1
+            finally:
+                deletions.task_done()
+                await reporter.report()
+
     async def _send_cleanup_notification(self, server_name: str, jellyfin_username: str, discord_user_id: int, action: str, last_activity: datetime):
         """Trimite notificare despre acțiunea de cleanup"""
         log.info(f"=== TRIMITERE NOTIFICARE ===")
@@ -653,57 +873,55 @@ class JellyfinCog(commands.Cog):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(create_url, json=user_data, headers=headers, timeout=10) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return {"success": True, "user_id": data.get("Id"), "message": "Utilizator creat cu succes"}
-                    else:
-                        error_text = await resp.text()
-                        return {"success": False, "error": f"Status {resp.status}: {error_text}"}
+            session = await self._get_session()
+            async with session.post(create_url, json=user_data, headers=headers, timeout=10) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    return {"success": True, "user_id": data.get("Id"), "message": "Utilizator creat cu succes"}
+                else:
+                    error_text = await resp.text()
+                    return {"success": False, "error": f"Status {resp.status}: {error_text}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     async def _add_user_to_tracking(self, discord_user_id: int, server_name: str, jellyfin_username: str, jellyfin_id: str):
         """Adaugă utilizatorul la sistemul de tracking"""
-        users = await self.config.users()
-        user_id_str = str(discord_user_id)
-        
-        if user_id_str not in users:
-            users[user_id_str] = {}
-        
-        if server_name not in users[user_id_str]:
-            users[user_id_str][server_name] = {}
-        
-        users[user_id_str][server_name][jellyfin_username] = {
-            "created_at": datetime.now().isoformat(),
-            "server_name": server_name,
-            "jellyfin_id": jellyfin_id,
-            "status": "active"
-        }
-        
-        await self.config.users.set(users)
+        tracking = await self._tracking()
+        tracking.add_account(discord_user_id, server_name, jellyfin_username, jellyfin_id)
     
     async def _get_user_by_jellyfin_username(self, jellyfin_username: str) -> Optional[Dict[str, Any]]:
-        """Găsește utilizatorul Discord după username-ul Jellyfin (doar utilizatori activi)"""
-        users = await self.config.users()
-        
-        for discord_user_id, user_data in users.items():
-            for server_name, server_users in user_data.items():
-                if jellyfin_username in server_users:
-                    user_info = server_users[jellyfin_username]
-                    # Returnează doar dacă utilizatorul este activ
-                    if user_info.get("status", "active") == "active":
-                        return {
-                            "discord_user_id": int(discord_user_id),
-                            "server_name": server_name,
-                            "jellyfin_username": jellyfin_username,
-                            "created_at": user_info["created_at"],
-                            "jellyfin_id": user_info.get("jellyfin_id"),
-                            "status": "active"
-                        }
-        return None
+        """Găsește utilizatorul Discord după username-ul (sau Id-ul) Jellyfin (doar utilizatori activi)"""
+        tracking = await self._tracking()
+        row = tracking.find_active(jellyfin_username) or tracking.find_active_by_id(jellyfin_username)
+        if row is None:
+            return None
+        return {
+            "discord_user_id": row["discord_id"],
+            "server_name": row["server"],
+            "jellyfin_username": row["jellyfin_username"],
+            "created_at": row["created_at"],
+            "jellyfin_id": row["jellyfin_id"],
+            "status": "active"
+        }
     
+    async def member_accounts(self, discord_user_id: int) -> List[Dict[str, Any]]:
+        """Conturile Jellyfin active create de un membru prin acest cog, cu URL-ul serverului lor.
+
+        Folosit de alte coguri (ex: JellyfinRecommendation) ca dovadă că un cont îi aparține membrului.
+        """
+        tracking = await self._tracking()
+        servers = await self.config.servers()
+        return [
+            {
+                "server_name": row["server"],
+                "server_url": servers[row["server"]]["url"],
+                "jellyfin_username": row["jellyfin_username"],
+                "jellyfin_id": row["jellyfin_id"],
+            }
+            for row in tracking.accounts_for_user(discord_user_id)
+            if row["status"] == "active" and row["jellyfin_id"] and row["server"] in servers
+        ]
+
     async def _assign_role(self, guild: discord.Guild, member: discord.Member, server_name: str):
         """Atribuie rolul corespunzător utilizatorului"""
         server_roles = await self.config.guild(guild).server_roles()
@@ -796,9 +1014,32 @@ class JellyfinCog(commands.Cog):
     @checks.is_owner()
     async def manual_cleanup_check(self, ctx):
         """Execută manual verificarea pentru cleanup (doar pentru testare)"""
-        await ctx.send("🔄 Încep verificarea manuală a utilizatorilor inactivi...")
-        await self._check_inactive_users()
+        if self._scan_lock.locked():
+            await ctx.send("⏳ O verificare rulează deja, încearcă mai târziu.")
+            return
+
+        message = await ctx.send("🔄 Încep verificarea manuală a utilizatorilor inactivi...")
+
+        async def progress(stats, final):
+            await message.edit(content=self._progress_text(stats, final))
+
+        stats = await self._check_inactive_users(progress=progress)
+        if stats is None:
+            await ctx.send("⏳ O verificare rulează deja, încearcă mai târziu.")
+            return
         await ctx.send("✅ Verificarea a fost completată!")
+
+    @staticmethod
+    def _progress_text(stats: Dict[str, int], final: bool) -> str:
+        text = (
+            f"{'✅ Verificare completă' if final else '🔄 Verificare în curs'}: "
+            f"{stats['checked']}/{stats['total']} conturi verificate, {stats['deleted']} șterse"
+        )
+        if stats["failed"]:
+            text += f", {stats['failed']} conturi eșuate (evaluare sau ștergere)"
+        if stats["skipped"]:
+            text += f", {stats['skipped']} sărite (server inaccesibil)"
+        return text
     
     @server.command(name="removeserver")
     @checks.is_owner()
@@ -915,9 +1156,8 @@ class JellyfinCog(commands.Cog):
         Va șterge complet istoricul tuturor utilizatorilor Jellyfin din tracking.
         """
         # Obține numărul actual de utilizatori
-        users = await self.config.users()
-        total_users = sum(len(servers) for servers in users.values())
-        total_discord_users = len(users)
+        tracking = await self._tracking()
+        total_discord_users, total_users = tracking.counts()
         
         if total_users == 0:
             await ctx.send("✅ Nu există utilizatori în baza de date.")
@@ -968,7 +1208,7 @@ class JellyfinCog(commands.Cog):
             return
         
         # Efectuează resetul
-        await self.config.users.set({})
+        tracking.clear()
         
         # Creează embed de confirmare
         success_embed = discord.Embed(
@@ -1089,14 +1329,14 @@ class JellyfinCog(commands.Cog):
             await ctx.send("❌ Comenzile Jellyfin nu sunt activate pe acest server Discord.")
             return
         
-        users_data = await self.config.users()
+        tracking = await self._tracking()
         servers_data = await self.config.servers()
         
         if isinstance(utilizator, discord.Member):
             # Caută după utilizatorul Discord
-            user_id_str = str(utilizator.id)
+            accounts = tracking.accounts_for_user(utilizator.id)
             
-            if user_id_str not in users_data or not users_data[user_id_str]:
+            if not accounts:
                 await ctx.send(f"❌ {utilizator.mention} nu are utilizatori Jellyfin creați.")
                 return
             
@@ -1109,16 +1349,19 @@ class JellyfinCog(commands.Cog):
             total_active_users = 0
             has_any_server = False
             
-            for server_name, server_users in users_data[user_id_str].items():
+            server_users_by_name = {}
+            for row in accounts:
+                server_users_by_name.setdefault(row["server"], []).append(row)
+            
+            for server_name, server_users in server_users_by_name.items():
                 if server_name in servers_data:
                     server_url = servers_data[server_name]["url"]
                     
                     # Filtrează doar utilizatorii activi
                     active_users_list = []
-                    for username, user_info in server_users.items():
-                        status = user_info.get("status", "active")
-                        if status == "active":
-                            active_users_list.append(f"🟢 {username}")
+                    for row in server_users:
+                        if row["status"] == "active":
+                            active_users_list.append(f"🟢 {row['jellyfin_username']}")
                             total_active_users += 1
                     
                     # Adaugă field-ul doar dacă sunt utilizatori activi
@@ -1181,18 +1424,14 @@ class JellyfinCog(commands.Cog):
                 embed.add_field(name="⚠️ Atenție", value="Acest utilizator ar trebui să fie șters pentru inactivitate (>90 zile)", inline=False)
             
             # Caută și alți utilizatori activi de pe același server Discord
-            user_id_str = str(user_info["discord_user_id"])
-            if user_id_str in users_data:
-                all_servers = []
-                total_active_accounts = 0
-                for srv_name, srv_users in users_data[user_id_str].items():
-                    # Numără doar utilizatorii activi
-                    active_count = sum(1 for u in srv_users.values() if u.get("status", "active") == "active")
-                    
-                    # Adaugă serverul doar dacă are utilizatori activi
-                    if active_count > 0:
-                        all_servers.append(f"• {srv_name} (🟢{active_count})")
-                        total_active_accounts += active_count
+            active_by_server = {}
+            for row in tracking.accounts_for_user(user_info["discord_user_id"]):
+                # Numără doar utilizatorii activi
+                if row["status"] == "active":
+                    active_by_server[row["server"]] = active_by_server.get(row["server"], 0) + 1
+            if active_by_server:
+                all_servers = [f"• {srv_name} (🟢{active_count})" for srv_name, active_count in active_by_server.items()]
+                total_active_accounts = sum(active_by_server.values())
                 
                 if len(all_servers) > 1:
                     embed.add_field(
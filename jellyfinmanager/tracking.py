@@ -0,0 +1,205 @@
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+log = logging.getLogger("red.jellyfincog")
+
+
+class TrackingStore:
+    """Conturile Jellyfin urmărite, într-o bază SQLite cu un rând per cont.
+
+    Cheia primară (discord_id, server, jellyfin_username) servește și căutările după
+    utilizatorul Discord; indexurile pe (jellyfin_username, server) și jellyfin_id
+    servesc căutările după contul Jellyfin, iar cel pe (server, discord_id, jellyfin_username)
+    parcurgerea pe server. Astfel nicio căutare nu mai încarcă tot tracking-ul, iar
+    verificarea inactivității ține în memorie doar câte un lot de rânduri per server.
+    """
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(str(path), timeout=10)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS accounts ("
+                " discord_id INTEGER NOT NULL,"
+                " server TEXT NOT NULL,"
+                " jellyfin_username TEXT NOT NULL,"
+                " jellyfin_id TEXT,"
+                " created_at TEXT,"
+                " status TEXT NOT NULL DEFAULT 'active',"
+                " PRIMARY KEY (discord_id, server, jellyfin_username))"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_accounts_username ON accounts(jellyfin_username, server)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_accounts_jellyfin_id ON accounts(jellyfin_id)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_accounts_server ON accounts(server, discord_id, jellyfin_username)"
+            )
+
+    def import_users(self, users: dict) -> int:
+        """Importă documentul vechi din Config ({discord_id: {server: {username: date}}}).
+
+        Conturile deja prezente sunt păstrate, deci importul poate fi reluat fără efecte.
+        Returnează numărul de conturi adăugate.
+        """
+        rows = [
+            (int(discord_id), server_name, jellyfin_username, data.get("jellyfin_id"),
+             data.get("created_at"), data.get("status", "active"))
+            for discord_id, user_servers in users.items()
+            for server_name, server_users in user_servers.items()
+            for jellyfin_username, data in server_users.items()
+        ]
+        with self._db:
+            cursor = self._db.executemany(
+                "INSERT OR IGNORE INTO accounts"
+                " (discord_id, server, jellyfin_username, jellyfin_id, created_at, status)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return cursor.rowcount
+
+    def add_account(self, discord_id: int, server_name: str, jellyfin_username: str, jellyfin_id: str,
+                    created_at: Optional[str] = None):
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO accounts"
+                " (discord_id, server, jellyfin_username, jellyfin_id, created_at, status)"
+                " VALUES (?, ?, ?, ?, ?, 'active')",
+                (int(discord_id), server_name, jellyfin_username, jellyfin_id,
+                 created_at or datetime.now().isoformat()),
+            )
+
+    def accounts_for_user(self, discord_id: int) -> List[sqlite3.Row]:
+        """Conturile unui utilizator Discord, grupate pe server"""
+        return self._db.execute(
+            "SELECT * FROM accounts WHERE discord_id = ? ORDER BY server, jellyfin_username",
+            (int(discord_id),),
+        ).fetchall()
+
+    def find_active(self, jellyfin_username: str) -> Optional[sqlite3.Row]:
+        """Primul cont activ cu acest username, de pe orice server"""
+        return self._db.execute(
+            "SELECT * FROM accounts WHERE jellyfin_username = ? AND status = 'active' ORDER BY server LIMIT 1",
+            (jellyfin_username,),
+        ).fetchone()
+
+    def find_active_by_id(self, jellyfin_id: str) -> Optional[sqlite3.Row]:
+        """Contul activ cu acest Id Jellyfin (Id-urile apar în log-uri și notificări)"""
+        return self._db.execute(
+            "SELECT * FROM accounts WHERE jellyfin_id = ? AND status = 'active' LIMIT 1",
+            (jellyfin_id,),
+        ).fetchone()
+
+    def count_active(self, discord_id: int, server_name: str) -> Tuple[int, int]:
+        """(conturi active, conturi în total) ale unui utilizator Discord pe un server"""
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(status != 'deleted'), 0), COUNT(*) FROM accounts"
+            " WHERE discord_id = ? AND server = ?",
+            (int(discord_id), server_name),
+        ).fetchone()
+        return row[0], row[1]
+
+    def iter_accounts(self, server_name: str, batch_size: int = 500) -> Iterator[sqlite3.Row]:
+        """Conturile unui server, citite în loturi de `batch_size`.
+
+        Fiecare lot este o interogare separată care continuă după ultima cheie citită, deci
+        nicio interogare nu rămâne deschisă cât timp verificarea scrie în tracking.
+        """
+        last = (-1, "")
+        while True:
+            rows = self._db.execute(
+                "SELECT * FROM accounts WHERE server = ? AND (discord_id, jellyfin_username) > (?, ?)"
+                " ORDER BY discord_id, jellyfin_username LIMIT ?",
+                (server_name, *last, batch_size),
+            ).fetchall()
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last = (rows[-1]["discord_id"], rows[-1]["jellyfin_username"])
+
+    def count_by_server(self) -> Dict[str, int]:
+        """{server: numărul de conturi urmărite}"""
+        return dict(self._db.execute("SELECT server, COUNT(*) FROM accounts GROUP BY server").fetchall())
+
+    def counts(self) -> Tuple[int, int]:
+        """(utilizatori Discord, conturi Jellyfin) din tracking"""
+        row = self._db.execute("SELECT COUNT(DISTINCT discord_id), COUNT(*) FROM accounts").fetchone()
+        return row[0], row[1]
+
+    def apply(self, changes: List[Tuple]):
+        """Aplică modificările unui TrackingUnitOfWork într-o singură tranzacție"""
+        with self._db:
+            for change in changes:
+                if change[0] == "user":
+                    self._db.execute("DELETE FROM accounts WHERE discord_id = ?", (int(change[1]),))
+                else:
+                    _, discord_id, server_name, jellyfin_username = change
+                    self._db.execute(
+                        "DELETE FROM accounts WHERE discord_id = ? AND server = ? AND jellyfin_username = ?",
+                        (int(discord_id), server_name, jellyfin_username),
+                    )
+
+    def clear(self):
+        with self._db:
+            self._db.execute("DELETE FROM accounts")
+
+    def close(self):
+        self._db.close()
+
+
+class TrackingUnitOfWork:
+    """Colectează modificările tracking-ului și le scrie grupat.
+
+    Modificările sunt aplicate într-o singură tranzacție la fiecare `checkpoint_every`
+    modificări și la `commit()`. Astfel o verificare care șterge sute de conturi face
+    câteva scrieri pe disc, nu sute, iar la un crash se pierd cel mult ultimele
+    `checkpoint_every` modificări (conturile deja șterse de pe Jellyfin sunt reconciliate
+    la următoarea verificare). Folosit ca `with`, face commit și la ieșirea cu excepție.
+    """
+
+    def __init__(self, store: TrackingStore, checkpoint_every: int = 25):
+        self.store = store
+        self.checkpoint_every = checkpoint_every
+        self._pending: List[Tuple] = []
+        self.committed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.commit()
+        return False
+
+    def remove_account(self, discord_user_id, server_name: str, jellyfin_username: str):
+        """Șterge un cont din tracking"""
+        self._record(("account", int(discord_user_id), server_name, jellyfin_username))
+
+    def remove_user(self, discord_user_id):
+        """Șterge complet un utilizator Discord din tracking"""
+        self._record(("user", int(discord_user_id)))
+
+    def _record(self, change: Tuple):
+        self._pending.append(change)
+        if len(self._pending) >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Scrie modificările adunate până acum, într-o singură tranzacție"""
+        if not self._pending:
+            return
+        changes, self._pending = self._pending, []
+        try:
+            self.store.apply(changes)
+        except Exception:
+            # Modificările rămân în așteptare pentru următorul checkpoint
+            self._pending = changes + self._pending
+            raise
+        self.committed += len(changes)
+        log.info(f"Tracking: {len(changes)} modificări scrise ({self.committed} în total)")
+
+    commit = checkpoint